@@ -3,12 +3,48 @@ Multi-Omics Research Showcase — *Citrus reticulata* cv. Chachiensis PMF Biosyn
 Based on: *Nature Communications* paper (DOI: https://www.nature.com/articles/s41467-024-48235-y)
 """
 
+from __future__ import annotations
+
 import streamlit as st
-import pandas as pd
-import yaml
-import io
+import re
+import time
 from pathlib import Path
 
+from showcase import catalog, config, metrics
+from showcase.util import file_digest, lazy_import, rss_bytes
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+# Heavy dependencies load on the first page that touches them, so a cold start
+# (the first visitor after the host wakes the app) only pays for what the
+# landing page renders. ``python -m showcase.startup`` shows where the time goes.
+pd = lazy_import("pandas")
+np = lazy_import("numpy")
+alt = lazy_import("altair")
+annotation = lazy_import("showcase.annotation")
+correlation = lazy_import("showcase.correlation")
+data = lazy_import("showcase.data")
+deseq = lazy_import("showcase.deseq")
+downloads = lazy_import("showcase.downloads")
+genome = lazy_import("showcase.genome")
+hic = lazy_import("showcase.hic")
+images = lazy_import("showcase.images")
+modules = lazy_import("showcase.modules")
+multivariate = lazy_import("showcase.multivariate")
+network = lazy_import("showcase.network")
+precompute = lazy_import("showcase.precompute")
+prioritize = lazy_import("showcase.prioritize")
+search = lazy_import("showcase.search")
+similarity = lazy_import("showcase.similarity")
+store = lazy_import("showcase.store")
+
+# Cache decorators that count hits / misses when SHOWCASE_METRICS=1 (plain st.cache_* otherwise)
+cache_data = metrics.cache(st.cache_data)
+cache_resource = metrics.cache(st.cache_resource)
+# Per-study variants: entries are recorded under the current study and cleared
+# when it falls out of the loaded-studies LRU (SHOWCASE_MAX_STUDIES)
+study_data = catalog.scoped(cache_data, lambda: STUDY.id)
+study_resource = catalog.scoped(cache_resource, lambda: STUDY.id)
+
 # ── Resolve paths relative to this script, not the working directory ──────────
 BASE_DIR = Path(__file__).parent
 
@@ -20,14 +56,196 @@ st.set_page_config(
     initial_sidebar_state="expanded",
 )
 
+# ── Study catalog ──────────────────────────────────────────────────────────────
+# catalog.yaml lists the studies; only the selected one's config is loaded.
+@cache_resource
+def load_catalog(digest: str) -> tuple[catalog.Study, ...]:
+    return catalog.load()
+
+try:
+    STUDIES = load_catalog(file_digest(catalog.CATALOG_PATH) if catalog.CATALOG_PATH.exists() else "")
+except config.ConfigError as e:
+    st.error(f"catalog.yaml could not be loaded: {e}")
+    st.stop()
+STUDY_BY_ID = {s.id: s for s in STUDIES}
+if st.session_state.get("study") not in STUDY_BY_ID:
+    linked = st.query_params.get("study")
+    st.session_state["study"] = linked if linked in STUDY_BY_ID else STUDIES[0].id
+STUDY = STUDY_BY_ID[st.session_state["study"]]
+catalog.LOADED.touch(STUDY.id)
+
 # ── Load config ────────────────────────────────────────────────────────────────
-@st.cache_data
-def load_config(mtime: float):          
-    with open(BASE_DIR / "content_config.yaml", "r") as f:
-        return yaml.safe_load(f)
+# One validated, precomputed snapshot per study and content hash, shared by all sessions.
+@study_resource
+def load_snapshot(path: str, digest: str) -> config.Snapshot:
+    with metrics.timer("config_compile"):
+        return config.precompiled(Path(path))
+
+config_path = STUDY.config
+try:
+    with metrics.timer("config_load"):
+        SNAP = load_snapshot(str(config_path), file_digest(config_path))
+except (config.ConfigError, OSError) as e:
+    st.error(f"{config_path.name} ({STUDY.id}) could not be loaded: {e}")
+    st.stop()
+CFG = SNAP.cfg
+
+# ── Background builds ──────────────────────────────────────────────────────────
+# SHOWCASE_PRECOMPUTE=1: the first run in a process starts a thread that builds
+# the study's stale derived artifacts; pages show "building…" meanwhile.
+@cache_resource
+def background_builds(study_id: str):
+    return precompute.start(STUDY_BY_ID[study_id])
+
+if precompute.ENABLED:
+    background_builds(STUDY.id)
+
+# ── Figure derivatives ─────────────────────────────────────────────────────────
+GALLERY_THUMB_WIDTH = 960           # two-column gallery on a wide layout, ~2x DPR
+
+@study_resource
+def figure_bytes(img: str, width: int | None, mtime: float) -> bytes:
+    """Encoded thumbnail (or full-size re-encode when width is None), read once per process."""
+    return images.derivative(BASE_DIR / img, width).read_bytes()
+
+# ── Data-backed sections ───────────────────────────────────────────────────────
+def need_data(*keys):
+    """Render a placeholder listing missing data files; True if any are missing."""
+    missing = [k for k in keys if data.data_path(CFG, k) is None]
+    for k in missing:
+        rel = (CFG.get("data") or {}).get(k, f"data.{k} in content_config.yaml")
+        st.markdown(f'<div class="placeholder">[NEED data] {k}: place the file at <code>{rel}</code></div>',
+                    unsafe_allow_html=True)
+    return bool(missing)
+
+
+def previous_build(name: str) -> Path | None:
+    """Output of the last completed build of artifact ``name`` while a rebuild is running."""
+    ledger = precompute.read_ledger(STUDY.id)
+    return precompute.previous(STUDY.id, name, ledger) if precompute.building(STUDY.id, name, ledger) else None
+
+
+def building_notice(name: str, what: str, showing_previous: bool = False) -> bool:
+    """Render a "building…" note while artifact ``name`` is built in the background; True if it is."""
+    entry = precompute.building(STUDY.id, name)
+    if entry is None:
+        return False
+    elapsed = time.time() - entry["building"]["started"]
+    last = f"; the last build took {entry['seconds']:.0f} s" if entry.get("seconds") else ""
+    shown = "Showing the previous build until it finishes." if showing_previous else \
+        "Results appear here as soon as it finishes."
+    st.info(f"⏳ Building {what} in the background (started {elapsed:.0f} s ago{last}). {shown}")
+    st.button("Check again", key=f"recheck_{name}")
+    return True
+
+
+@study_resource
+def data_matrix(key: str, digest: str) -> store.Matrix:
+    """Memory-mapped store table, converted on first use and shared by all sessions."""
+    return store.ensure(key, data.data_path(CFG, key), STUDY.dir_in(store.STORE_DIR))
+
+
+def open_matrix(key: str) -> store.Matrix:
+    return data_matrix(key, file_digest(data.data_path(CFG, key)))
+
+
+@study_resource
+def genome_browser(fasta: str, gff: str, version: tuple) -> genome.Genome:
+    """FASTA mmap + GFF3 interval index, (re)built once and shared by all sessions."""
+    return genome.Genome(Path(fasta), Path(gff))
+
+
+@study_resource(max_entries=2)
+def network_graph(path: str, digest: str) -> network.Network:
+    """Indexed edge store + layout, loaded from (or built into) .cache/network/ and shared."""
+    return network.open_network(Path(path))
+
+
+@study_data
+def network_nodes(path: str, digest: str) -> pd.DataFrame:
+    return network.read_nodes(Path(path))
+
+
+@study_resource
+def contact_map(path: str) -> hic.ContactMap:
+    """Memory-mapped Hi-C pyramid; its bounded tile cache is shared by all sessions."""
+    return hic.ContactMap(Path(path))
+
+
+@study_data(show_spinner="Running differential expression for all contrasts…")
+def de_result_files(counts: str, sheet: str, contrasts: tuple, version: tuple) -> dict:
+    """Contrast id → cached result file; contrasts missing from the cache run in parallel."""
+    paths = deseq.run_contrasts(Path(counts), Path(sheet), contrasts)
+    return {k: str(v) for k, v in paths.items()}
+
+
+def de_results(counts: Path, sheet: Path, contrasts: list) -> dict:
+    return de_result_files(str(counts), str(sheet), tuple(contrasts), (file_digest(counts), file_digest(sheet)))
+
+
+@study_data
+def de_table(path: str) -> pd.DataFrame:
+    return deseq.load_result(Path(path))
+
+
+@study_data
+def sample_sheet(path: str, digest: str) -> pd.DataFrame:
+    return deseq.read_sheet(Path(path))
+
+
+@study_resource(max_entries=8)
+def log_transformed(key: str, digest: str, log: str) -> np.ndarray:
+    """Samples × features after the log step; shared, treat as read-only."""
+    return multivariate.transform(open_matrix(key).values.T, log)
 
-config_path = BASE_DIR / "content_config.yaml"
-CFG = load_config(config_path.stat().st_mtime)   
+
+@study_resource(max_entries=8)
+def preprocessed(key: str, digest: str, log: str, scaling: str) -> np.ndarray:
+    t = log_transformed(key, digest, log)
+    return multivariate.scale(t, scaling, *multivariate.column_stats(t))
+
+
+@cache_data(persist="disk", show_spinner="Fitting PCA…")
+def pca_fit(key: str, digest: str, log: str, scaling: str, init_from: tuple | None = None) -> multivariate.PCA:
+    """
+    PCA at one preprocessing. ``init_from`` is the (log, scaling) of a cold fit
+    whose loadings warm-start this one; it is part of the key, so a stored
+    result is the same whichever session computed it first.
+    """
+    fit = multivariate.load_pca(multivariate.pca_path(data.data_path(CFG, key), log, scaling))
+    if fit is not None:                 # precomputed (python -m showcase.precompute)
+        return fit
+    m = open_matrix(key)
+    if m.nbytes > multivariate.STREAMING_BYTES:
+        return multivariate.pca_streaming(m.values, 10, log, scaling)
+    init = pca_fit(key, digest, *init_from).loadings if init_from else None
+    return multivariate.pca(preprocessed(key, digest, log, scaling), 10, init=init)
+
+
+@cache_data(persist="disk", show_spinner="Fitting OPLS-DA…")
+def opls_fit(key: str, digest: str, log: str, scaling: str, samples: tuple, labels: tuple,
+             positive: str, n_orth: int) -> multivariate.OPLS:
+    m = open_matrix(key)
+    x = multivariate.preprocess(m.select(columns=samples).to_numpy().T, log, scaling)
+    return multivariate.opls_da(x, labels, positive, n_orth)
+
+
+@study_data(show_spinner="Matching features against the PMF library…")
+def pmf_annotations(version: tuple) -> pd.DataFrame:
+    """Every library candidate per feature; ``version`` is the digests of the inputs."""
+    feats = open_matrix("feature_table").rows
+    md_path = data.data_path(CFG, "feature_metadata")
+    md = pd.read_csv(md_path, sep="," if md_path.suffix == ".csv" else "\t", index_col=0) if md_path else None
+    ms2 = data.data_path(CFG, "ms2_spectra")
+    return annotation.annotate(annotation.feature_coordinates(feats, md),
+                               annotation.read_mgf(data.data_path(CFG, "pmf_library")),
+                               annotation.read_mgf(ms2) if ms2 else None)
+
+
+@study_data
+def module_tables(result_dir: str, mtime: float):
+    res = modules.load(Path(result_dir))
+    return res.power, modules.module_summary(res), res.assignments, res.trait_cor
 
 # ── Shared CSS ─────────────────────────────────────────────────────────────────
 st.markdown("""
@@ -107,14 +325,60 @@ h3 { font-size: 1.1rem !important; font-weight: 600 !important; }
 """, unsafe_allow_html=True)
 
 # ── Sidebar navigation ─────────────────────────────────────────────────────────
-PAGES = ["Overview", "Study Design", "Methods", "Findings", "Pipeline", "Impact", "Resources"]
+PAGES = ["Overview", "Study Design", "Methods", "Findings", "Pipeline", "Impact", "Resources",
+         "Correlation", "Expression", "Genome", "Families", "Differential Expression", "Multivariate", "Network", "Hi-C", "Candidates"]
+
+def switch_study():
+    """Drop the previous study's widget state; keep navigation and the search box."""
+    for k in list(st.session_state):
+        if k not in ("study", "nav", "search_query"):
+            del st.session_state[k]
+    st.query_params["study"] = st.session_state["study"]
+
+
 with st.sidebar:
     st.markdown("### 🍊 Multi-Omics Showcase")
+    if len(STUDIES) > 1:
+        st.selectbox("Study", list(STUDY_BY_ID), key="study", format_func=lambda i: STUDY_BY_ID[i].title,
+                     on_change=switch_study)
     st.markdown(f"*{CFG['study']['short_title']}*")
     st.divider()
-    page = st.radio("Navigate", PAGES, label_visibility="collapsed")
+    page = st.radio("Navigate", PAGES, label_visibility="collapsed", key="nav")
     st.divider()
 
+# ── Sidebar search ─────────────────────────────────────────────────────────────
+SEARCH_HITS = 8
+
+@study_resource(max_entries=2)
+def search_index(digest: str, tables: tuple) -> search.Index:
+    """Content + feature-ID index, built on the first search per config/data version."""
+    docs = search.documents(CFG)
+    for key, _ in tables:
+        docs += search.feature_documents(key, open_matrix(key).rows, key.replace("_", " "))
+    with metrics.timer("search_index"):
+        return search.Index(docs)
+
+
+def goto(hit: search.Doc):
+    st.session_state["nav"] = hit.page
+    if hit.kind == "feature":
+        st.session_state["expr_table"] = hit.table
+        st.session_state["expr_query"] = hit.title
+
+
+with st.sidebar:
+    query = st.text_input("Search", placeholder="Search findings, methods, gene IDs…", key="search_query")
+    if query.strip():
+        tables = tuple((k, file_digest(p)) for k in data.table_keys(CFG) if (p := data.data_path(CFG, k)))
+        idx = search_index(SNAP.digest, tables)
+        t0 = time.perf_counter()
+        hits = idx.search(query, SEARCH_HITS)
+        st.caption(f"{len(hits)} result{'s' * (len(hits) != 1)} in {(time.perf_counter() - t0) * 1000:.1f} ms")
+        for i, (hit, _) in enumerate(hits):
+            label = f"{hit.title} · {hit.text}" if hit.kind == "feature" else hit.title
+            st.button(f"{hit.page} › {label}", key=f"search_hit_{i}", on_click=goto, args=(hit,),
+                      use_container_width=True)
+
 # ══════════════════════════════════════════════════════════════════════════════
 # PAGE: Overview
 # ══════════════════════════════════════════════════════════════════════════════
@@ -132,9 +396,8 @@ def page_overview():
     # Key deliverables
     st.markdown("## Key Deliverables")
     cols = st.columns(3)
-    for i, d in enumerate(CFG["deliverables"]):
+    for i, (d, needs_data) in enumerate(SNAP.deliverables):
         with cols[i % 3]:
-            needs_data = "[NEED" in d["detail"]
             border_color = "#d97706" if needs_data else "#2d6a4f"
             bg = "#fffbeb" if needs_data else "#f0fdf4"
             st.markdown(f"""
@@ -146,33 +409,46 @@ def page_overview():
 
     st.divider()
 
-    # Figure gallery placeholder
+    # Figure gallery (figures: in the study config)
     st.markdown("## Figure Gallery")
-    items = [
-    {"img": "assets/fig1_genome.png", "cap": "Fig. 1 — Fig1. Morphology and genome features of C. reticulata cv. Chachiensis (CRC)"},
-    {"img": "assets/fig3_OMT.png", "cap": "Fig. 3 — Fig3. OMT genes in CRC."},
-    {"img": "assets/fig4_PMF.png", "cap": "Fig. 4 — The relative content of 29 PMFs in CRC."},
-    {"img": "assets/fig5_CcOMT1.png", "cap": "Fig. 5 — Fig5. Catalytic function and mutants of CcOMT1."},
-    {"img": "assets/fig7_network.png", "cap": "Fig7. The potential gene regulation network of PMF biosynthesis"},
-]
-    c1, c2 = st.columns(2)
-    for i, it in enumerate(items):
-        with (c1 if i % 2 == 0 else c2):
-            st.image(it["img"], caption=it["cap"], use_container_width=True)
+    items = [f for f in CFG.get("figures") or () if (BASE_DIR / f["img"]).exists()]
+    with metrics.timer("block:gallery"):
+        c1, c2 = st.columns(2)
+        for i, it in enumerate(items):
+            with (c1 if i % 2 == 0 else c2):
+                mtime = (BASE_DIR / it["img"]).stat().st_mtime
+                full = st.toggle("Full size", key=f"gallery_full_{i}")
+                src = figure_bytes(it["img"], None if full else GALLERY_THUMB_WIDTH, mtime)
+                st.image(src, caption=it["caption"], use_container_width=True)
    
     st.divider()
 
     # Glossary
     st.markdown("## Glossary")
-    gcols = st.columns(2)
-    for i, (term, defn) in enumerate(CFG["glossary"].items()):
-        with gcols[i % 2]:
-            st.markdown(f"**{term}**: {defn}")
+    for col, entries in zip(st.columns(2), SNAP.glossary_columns):
+        with col:
+            for term, defn in entries:
+                st.markdown(f"**{term}**: {defn}")
 
 
 # ══════════════════════════════════════════════════════════════════════════════
 # PAGE: Study Design
 # ══════════════════════════════════════════════════════════════════════════════
+@cache_resource
+def study_tables() -> tuple[pd.DataFrame, pd.DataFrame]:
+    """Sample and assay tables: built once per process, shared by all sessions."""
+    samples = pd.DataFrame({
+        "Tissue": ["Young fruit","Young fruit","Pericarp (early)", "Pericarp (mid)", "Pericarp (late)"],
+        "Developmental stage": ["Apr", "May", "Jun", "Sep", "Nov"],
+        "Replicates": ["3", "3", "3", "3", "3"],
+    })
+    assays = pd.DataFrame({
+        "Modality": ["Genome", "Genome scaffolding", "Transcriptomics", "Metabolomics"],
+        "Technology": ["Nanopore PromethION", "Hi-C", "BGISEQ RNA-seq", "LC-MS/MS"],
+    })
+    return samples, assays
+
+
 def page_study_design():
     st.title("Study Design")
 
@@ -212,12 +488,7 @@ def page_study_design():
     col1, col2 = st.columns(2)
     with col1:
         st.markdown("**Tissues sampled for transcriptomic and metabolomic integrated analysis**")
-        samples = {
-            "Tissue": ["Young fruit","Young fruit","Pericarp (early)", "Pericarp (mid)", "Pericarp (late)"],
-            "Developmental stage": ["Apr", "May", "Jun", "Sep", "Nov"],
-            "Replicates": ["3", "3", "3", "3", "3"],
-        }
-        st.dataframe(pd.DataFrame(samples), use_container_width=True, hide_index=True)
+        st.dataframe(study_tables()[0], use_container_width=True, hide_index=True)
     with col2:
         st.markdown("**Key contrasts**")
         st.markdown("""
@@ -230,11 +501,7 @@ def page_study_design():
 
     # Data types
     st.markdown("## Data Types and Assays")
-    assay_data = {
-        "Modality": ["Genome", "Genome scaffolding", "Transcriptomics", "Metabolomics"],
-        "Technology": ["Nanopore PromethION", "Hi-C", "BGISEQ RNA-seq", "LC-MS/MS"],
-    }
-    st.dataframe(pd.DataFrame(assay_data), use_container_width=True, hide_index=True)
+    st.dataframe(study_tables()[1], use_container_width=True, hide_index=True)
 
     st.divider()
 
@@ -308,13 +575,12 @@ def page_findings():
 
     # Finding cards
     st.markdown("## Finding Cards")
-    for f in CFG["findings"]:
-        validated = "[NEED" not in f["claim"]
+    for f, validated, title in SNAP.findings:
         color = "#1a56a0" if validated else "#92400e"
         bg = "#f0f7ff" if validated else "#fffbeb"
         border = "#93c5fd" if validated else "#fcd34d"
 
-        with st.expander(f"**{f['id']}** — {f['claim'][:80]}...", expanded=True):
+        with st.expander(title, expanded=True):
             st.markdown(f"""
             <div class="card" style="border-left: 4px solid {color}; background: {bg};">
                 <strong>Claim:</strong> {f['claim']}<br><br>
@@ -331,19 +597,61 @@ def page_findings():
     # Evidence map
     st.markdown("## Evidence Map")
     st.markdown("*Linking findings to evidence types and artifact categories.*")
+    with metrics.timer("block:evidence_table"):
+        st.dataframe(SNAP.evidence_df, use_container_width=True, hide_index=True)
+
+    st.divider()
+
+    # PMF annotation (D4): features matched to the in-house PMF library
+    st.markdown("## PMF Annotations")
+    st.markdown("*Feature table matched to the PMF library by m/z (ppm) and RT window, "
+                "scored by MS2 cosine. Level 2 = MS2 match, level 3 = precursor only.*")
+    if not need_data("feature_table", "pmf_library"):
+        version = tuple(file_digest(data.data_path(CFG, k)) if data.data_path(CFG, k) else ""
+                        for k in ("feature_table", "feature_metadata", "ms2_spectra", "pmf_library"))
+        cands = pmf_annotations(version)
+        best = annotation.best_hits(cands)
+        a1, a2, a3 = st.columns(3)
+        a1.metric("Annotated features", len(best))
+        a2.metric("PMFs matched", best["library_name"].nunique())
+        a3.metric("Level 2 (MS2)", int((best["level"] == 2).sum()))
+        st.dataframe(best, use_container_width=True, hide_index=True)
+        with st.expander("All candidates"):
+            st.dataframe(cands, use_container_width=True, hide_index=True)
+
+    st.divider()
+
+    # Co-expression modules (D5 / F4), persisted by `python -m showcase.modules`
+    st.markdown("## Co-expression Modules")
+    st.markdown("*WGCNA-style modules and their correlation with PMF metabolite levels.*")
+    if need_data("expression_matrix"):
+        return
+    out = modules.result_dir(data.data_path(CFG, "expression_matrix"), data.data_path(CFG, "metabolite_table"),
+                             modules.params_from_config(CFG))
+    if not (out / "meta.json").exists():
+        out = previous_build("modules")
+        if not building_notice("modules", "the co-expression modules", showing_previous=out is not None):
+            st.markdown('<div class="placeholder">[NEED modules] build them once with '
+                        '<code>python -m showcase.modules</code></div>', unsafe_allow_html=True)
+        if out is None:
+            return
+    power, summary, assignments, trait_cor = module_tables(str(out), (out / "meta.json").stat().st_mtime)
+
+    m1, m2, m3 = st.columns(3)
+    m1.metric("Soft-threshold power", power)
+    m2.metric("Modules", len(summary))
+    m3.metric("Genes assigned", f"{int(summary['genes'].sum()):,} / {len(assignments):,}")
+    st.dataframe(summary, use_container_width=True, hide_index=True)
 
-    evidence_rows = []
-    for f in CFG["findings"]:
-        for artifact in f["artifacts"]:
-            evidence_rows.append({
-                "Finding": f["id"],
-                "Claim (short)": f["claim"][:60] + "…",
-                "Evidence type": f["evidence_type"].split(";")[0].strip(),
-                "Artifact": artifact,
-                "Figure": f["figure_ref"],
-            })
-    ev_df = pd.DataFrame(evidence_rows)
-    st.dataframe(ev_df, use_container_width=True, hide_index=True)
+    col1, col2 = st.columns(2)
+    with col1:
+        st.markdown("**Strongest module–trait correlations**")
+        top = trait_cor.reindex(trait_cor["r"].abs().sort_values(ascending=False).index).head(20)
+        st.dataframe(top, use_container_width=True, hide_index=True)
+    with col2:
+        mod = st.selectbox("Module membership", summary["module"])
+        members = assignments[assignments["module"] == mod].sort_values("kME", ascending=False)
+        st.dataframe(members, use_container_width=True, hide_index=True)
 
 
 
@@ -387,7 +695,7 @@ def page_pipeline():
             "name": "5 · Candidate Prioritization",
             "inputs": "Correlation table; module memberships; functional annotations",
             "outputs": "Ranked candidate list; phylogenetic tree; filtered OMT shortlist",
-            "repro": "Filter thresholds in `config/prioritization.yaml`; reproducible with `make candidates`",
+            "repro": "Weights and thresholds in `config/prioritization.yaml`; ranked on the Candidates page",
             "color": "#fee2e2",
         },
         {
@@ -517,15 +825,7 @@ def page_resources():
 
     # Primary links
     st.markdown("## Primary Links")
-    link_data = {
-        "Resource": ["Paper (DOI)", "Genome Accession", "RNA-seq Accession", "Metabolomics Accession"],
-        "Link / Accession": [
-            r["paper_doi"],r["genome_accession"],
-            r["rnaseq_accession"], r["metabolomics_accession"]
-        ],
-        "Status": ["available", "available", "available", "available via request"],
-    }
-    st.dataframe(pd.DataFrame(link_data), use_container_width=True, hide_index=True)
+    st.dataframe(SNAP.links_df, use_container_width=True, hide_index=True)
 
     st.divider()
 
@@ -535,6 +835,869 @@ def page_resources():
         f"{r['paper_doi']}"
     )
 
+    if st.query_params.get("export") != "static":        # the static site has no server to build files
+        st.divider()
+        st.markdown("## Download Center")
+        st.markdown("*Tables are written to disk chunk by chunk on first request and reused until "
+                    "their inputs change; file names carry a content hash.*")
+        download_center()
+
+
+# ── Download center ────────────────────────────────────────────────────────────
+DOWNLOAD_BUTTON_MAX_BYTES = 20 * 2**20     # in-memory fallback when static serving is off
+
+def candidate_chunks():
+    """The configured ranking (weights, thresholds and family filter from prioritization.yaml)."""
+    criteria, settings = prioritize.load_config()
+    features, version, _ = candidate_features()
+    criteria = tuple(c for c in criteria if c.feature in features)
+    ranker = base_ranker((version, criteria), features, criteria).fork()
+    try:
+        yield prioritize.shortlist(ranker, settings.get("family"))
+    except re.error as e:
+        st.warning(f"Family filter in config/prioritization.yaml ignored (invalid regex: {e}).")
+        yield ranker.top(ranker.n_passing)
+
+
+def download_exports() -> list:
+    expr_path, met_path = data.data_path(CFG, "expression_matrix"), data.data_path(CFG, "metabolite_table")
+    hits = None
+    if expr_path and met_path:
+        version = (file_digest(expr_path), file_digest(met_path))
+        hits = lambda: correlation_hits(50, version).hits
+    exports = downloads.standard_exports(SNAP, hits)
+    if expr_path:
+        inputs = [data.data_path(CFG, k) for k in ("expression_matrix", "metabolite_table", "count_matrix",
+                                                  "sample_sheet", "gene_annotation")]
+        mod_meta = modules.result_dir(expr_path, met_path, modules.params_from_config(CFG)) / "meta.json"
+        key = downloads.export_key("candidates", [file_digest(p) for p in inputs if p],
+                                   file_digest(prioritize.CONFIG_PATH), [dict(c) for c in CFG.get("contrasts") or ()],
+                                   mod_meta.stat().st_mtime if mod_meta.exists() else None)
+        exports.insert(1, downloads.Export("candidates", "Candidate list", key, candidate_chunks,
+                                           "Genes ranked by config/prioritization.yaml"))
+    return exports
+
+
+def offer_download(name: str, fmt: str, key: str, make, static: bool):
+    built = downloads.lookup(name, fmt, key, STUDY.dir_in(downloads.EXPORT_DIR))
+    if built is None and st.button(f"Prepare {fmt.upper()}", key=f"dl_{name}_{fmt}"):
+        with st.spinner(f"Writing {name}.{fmt}…"):
+            built = make()
+    if built is None:
+        return
+    size = downloads.size_label(built.bytes)
+    if static:
+        st.markdown(f'<a href="{built.url}" download="{name}.{fmt}" title="sha256 {built.sha256}">⬇ {fmt.upper()}</a> '
+                    f'<small>{size} · {built.rows:,} rows</small>', unsafe_allow_html=True)
+    elif built.bytes <= DOWNLOAD_BUTTON_MAX_BYTES:
+        st.download_button(f"⬇ {fmt.upper()} · {size}", built.path.read_bytes(),
+                           file_name=f"{name}.{fmt}", key=f"dlb_{name}_{fmt}")
+    else:
+        st.caption(f"{size}: too large to send through the session; "
+                   "enable `server.enableStaticServing` to stream it from disk.")
+
+
+def download_center():
+    static = bool(st.get_option("server.enableStaticServing"))
+    out_dir = STUDY.dir_in(downloads.EXPORT_DIR)
+    exports = download_exports()
+    for e in exports:
+        label, *cols = st.columns([3] + [2] * len(downloads.FORMATS))
+        label.markdown(f"**{e.label}**  \n<small>{e.description}</small>", unsafe_allow_html=True)
+        for col, fmt in zip(cols, downloads.FORMATS):
+            with col:
+                offer_download(e.name, fmt, e.key, lambda e=e, fmt=fmt: downloads.build(e, fmt, out_dir), static)
+    parts = [e for e in exports if e.name not in downloads.BUNDLE_SKIP]
+    label, col = st.columns([3, 2 * len(downloads.FORMATS)])
+    label.markdown(f"**All supplementary tables**  \n<small>ZIP of {', '.join(e.label.lower() for e in parts)} "
+                   "(CSV)</small>", unsafe_allow_html=True)
+    with col:
+        offer_download(downloads.BUNDLE, "zip", downloads.bundle_key(parts),
+                       lambda: downloads.build_bundle(downloads.BUNDLE, parts, out_dir), static)
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+# PAGE: Correlation
+# ══════════════════════════════════════════════════════════════════════════════
+@study_data(show_spinner="Correlating genes with metabolites…")
+def correlation_hits(top_k: int, version: tuple):
+    """Loaded from .cache/correlation/ (or computed there) per input version and ``top_k``."""
+    frames = lambda: (open_matrix("expression_matrix").frame(), open_matrix("metabolite_table").frame())
+    return correlation.ensure(frames, data.data_path(CFG, "expression_matrix"),
+                              data.data_path(CFG, "metabolite_table"), top_k)[0]
+
+
+def page_correlation():
+    st.title("Gene–Metabolite Correlation")
+    st.markdown(f"*{CFG['methods']['integration']['steps'][0]}* — top hits per metabolite, "
+                "Benjamini–Hochberg FDR across all gene × metabolite tests.")
+    if need_data("expression_matrix", "metabolite_table"):
+        return
+
+    expr_path = data.data_path(CFG, "expression_matrix")
+    met_path = data.data_path(CFG, "metabolite_table")
+    top_k = st.select_slider("Genes kept per metabolite", [10, 25, 50, 100, 250], value=50)
+    if top_k == precompute.CORRELATION_TOP_K and \
+            not (correlation.result_dir(expr_path, met_path, top_k) / "meta.json").exists() and \
+            building_notice("correlation", "the correlation table"):
+        return
+    res = correlation_hits(top_k, (file_digest(expr_path), file_digest(met_path)))
+
+    # Thresholds only filter the cached hits — no recomputation
+    col1, col2 = st.columns(2)
+    with col1:
+        min_r = st.slider("|r| greater than", 0.0, 1.0, 0.8, 0.01)
+    with col2:
+        max_fdr = st.select_slider("FDR less than", [0.001, 0.01, 0.05, 0.1, 0.25], value=0.05)
+    mets = st.multiselect("Metabolites", sorted(res.hits["metabolite"].unique()))
+
+    hits = correlation.threshold(res.hits, min_r, max_fdr)
+    if mets:
+        hits = hits[hits["metabolite"].isin(mets)]
+
+    m1, m2, m3 = st.columns(3)
+    m1.metric("Tests", f"{res.n_tests:,}")
+    m2.metric("Shared samples", res.n_samples)
+    m3.metric("Passing hits", f"{len(hits):,}")
+    st.dataframe(hits, use_container_width=True, hide_index=True)
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+# PAGE: Expression
+# ══════════════════════════════════════════════════════════════════════════════
+def page_expression():
+    st.title("Expression & Metabolite Explorer")
+    st.markdown("*Slices of the processed matrices, read from the memory-mapped data store.*")
+    keys = [k for k in data.table_keys(CFG) if data.data_path(CFG, k) is not None]
+    if not keys:
+        need_data(*(data.table_keys(CFG) or ["expression_matrix"]))
+        return
+
+    if st.session_state.get("expr_table") not in keys:
+        st.session_state.pop("expr_table", None)
+    key = st.selectbox("Table", keys, key="expr_table",
+                       on_change=lambda: st.session_state.pop("expr_query", None))
+    m = open_matrix(key)
+    st.session_state.setdefault("expr_query", " ".join(m.rows[:10]))   # sidebar search hits set it too
+    query = st.text_input("Feature IDs (space/comma separated; end with * for a prefix)", key="expr_query")
+    samples = st.multiselect("Samples", list(m.columns), default=list(m.columns))
+
+    ids = []
+    for tok in query.replace(",", " ").split():
+        ids.extend(m.rows[m.rows.str.startswith(tok[:-1])] if tok.endswith("*") else [tok])
+    t0 = time.perf_counter()
+    df = m.select(ids[:500], samples)
+    elapsed = time.perf_counter() - t0
+
+    st.session_state["store_bytes"] = st.session_state.get("store_bytes", 0) + df.values.nbytes
+    st.caption(
+        f"{m.shape[0]:,} × {m.shape[1]:,} table ({m.nbytes / 2**20:.1f} MB mapped, opened in "
+        f"{m.open_seconds * 1000:.1f} ms once per process) · this view: {df.shape[0]} × {df.shape[1]} "
+        f"in {elapsed * 1000:.1f} ms, {df.values.nbytes / 1024:.1f} KB copied · this session: "
+        f"{st.session_state['store_bytes'] / 1024:.1f} KB · process RSS {rss_bytes() / 2**20:.0f} MB"
+    )
+    st.dataframe(df, use_container_width=True)
+    if len(df) and len(df) <= 50:
+        st.line_chart(df.T)
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+# PAGE: Genome
+# ══════════════════════════════════════════════════════════════════════════════
+def page_genome():
+    st.title("Genome Browser")
+    st.markdown(f"*{SNAP.deliverables[0][0]['label']}: {SNAP.deliverables[0][0]['detail']}*")
+    if need_data("genome_fasta", "genome_gff3"):
+        return
+    fasta, gff = data.data_path(CFG, "genome_fasta"), data.data_path(CFG, "genome_gff3")
+    with st.spinner("Indexing genome (first run only)…"):
+        g = genome_browser(str(fasta), str(gff), (fasta.stat().st_mtime, gff.stat().st_mtime))
+
+    tab_region, tab_seq, tab_chr = st.tabs(["Region", "Sequence", "Chromosomes"])
+    with tab_region:
+        col1, col2 = st.columns([2, 1])
+        with col1:
+            text = st.text_input("Region", value=f"{next(iter(g.fasta.index))}:0-100kb")
+        with col2:
+            types = st.multiselect("Feature types", sorted(set(g.annotation.cols["type"])), default=["gene"])
+        try:
+            seqid, start, end = genome.parse_region(text)
+        except ValueError as e:
+            st.error(str(e))
+        else:
+            if seqid not in g.fasta.index:
+                st.error(f"Unknown sequence {seqid!r}")
+            else:
+                start, end = start or 1, end or g.fasta.index[seqid].length
+                t0 = time.perf_counter()
+                hits = g.annotation.region(seqid, start, end, types)
+                st.caption(f"{len(hits):,} features in {seqid}:{start:,}-{end:,} "
+                           f"({(time.perf_counter() - t0) * 1000:.2f} ms)")
+                st.dataframe(hits, use_container_width=True, hide_index=True)
+
+    with tab_seq:
+        col1, col2 = st.columns([2, 1])
+        with col1:
+            key = st.text_input("Gene / feature ID or name", value="CcOMT1")
+        with col2:
+            kind = st.radio("Sequence", ["CDS", "exon", "gene"], horizontal=True)
+        try:
+            t0 = time.perf_counter()
+            feat, seq = g.spliced(key, kind)
+        except KeyError as e:
+            st.warning(f"Not found: {e}")
+        else:
+            gc = (seq.upper().count("G") + seq.upper().count("C")) / max(len(seq), 1)
+            st.caption(f"{feat['id']} {feat['seqid']}:{feat['start']:,}-{feat['end']:,} ({feat['strand']}) · "
+                       f"{len(seq):,} bp · GC {gc:.1%} · {(time.perf_counter() - t0) * 1000:.2f} ms")
+            fasta_text = f">{feat['id']} {kind}\n" + "\n".join(seq[i:i + 60] for i in range(0, len(seq), 60))
+            st.code(fasta_text, language=None)
+            st.download_button("Download FASTA", fasta_text, file_name=f"{feat['id']}_{kind}.fa")
+
+    with tab_chr:
+        st.dataframe(g.fasta.lengths(), use_container_width=True, hide_index=True)
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+# PAGE: Families
+# ══════════════════════════════════════════════════════════════════════════════
+PROTEOME = "Whole proteome"
+FOCUS_GENE = "CcOMT1"               # the validated 3'-OMT (F3), highlighted in trees
+FAMILY_HEATMAP_MAX = 150            # cells grow quadratically; larger sets show the tree only
+
+@study_data
+def gene_families(path: str, digest: str) -> pd.DataFrame:
+    return pd.read_csv(path, sep="\t", dtype=str, usecols=["gene", "family"])
+
+
+def protein_sources() -> list[Path]:
+    prot = data.data_path(CFG, "proteome")
+    return [prot] if prot else [data.data_path(CFG, "genome_fasta"), data.data_path(CFG, "genome_gff3")]
+
+
+def family_genes(scope: str) -> list[str] | None:
+    if scope == PROTEOME:
+        return None
+    ann_path = data.data_path(CFG, "gene_annotation")
+    fam = gene_families(str(ann_path), file_digest(ann_path))
+    return sorted(fam.loc[fam["family"] == scope, "gene"])
+
+
+@study_resource(max_entries=4)
+def protein_similarity(scope: str, version: tuple) -> similarity.SimilarityResult:
+    """Loaded from .cache/similarity/ (or computed there) once per protein set; shared by all sessions."""
+    sources, genes = protein_sources(), family_genes(scope)
+    if data.data_path(CFG, "proteome"):
+        fetch = lambda: similarity.read_proteins(sources[0], genes)
+    else:
+        fasta, gff = sources
+        g = genome_browser(str(fasta), str(gff), (fasta.stat().st_mtime, gff.stat().st_mtime))
+        fetch = lambda: similarity.translate_genes(g, genes)
+    return similarity.ensure(fetch, sources, genes)[0]
+
+
+@study_resource(max_entries=8)
+def family_tree(scope: str, version: tuple, idx: tuple) -> similarity.Tree:
+    return similarity.tree_for(protein_similarity(scope, version), idx)
+
+
+def tree_chart(tree: similarity.Tree):
+    segs, leaves = similarity.tree_layout(tree)
+    y = alt.Y("y:Q", axis=None, scale=alt.Scale(reverse=True))
+    lines = alt.Chart(segs).mark_rule(color="#475569").encode(
+        x=alt.X("x:Q", title="distance (1 − similarity)"), x2="x2:Q", y=y, y2="y2:Q")
+    labels = alt.Chart(leaves).mark_text(align="left", dx=3, fontSize=10).encode(
+        x="x:Q", y=y, text="name:N", color=alt.condition(f"datum.name == '{FOCUS_GENE}'",
+                                                         alt.value("#b91c1c"), alt.value("#1f2937")))
+    return (lines + labels).properties(height=max(240, 14 * len(leaves)))
+
+
+def similarity_heatmap(res: similarity.SimilarityResult, idx, order: list[str]):
+    m = similarity.matrix(res, idx)
+    names = [res.ids[i] for i in idx]
+    cells = pd.DataFrame({"a": np.repeat(names, len(names)), "b": np.tile(names, len(names)),
+                          "similarity": m.ravel()})
+    return alt.Chart(cells).mark_rect().encode(
+        x=alt.X("a:N", sort=order, title=None, axis=alt.Axis(labels=len(order) <= 60)),
+        y=alt.Y("b:N", sort=order, title=None, axis=alt.Axis(labels=len(order) <= 60)),
+        color=alt.Color("similarity:Q", scale=alt.Scale(scheme="viridis", domain=[0, 1])),
+        tooltip=["a", "b", alt.Tooltip("similarity:Q", format=".2f")],
+    ).properties(height=min(640, max(240, 8 * len(order))))
+
+
+def show_protein_set(scope: str, version: tuple, res: similarity.SimilarityResult, idx: list[int]):
+    if len(idx) > similarity.TREE_MAX:
+        st.info(f"{len(idx):,} proteins: pick a smaller cluster for the tree "
+                f"(neighbour joining is limited to {similarity.TREE_MAX}).")
+        return
+    if len(idx) < 3:
+        st.caption("Fewer than three proteins: nothing to cluster.")
+        return
+    tree = family_tree(scope, version, tuple(idx))
+    col_tree, col_map = st.columns(2)
+    with col_tree:
+        st.markdown("**Neighbour-joining tree**")
+        st.altair_chart(tree_chart(tree), use_container_width=True)
+        st.download_button("⬇ Newick", tree.newick() + "\n", file_name=f"{scope.replace(' ', '_')}.nwk")
+    with col_map:
+        if len(idx) <= FAMILY_HEATMAP_MAX:
+            st.markdown("**Similarity matrix** (tree order)")
+            st.altair_chart(similarity_heatmap(res, idx, similarity.tree_layout(tree)[1]["name"].tolist()),
+                            use_container_width=True)
+    p = res.pairs
+    members = np.zeros(len(res.ids), dtype=bool)
+    members[idx] = True
+    top = p[members[p["a"]] & members[p["b"]]].nlargest(200, "similarity")
+    ids = np.array(res.ids)
+    st.markdown("**Closest pairs**")
+    st.dataframe(pd.DataFrame({"protein A": ids[top["a"]], "protein B": ids[top["b"]],
+                               "similarity": top["similarity"].round(3), "SW score": top["score"],
+                               "MinHash Jaccard": top["jaccard"].round(3)}),
+                 use_container_width=True, hide_index=True)
+
+
+def page_families():
+    st.title("Gene Families")
+    st.markdown("*Fig. 3 — OMT genes in CRC. Protein similarity within a family or across the proteome: "
+                "MinHash sketches pick the close pairs and only those are aligned exactly (Smith–Waterman).*")
+    if need_data("gene_annotation"):
+        return
+    if not data.data_path(CFG, "proteome") and need_data("genome_fasta", "genome_gff3"):
+        return
+    ann_path = data.data_path(CFG, "gene_annotation")
+    families = sorted(gene_families(str(ann_path), file_digest(ann_path))["family"].dropna().unique())
+    options = families + [PROTEOME]
+    scope = st.selectbox("Protein set", options, index=options.index("OMT") if "OMT" in options else 0)
+    sources = protein_sources()
+    version = tuple(file_digest(p) for p in sources) + (file_digest(ann_path),)
+    genes = family_genes(scope)
+    cached = (similarity.result_dir(sources, genes) / "meta.json").exists()
+    job = {PROTEOME: "proteome", precompute.FAMILY: "families"}.get(scope)
+    what = "the proteome-wide comparison" if scope == PROTEOME else f"the {scope} family comparison"
+    if not cached and job and building_notice(job, what):
+        return
+    if scope == PROTEOME and not cached:
+        st.info("The proteome-wide comparison is not cached yet. It can take a few minutes; "
+                "`python -m showcase.similarity --all` builds it ahead of time.")
+        if not st.button("Compare all proteins"):
+            return
+    with st.spinner("Comparing proteins (MinHash sketches, then Smith–Waterman on close pairs)…"):
+        res = protein_similarity(scope, version)
+    if genes is not None and not res.ids:
+        st.warning(f"No protein sequences found for the {len(genes)} {scope} genes.")
+        return
+
+    s = res.stats
+    m1, m2, m3, m4 = st.columns(4)
+    m1.metric("Proteins", f"{s['proteins']:,}")
+    m2.metric("Pairs sketched", f"{s['pairs_examined']:,}", help=f"of {s['all_pairs']:,} possible pairs")
+    m3.metric("Aligned exactly", f"{s['aligned_pairs']:,}",
+              f"{s['aligned_pairs'] / max(s['all_pairs'], 1):.2%} of all pairs", delta_color="off")
+    m4.metric("Compute time", f"{s['minhash_s'] + s['align_s']:.1f} s",
+              f"MinHash {s['minhash_s']:.1f} s · SW {s['align_s']:.1f} s", delta_color="off")
+
+    if len(res.ids) <= similarity.TREE_MAX:
+        show_protein_set(scope, version, res, list(range(len(res.ids))))
+        return
+    cut = st.slider("Cluster proteins at similarity ≥", 0.1, 0.9, 0.3, step=0.05)
+    labels = similarity.clusters(res, cut)
+    sizes = pd.Series(labels).value_counts()
+    st.caption(f"{int((sizes > 1).sum()):,} clusters with 2+ proteins; {int((sizes == 1).sum()):,} singletons")
+    top = sizes[sizes > 1].head(500)
+    if not len(top):
+        return
+    ids = np.array(res.ids)
+    table = pd.DataFrame({"cluster": top.index, "proteins": top.values,
+                          "members": [", ".join(ids[labels == c][:6]) + (" …" if n > 6 else "")
+                                      for c, n in top.items()]})
+    st.dataframe(table, use_container_width=True, hide_index=True)
+    pick = st.selectbox("Cluster", table["cluster"], format_func=lambda c: f"{c} ({int(top[c])} proteins)")
+    show_protein_set(scope, version, res, np.flatnonzero(labels == pick).tolist())
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+# PAGE: Differential Expression
+# ══════════════════════════════════════════════════════════════════════════════
+PLOT_BACKGROUND_POINTS = 5000       # non-significant genes drawn per plot (all hits are drawn)
+
+def page_de():
+    st.title("Differential Expression")
+    st.markdown("*DESeq2-style negative-binomial Wald tests for the contrasts in the study design.*")
+    contrasts = deseq.contrasts_from_config(CFG)
+    if need_data("count_matrix", "sample_sheet"):
+        return
+    if not contrasts:
+        st.markdown('<div class="placeholder">[NEED contrasts] add a <code>contrasts:</code> list '
+                    'to content_config.yaml</div>', unsafe_allow_html=True)
+        return
+
+    counts, sheet = data.data_path(CFG, "count_matrix"), data.data_path(CFG, "sample_sheet")
+    if not all(deseq.cache_path(counts, sheet, c).exists() for c in contrasts) and \
+            building_notice("de", "the contrasts"):
+        return
+    try:
+        files = de_results(counts, sheet, contrasts)
+    except deseq.ContrastError as e:
+        st.error(str(e))
+        return
+
+    labels = {c.label: c.id for c in contrasts}
+    col1, col2, col3 = st.columns([2, 1, 1])
+    with col1:
+        label = st.selectbox("Contrast", list(labels))
+    with col2:
+        max_padj = st.select_slider("padj less than", [0.001, 0.01, 0.05, 0.1], value=0.05)
+    with col3:
+        min_lfc = st.slider("|log2FC| at least", 0.0, 4.0, 1.0, 0.25)
+
+    res = de_table(files[labels[label]])
+    hit = (res["padj"] < max_padj) & (res["log2FoldChange"].abs() >= min_lfc)
+    up, down = (hit & (res["log2FoldChange"] > 0)).sum(), (hit & (res["log2FoldChange"] < 0)).sum()
+    m1, m2, m3 = st.columns(3)
+    m1.metric("Genes tested", f"{res['pvalue'].notna().sum():,}")
+    m2.metric("Up", f"{up:,}")
+    m3.metric("Down", f"{down:,}")
+
+    plot = res.dropna(subset=["padj"]).assign(
+        status=np.where(hit, np.where(res["log2FoldChange"] > 0, "up", "down"), "n.s.")[res["padj"].notna()],
+    )
+    plot["-log10 padj"] = -np.log10(plot["padj"].clip(lower=1e-300))
+    plot["log10 baseMean"] = np.log10(plot["baseMean"] + 1)
+    bg = plot[plot["status"] == "n.s."]
+    plot = pd.concat([plot[plot["status"] != "n.s."],
+                      bg.sample(min(len(bg), PLOT_BACKGROUND_POINTS), random_state=0)])
+
+    c1, c2 = st.columns(2)
+    with c1:
+        st.markdown("**Volcano**")
+        st.scatter_chart(plot, x="log2FoldChange", y="-log10 padj", color="status", size=12)
+    with c2:
+        st.markdown("**MA plot**")
+        st.scatter_chart(plot, x="log10 baseMean", y="log2FoldChange", color="status", size=12)
+
+    st.dataframe(res[hit].sort_values("padj"), use_container_width=True, hide_index=True)
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+# PAGE: Multivariate
+# ══════════════════════════════════════════════════════════════════════════════
+def page_multivariate():
+    st.title("Metabolomics: PCA & OPLS-DA")
+    st.markdown(f"*{CFG['methods']['metabolomics']['steps'][-1]}*")
+    keys = [k for k in ("feature_table", "metabolite_table") if data.data_path(CFG, k) is not None]
+    if not keys:
+        need_data("feature_table")
+        return
+
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        key = st.selectbox("Table", keys)
+    with col2:
+        log = st.selectbox("Transform", multivariate.LOGS, index=1)
+    with col3:
+        scaling = st.selectbox("Scaling", multivariate.SCALINGS, index=2,
+                               format_func={"none": "centre only", "uv": "unit variance", "pareto": "Pareto"}.get)
+    m = open_matrix(key)
+    digest = file_digest(data.data_path(CFG, key))
+    sheet_path = data.data_path(CFG, "sample_sheet")
+    sheet = sample_sheet(str(sheet_path), file_digest(sheet_path)) if sheet_path is not None \
+        else pd.DataFrame(index=m.columns)
+    factors = [c for c in sheet.columns if sheet[c].nunique() > 1]
+
+    tab_pca, tab_opls = st.tabs(["PCA", "OPLS-DA"])
+    with tab_pca:
+        # the session's first fit of a table is cold; later preprocessings warm-start from it
+        start = st.session_state.setdefault("pca_start", {}).setdefault((key, digest), (log, scaling))
+        fit = pca_fit(key, digest, log, scaling, init_from=None if start == (log, scaling) else start)
+        pcs = [f"PC{i + 1}" for i in range(fit.scores.shape[1])]
+        c1, c2, c3 = st.columns(3)
+        with c1:
+            px = st.selectbox("x", pcs, index=0)
+        with c2:
+            py = st.selectbox("y", pcs, index=min(1, len(pcs) - 1))
+        with c3:
+            colour = st.selectbox("Colour by", factors or ["—"])
+        scores = multivariate.scores_frame(fit.scores, m.columns)
+        if colour in sheet.columns:
+            scores[colour] = sheet[colour].reindex(scores.index).astype(str)
+        st.scatter_chart(scores, x=px, y=py, color=colour if colour in scores else None, size=60)
+        st.caption(" · ".join(f"{p}: {e:.1%}" for p, e in zip(pcs, fit.explained)))
+
+    with tab_opls:
+        if not factors:
+            need_data("sample_sheet")
+        else:
+            c1, c2, c3, c4 = st.columns(4)
+            with c1:
+                factor = st.selectbox("Class column", factors, key="opls_factor")
+            classes = sorted(sheet[factor].dropna().astype(str).unique())
+            with c2:
+                pos = st.selectbox("Class A", classes, index=0)
+            with c3:
+                neg = st.selectbox("Class B", ["all others"] + [c for c in classes if c != pos])
+            with c4:
+                n_orth = st.slider("Orthogonal components", 1, 3, 1)
+            lab = sheet[factor].reindex(m.columns).astype(str)
+            lab = lab[(lab == pos) | ((lab != neg) if neg == "all others" else (lab == neg))]
+            if lab.nunique() < 2:
+                st.warning("Both classes need samples in this table.")
+            else:
+                res = opls_fit(key, digest, log, scaling, tuple(lab.index), tuple(lab), pos, n_orth)
+                m1, m2, m3 = st.columns(3)
+                m1.metric("R²X (pred.)", f"{res.r2x:.3f}")
+                m2.metric("R²Y", f"{res.r2y:.3f}")
+                m3.metric("Q²", f"{res.q2:.3f}")
+                sc = pd.DataFrame({"t[pred]": res.t_pred, "t[orth 1]": res.t_orth[:, 0], "class": lab.values},
+                                  index=lab.index)
+                st.scatter_chart(sc, x="t[pred]", y="t[orth 1]", color="class", size=60)
+                top = pd.DataFrame({"feature": m.rows, "p[pred]": res.p_pred})
+                st.markdown("**Features driving the separation**")
+                st.dataframe(top.reindex(top["p[pred]"].abs().sort_values(ascending=False).index).head(25),
+                             use_container_width=True, hide_index=True)
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+# PAGE: Network
+# ══════════════════════════════════════════════════════════════════════════════
+NETWORK_MAX_NODES = 2000            # render budget per view; the rest stays server-side
+NETWORK_MAX_EDGES = 3000
+
+def network_chart(nodes: pd.DataFrame, edges: pd.DataFrame, color: str | None = None):
+    base_x = alt.X("x:Q", axis=None, scale=alt.Scale(zero=False))
+    base_y = alt.Y("y:Q", axis=None, scale=alt.Scale(zero=False))
+    rules = alt.Chart(edges).mark_rule(opacity=0.25, strokeWidth=0.6).encode(
+        x=base_x, y=base_y, x2="x2:Q", y2="y2:Q",
+        color=alt.condition("datum.weight < 0", alt.value("#b91c1c"), alt.value("#64748b")))
+    dots = alt.Chart(nodes).mark_circle(opacity=0.85).encode(
+        x=base_x, y=base_y, size=alt.Size("strength:Q", legend=None, scale=alt.Scale(range=[8, 160])),
+        color=alt.Color(f"{color}:N") if color else alt.value("#1a56a0"),
+        tooltip=["node"] + ([color] if color else []))
+    return (rules + dots).properties(height=560)
+
+
+def page_network():
+    st.title("Regulatory Network")
+    st.markdown("*Fig. 7 — the potential gene regulation network of PMF biosynthesis, "
+                "drawn from the regulatory network edge list.*")
+    if need_data("network_edges"):
+        return
+    src = data.data_path(CFG, "network_edges")
+    if not network.cache_path(src).exists() and building_notice("network", "the network index and layout"):
+        return
+    with st.spinner("Indexing network and computing layout (first run only)…"):
+        net = network_graph(str(src), file_digest(src))
+    nodes_path = data.data_path(CFG, "network_nodes")
+    info = network_nodes(str(nodes_path), file_digest(nodes_path)) if nodes_path else pd.DataFrame()
+    group = next((c for c in ("family", "type") if c in info), None)
+
+    m1, m2 = st.columns(2)
+    m1.metric("Nodes", f"{len(net):,}")
+    m2.metric("Edges", f"{net.n_edges:,}")
+
+    col1, col2 = st.columns(2)
+    with col1:
+        top_k = st.slider("Top-k edges per node", 1, 50, 10)
+    with col2:
+        max_w = float(np.abs(net.weight).max()) if net.n_edges else 1.0
+        min_w = st.slider("Min |weight|", 0.0, max_w, min(0.5, max_w), step=0.01)
+    mask = net.edge_mask(top_k, min_w)
+
+    tab_view, tab_hood = st.tabs(["Overview", "Neighbourhood"])
+    with tab_view:
+        col1, col2 = st.columns([1, 2])
+        with col1:
+            zoom = st.select_slider("Zoom", [1, 2, 4, 8, 16, 32], value=1)
+        with col2:
+            center = st.text_input("Centre on node", value="", placeholder="e.g. CcOMT1")
+        view = network.visible(net, network.viewport(net, zoom, center.strip() or None), mask,
+                               NETWORK_MAX_NODES, NETWORK_MAX_EDGES)
+        nodes = view.nodes.join(info[[group]], on="node") if group else view.nodes
+        st.caption(f"Showing {len(view.nodes):,} of {view.total_nodes:,} nodes and "
+                   f"{len(view.edges):,} of {view.total_edges:,} edges in view "
+                   f"(strongest first); zoom in for more detail.")
+        st.altair_chart(network_chart(nodes, view.edges, group), use_container_width=True)
+
+    with tab_hood:
+        col1, col2, col3 = st.columns([2, 1, 2])
+        with col1:
+            seeds = st.text_input("Seed nodes (comma-separated)", value="CcOMT1")
+        with col2:
+            hops = st.number_input("Hops", 1, 4, 2)
+        with col3:
+            families = st.multiselect(f"Keep {group}", sorted(info[group].dropna().unique())) if group else []
+        names = [s.strip() for s in seeds.split(",") if s.strip()]
+        unknown = [s for s in names if s not in net.index]
+        if unknown:
+            st.warning(f"Not in the network: {', '.join(unknown)}")
+        names = [s for s in names if s in net.index]
+        if names:
+            t0 = time.perf_counter()
+            hood = net.neighbourhood(names, int(hops), mask)
+            if group:
+                hood = hood.join(info[[group]], on="node")
+                if families:
+                    hood = hood[hood["hops"].eq(0) | hood[group].isin(families)]
+            elapsed = (time.perf_counter() - t0) * 1000
+            ids = hood["id"].to_numpy()[:NETWORK_MAX_NODES]
+            eids = net.induced_edges(ids, mask)
+            eids = eids[np.argsort(net.rank[eids], kind="stable")][:NETWORK_MAX_EDGES]
+            st.caption(f"{len(hood) - len(names):,} nodes within {hops} hop(s) ({elapsed:.1f} ms)")
+            sub = hood.iloc[:len(ids)].assign(x=net.pos[ids, 0], y=net.pos[ids, 1])
+            edges = pd.DataFrame({"x": net.pos[net.src[eids], 0], "y": net.pos[net.src[eids], 1],
+                                  "x2": net.pos[net.dst[eids], 0], "y2": net.pos[net.dst[eids], 1],
+                                  "weight": net.weight[eids]})
+            st.altair_chart(network_chart(sub, edges, group), use_container_width=True)
+            st.dataframe(hood.drop(columns="id"), use_container_width=True, hide_index=True)
+            st.download_button("Download edges (TSV)", net.edges_frame(eids).to_csv(sep="\t", index=False),
+                               file_name="network_neighbourhood.tsv")
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+# PAGE: Hi-C
+# ══════════════════════════════════════════════════════════════════════════════
+HIC_VIEW_BINS = 600                 # bins per side; picks the resolution for a window
+
+def _hic_move(cmap: hic.ContactMap, zoom: float = 1.0, shift: float = 0.0):
+    """Button callback: zoom (factor) / pan (fraction of the span) the region box."""
+    try:
+        chrom, start, end = cmap.span(st.session_state["hic_region"])
+    except ValueError:
+        return
+    if chrom is None:
+        if zoom >= 1:
+            return
+        chrom = cmap.chromosomes[0]
+        start, end = 1, int(cmap.lengths[0])
+    length = int(cmap.lengths[cmap.chromosomes.index(chrom)])
+    span = max(int((end - start + 1) / zoom), 4 * cmap.resolutions[0])
+    mid = (start + end) / 2 + shift * (end - start + 1)
+    start = int(max(1, min(mid - span / 2, length - span + 1)))
+    end = min(start + span - 1, length)
+    st.session_state["hic_region"] = f"{chrom}:{start:,}-{end:,}"
+
+
+def page_hic():
+    st.title("Hi-C Contact Map")
+    st.markdown(f"*{SNAP.deliverables[0][0]['label']} — Hi-C scaffolding contact map (3D-DNA).*")
+    if need_data("hic_pairs"):
+        return
+    out = hic.store_dir(data.data_path(CFG, "hic_pairs"))
+    if not (out / "meta.json").exists():
+        out = previous_build("hic")
+        if not building_notice("hic", "the contact pyramid", showing_previous=out is not None):
+            st.markdown('<div class="placeholder">[NEED hic] build the contact pyramid once with '
+                        '<code>python -m showcase.hic</code></div>', unsafe_allow_html=True)
+        if out is None:
+            return
+    cmap = contact_map(str(out))
+
+    st.session_state.setdefault("hic_region", "all")
+    col1, col2 = st.columns([3, 2])
+    with col1:
+        st.text_input("Region (all, chr3, chr3:10-12Mb)", key="hic_region")
+    with col2:
+        b = st.columns(4)
+        b[0].button("Zoom in", on_click=_hic_move, args=(cmap, 2.0), use_container_width=True)
+        b[1].button("Zoom out", on_click=_hic_move, args=(cmap, 0.5), use_container_width=True)
+        b[2].button("◀", on_click=_hic_move, args=(cmap, 1.0, -0.5), use_container_width=True)
+        b[3].button("▶", on_click=_hic_move, args=(cmap, 1.0, 0.5), use_container_width=True)
+    try:
+        chrom, start, end = cmap.span(st.session_state["hic_region"])
+    except ValueError as e:
+        st.error(str(e))
+        return
+
+    res = cmap.pick_resolution(end - start + 1, HIC_VIEW_BINS)
+    res = st.select_slider("Resolution (bp)", cmap.resolutions, value=res)
+    lo, hi = cmap.bin_range(res, chrom, start, end)
+    if hi - lo > 4 * HIC_VIEW_BINS:
+        st.warning(f"{hi - lo:,} bins at {res:,} bp; showing the coarser automatic resolution instead.")
+        res = cmap.pick_resolution(end - start + 1, HIC_VIEW_BINS)
+        lo, hi = cmap.bin_range(res, chrom, start, end)
+
+    t0 = time.perf_counter()
+    decoded = cmap.tiles_decoded
+    rgb = hic.render(cmap.window(res, (lo, hi), (lo, hi)))
+    for b0, _ in cmap.boundaries(res, lo + 1, hi):
+        rgb[b0 - lo, :] = rgb[:, b0 - lo] = (120, 120, 120)
+    elapsed = (time.perf_counter() - t0) * 1000
+    where = chrom or "genome"
+    st.image(rgb, use_container_width=True, clamp=True)
+    st.caption(f"{where}:{start:,}-{end:,} · {res:,} bp bins · {hi - lo:,}² pixels · "
+               f"{cmap.tiles_decoded - decoded} new tile(s) decoded · {elapsed:.0f} ms")
+    if chrom is None:
+        st.markdown(" · ".join(f"**{c}** {n / 1e6:.1f} Mb" for c, n in zip(cmap.chromosomes, cmap.lengths)))
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+# PAGE: Candidates
+# ══════════════════════════════════════════════════════════════════════════════
+@study_data
+def expression_block(digest: str) -> pd.DataFrame:
+    m = open_matrix("expression_matrix")
+    return prioritize.expression_features(m.values, m.rows)
+
+
+@study_data
+def annotation_block(path: str, digest: str) -> pd.DataFrame:
+    return prioritize.annotation_features(Path(path))
+
+
+def candidate_features() -> tuple[pd.DataFrame, tuple, list[str]]:
+    """Per-gene feature table from whichever sources are available, its version, and the sources used."""
+    expr_path = data.data_path(CFG, "expression_matrix")
+    expr_digest = file_digest(expr_path)
+    blocks, version, used = [expression_block(expr_digest)], [expr_digest], ["expression"]
+    met_path = data.data_path(CFG, "metabolite_table")
+    if met_path:
+        res = correlation_hits(50, (expr_digest, file_digest(met_path)))
+        blocks.append(prioritize.correlation_features(res.hits))
+        version.append(file_digest(met_path))
+        used.append("correlation")
+    mod_dir = modules.result_dir(expr_path, met_path, modules.params_from_config(CFG))
+    if (mod_dir / "meta.json").exists():
+        mtime = (mod_dir / "meta.json").stat().st_mtime
+        _, _, assignments, trait_cor = module_tables(str(mod_dir), mtime)
+        blocks.append(prioritize.module_features(assignments, trait_cor))
+        version.append(mtime)
+        used.append("modules")
+    counts, sheet = data.data_path(CFG, "count_matrix"), data.data_path(CFG, "sample_sheet")
+    contrasts = deseq.contrasts_from_config(CFG)
+    if counts and sheet and contrasts:
+        try:
+            files = de_results(counts, sheet, contrasts)
+        except deseq.ContrastError as e:
+            st.error(f"{e} — differential expression left out of the ranking.")
+        else:
+            blocks.append(prioritize.de_features({k: de_table(v) for k, v in files.items()}))
+            version.append(tuple(sorted(files.values())))
+            used.append("differential expression")
+    ann_path = data.data_path(CFG, "gene_annotation")
+    if ann_path:
+        blocks.append(annotation_block(str(ann_path), file_digest(ann_path)))
+        version.append(file_digest(ann_path))
+        used.append("annotation")
+    version = tuple(version)
+    return shared_features(version, tuple(blocks)), version, used
+
+
+@cache_resource(max_entries=2)
+def shared_features(version: tuple, _blocks: tuple) -> pd.DataFrame:
+    """Joined feature table, built once per input version; read-only, shared by all sessions."""
+    return prioritize.feature_table(_blocks[0].index, *_blocks)
+
+
+@cache_resource(max_entries=2)
+def base_ranker(key: tuple, _features: pd.DataFrame, _criteria: tuple) -> prioritize.Ranker:
+    """Normalised columns at the configured weights; sessions fork it instead of re-normalising."""
+    return prioritize.Ranker(_features, list(_criteria))
+
+
+def page_candidates():
+    st.title("Candidate Prioritization")
+    d6 = next((d for d, _ in SNAP.deliverables if d["id"] == "D6"), None)
+    if d6:
+        st.markdown(f"*{d6['label']}: {d6['detail']}* — weights and thresholds from "
+                    "`config/prioritization.yaml`; sliders re-rank instantly.")
+    if need_data("expression_matrix"):
+        return
+    criteria, settings = prioritize.load_config()
+    features, version, used = candidate_features()
+    criteria = [c for c in criteria if c.feature in features]
+
+    # One ranker per session, kept across reruns; sliders only patch what changed
+    key = (version, tuple(criteria))
+    if st.session_state.get("ranker_key") != key:
+        st.session_state["ranker"] = base_ranker(key, features, tuple(criteria)).fork()
+        st.session_state["ranker_key"] = key
+    ranker = st.session_state["ranker"]
+
+    col1, col2 = st.columns([1, 2])
+    with col1:
+        k = st.number_input("Candidates", 1, 1000, int(settings.get("candidates", 47)))
+    with col2:
+        family = st.text_input("Family / description (regex)", value=settings.get("family") or "")
+    with st.expander("Weights & thresholds", expanded=True):
+        for c in criteria:
+            raw = ranker.raw[c.feature]
+            lo, hi = float(np.nanmin(raw)), float(np.nanmax(raw))
+            w_col, t_col = st.columns([2, 1])
+            with w_col:
+                ranker.set_weight(c.feature, st.slider(c.label, 0.0, 1.0, c.weight, 0.05, key=f"w_{c.feature}"))
+            with t_col:
+                ranker.set_min(c.feature, st.number_input(f"min {c.feature}", value=c.min, min_value=None,
+                                                          step=round((hi - lo) / 100, 4) or 0.01,
+                                                          placeholder="no threshold", key=f"t_{c.feature}"))
+
+    t0 = time.perf_counter()
+    try:
+        mask = prioritize.family_mask(features, family)
+    except re.error as e:
+        st.error(f"Invalid regex: {e}")
+        mask = None
+    ranker.set_eligible(np.ones(len(features), dtype=bool) if mask is None else mask)
+    top = ranker.top(int(k))
+    elapsed = (time.perf_counter() - t0) * 1000
+
+    m1, m2, m3 = st.columns(3)
+    m1.metric("Genes scored", f"{len(features):,}")
+    m2.metric("Passing thresholds", f"{ranker.n_passing:,}")
+    m3.metric("Re-rank", f"{elapsed:.1f} ms")
+    missing = [s for s in ("correlation", "modules", "differential expression", "annotation") if s not in used]
+    st.caption(f"Evidence sources: {', '.join(used)}."
+               + (f" Not available (features skipped): {', '.join(missing)}." if missing else ""))
+    st.dataframe(top, use_container_width=True, hide_index=True)
+    st.download_button("Download candidates (TSV)", top.to_csv(sep="\t", index=False),
+                       file_name="candidates.tsv")
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+# PAGE: Metrics (admin, not in the sidebar)
+# ══════════════════════════════════════════════════════════════════════════════
+def page_metrics():
+    st.title("Metrics")
+    ledger = precompute.read_ledger(STUDY.id)
+    if ledger:
+        st.markdown("## Precomputed artifacts")
+        builds = pd.DataFrame([{
+            "stage": e.get("stage"), "artifact": name, "label": e.get("label"),
+            "state": "building" if precompute.building(STUDY.id, name, ledger) else e.get("status"),
+            "build_s": e.get("seconds"),
+            "finished": pd.to_datetime(e["finished"], unit="s") if e.get("finished") else None,
+            "error": e.get("error"),
+        } for name, e in ledger.items()]).sort_values(["stage", "artifact"])
+        st.dataframe(builds, use_container_width=True, hide_index=True)
+        st.caption("Stale artifacts: `python -m showcase.precompute --list`.")
+    if not metrics.ENABLED:
+        st.info("Instrumentation is off. Start the app with `SHOWCASE_METRICS=1` to record "
+                "page timers, cache hit/miss counts and active sessions.")
+        return
+    snap = metrics.snapshot()
+    m1, m2, m3 = st.columns(3)
+    m1.metric("Active sessions", snap["sessions"])
+    m2.metric("Process RSS", f"{rss_bytes() / 2**20:.0f} MB")
+    m3.metric("Uptime", f"{snap['uptime_s'] / 60:.0f} min")
+    st.caption(f"Studies loaded (least recent first): {', '.join(catalog.LOADED.loaded())} · "
+               f"capacity {catalog.LOADED.capacity} · {catalog.LOADED.evictions} evictions")
+
+    st.markdown("## Timers")
+    timers = pd.DataFrame.from_dict(snap["timers"], orient="index").rename_axis("block").reset_index()
+    if len(timers):
+        timers = timers.sort_values("total_s", ascending=False)
+    st.dataframe(timers, use_container_width=True, hide_index=True)
+
+    st.markdown("## Caches")
+    caches = pd.DataFrame.from_dict(snap["caches"], orient="index").rename_axis("function").reset_index()
+    if len(caches):
+        caches["hit rate"] = caches["hits"] / caches["calls"].where(caches["calls"] > 0)
+        caches = caches.sort_values("calls", ascending=False)
+    st.dataframe(caches, use_container_width=True, hide_index=True)
+
+    st.markdown("## Prometheus")
+    text = metrics.prometheus()
+    st.download_button("Download metrics.prom", text, file_name="metrics.prom")
+    st.code(text, language=None)
+
 
 # ══════════════════════════════════════════════════════════════════════════════
 # Router
@@ -547,5 +1710,22 @@ router = {
     "Pipeline":      page_pipeline,
     "Impact":        page_impact,
     "Resources":     page_resources,
+    "Correlation":   page_correlation,
+    "Expression":    page_expression,
+    "Genome":        page_genome,
+    "Families":      page_families,
+    "Differential Expression": page_de,
+    "Multivariate":  page_multivariate,
+    "Network":       page_network,
+    "Hi-C":          page_hic,
+    "Candidates":    page_candidates,
+    "Metrics":       page_metrics,          # hidden: ?admin=metrics
 }
-router[page]()
+if st.query_params.get("admin") == "metrics":
+    page = "Metrics"
+if metrics.ENABLED:
+    ctx = get_script_run_ctx()
+    metrics.touch_session(ctx.session_id if ctx else None)
+with metrics.timer(f"page:{page}"):
+    router[page]()
+metrics.write_textfile()
@@ -0,0 +1,6 @@
+"""
+Support modules for the Multi-Omics Showcase app (``app.py``).
+
+The Streamlit script stays the single entry point; everything here is plain
+Python so it can also be driven from the command line or imported by tooling.
+"""
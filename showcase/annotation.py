@@ -0,0 +1,197 @@
+"""
+PMF annotation: m/z–RT indexed library lookup plus batched MS2 cosine scoring.
+
+* Library precursors are sorted by m/z once; every feature's ppm window is
+  resolved with two vectorised ``searchsorted`` calls, then filtered on the
+  retention-time tolerance — no feature × library pairwise scan.
+* MS2 spectra (query and library) are binned into sparse CSR matrices with
+  square-root intensities and unit norm, so one sparse product scores every
+  query spectrum against the whole library.
+* Annotation level follows the MSI scheme used in the metabolomics methods:
+  2 = precursor (+RT) and MS2 match, 3 = precursor (+RT) only.
+
+Spectra are read from MGF (``PEPMASS``, ``RTINSECONDS``, ``NAME`` / ``TITLE``,
+``FEATURE_ID``); feature m/z and RT come from a metadata table or, failing
+that, from ``<mz>_<rt>`` feature IDs.
+"""
+
+import re
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+_MZ_RT_ID = re.compile(r"^[A-Za-z]*(\d+(?:\.\d+)?)[_@/Tt](\d+(?:\.\d+)?)")
+
+
+@dataclass(frozen=True)
+class Spectra:
+    meta: pd.DataFrame          # one row per spectrum (name, precursor_mz, rt_min, feature_id, ...)
+    peaks: list                 # per spectrum: (mz array, intensity array)
+
+
+def read_mgf(path: Path) -> Spectra:
+    rows, peaks = [], []
+    cur, mz, inten = None, [], []
+    with open(path, encoding="utf-8", errors="replace") as f:
+        for line in f:
+            line = line.strip()
+            if line == "BEGIN IONS":
+                cur, mz, inten = {}, [], []
+            elif line == "END IONS" and cur is not None:
+                rows.append(cur)
+                peaks.append((np.array(mz, dtype=np.float64), np.array(inten, dtype=np.float64)))
+                cur = None
+            elif cur is not None and line:
+                if "=" in line and not line[0].isdigit():
+                    k, v = line.split("=", 1)
+                    cur[k.strip().upper()] = v.strip()
+                else:
+                    parts = line.split()
+                    if len(parts) >= 2:
+                        mz.append(float(parts[0]))
+                        inten.append(float(parts[1]))
+    meta = pd.DataFrame(rows)
+    meta["precursor_mz"] = pd.to_numeric(meta.get("PEPMASS", pd.Series(dtype=str)).astype(str).str.split().str[0],
+                                         errors="coerce")
+    meta["rt_min"] = pd.to_numeric(meta.get("RTINSECONDS"), errors="coerce") / 60.0 \
+        if "RTINSECONDS" in meta else np.nan
+    meta["name"] = meta.get("NAME", meta.get("TITLE", pd.Series(index=meta.index, dtype=str)))
+    meta["feature_id"] = meta.get("FEATURE_ID", meta.get("TITLE", pd.Series(index=meta.index, dtype=str)))
+    return Spectra(meta=meta.reset_index(drop=True), peaks=peaks)
+
+
+def feature_coordinates(ids, metadata: pd.DataFrame | None = None) -> pd.DataFrame:
+    """feature → mz, rt_min from a metadata table or ``<mz>_<rt>`` style IDs."""
+    if metadata is not None:
+        md = metadata.rename(columns=str.lower)
+        rt = md["rt_min"] if "rt_min" in md else md["rt"]
+        return pd.DataFrame({"feature": md.index.astype(str), "mz": md["mz"].to_numpy(float),
+                             "rt_min": rt.to_numpy(float)})
+    parsed = [_MZ_RT_ID.match(str(i)) for i in ids]
+    return pd.DataFrame({
+        "feature": [str(i) for i in ids],
+        "mz": [float(m.group(1)) if m else np.nan for m in parsed],
+        "rt_min": [float(m.group(2)) if m else np.nan for m in parsed],
+    })
+
+
+# ── Precursor index ────────────────────────────────────────────────────────────
+class PrecursorIndex:
+    """Library precursors sorted by m/z for ppm / RT window queries."""
+
+    def __init__(self, mz: np.ndarray, rt_min: np.ndarray):
+        self.order = np.argsort(mz, kind="stable")
+        self.mz = np.asarray(mz, dtype=np.float64)[self.order]
+        self.rt = np.asarray(rt_min, dtype=np.float64)[self.order]
+
+    def query(self, mz: np.ndarray, rt_min: np.ndarray, ppm: float = 10.0,
+              rt_tol: float | None = 0.3) -> tuple[np.ndarray, np.ndarray]:
+        """(query index, library index) pairs inside the tolerance windows."""
+        mz = np.asarray(mz, dtype=np.float64)
+        lo = np.searchsorted(self.mz, mz * (1 - ppm * 1e-6), side="left")
+        hi = np.searchsorted(self.mz, mz * (1 + ppm * 1e-6), side="right")
+        n = np.maximum(hi - lo, 0)
+        qi = np.repeat(np.arange(len(mz)), n)
+        li = np.repeat(lo, n) + (np.arange(n.sum()) - np.repeat(np.cumsum(n) - n, n))
+        if rt_tol is not None:
+            lib_rt = self.rt[li]
+            ok = np.isnan(lib_rt) | np.isnan(rt_min[qi]) | (np.abs(lib_rt - rt_min[qi]) <= rt_tol)
+            qi, li = qi[ok], li[ok]
+        return qi, self.order[li]
+
+
+# ── MS2 similarity ─────────────────────────────────────────────────────────────
+def binned(peaks, bin_width: float = 0.02, max_mz: float = 2000.0) -> sparse.csr_matrix:
+    """Spectra → sparse (spectra × bins) with sqrt intensities, rows L2-normalised."""
+    n_bins = int(max_mz / bin_width) + 1
+    rows, cols, vals = [], [], []
+    for i, (mz, inten) in enumerate(peaks):
+        keep = (mz >= 0) & (mz < max_mz) & (inten > 0)
+        rows.append(np.full(keep.sum(), i))
+        cols.append((mz[keep] / bin_width).astype(np.int64))
+        vals.append(np.sqrt(inten[keep]))
+    m = sparse.csr_matrix(
+        (np.concatenate(vals) if vals else [], (np.concatenate(rows) if rows else [],
+                                                np.concatenate(cols) if cols else [])),
+        shape=(len(peaks), n_bins),
+    )
+    m.sum_duplicates()
+    norms = np.sqrt(np.asarray(m.multiply(m).sum(axis=1)).ravel())
+    return sparse.diags(np.where(norms > 0, 1.0 / np.maximum(norms, 1e-12), 0.0)) @ m
+
+
+def cosine_matrix(query: Spectra, library: Spectra, bin_width: float = 0.02) -> sparse.csr_matrix:
+    """Binned cosine of every query spectrum against every library spectrum."""
+    return (binned(query.peaks, bin_width) @ binned(library.peaks, bin_width).T).tocsr()
+
+
+# ── Annotation ─────────────────────────────────────────────────────────────────
+def annotate(features: pd.DataFrame, library: Spectra, query: Spectra | None = None,
+             ppm: float = 10.0, rt_tol: float | None = 0.3, min_cosine: float = 0.7,
+             bin_width: float = 0.02) -> pd.DataFrame:
+    """
+    Candidate library matches for every feature (``feature``, ``mz``, ``rt_min``),
+    ranked by MS2 cosine then ppm error; one row per feature × candidate.
+    """
+    lib = library.meta
+    idx = PrecursorIndex(lib["precursor_mz"].to_numpy(float), lib["rt_min"].to_numpy(float))
+    fmz, frt = features["mz"].to_numpy(float), features["rt_min"].to_numpy(float)
+    qi, li = idx.query(fmz, frt, ppm, rt_tol)
+
+    out = pd.DataFrame({
+        "feature": features["feature"].to_numpy()[qi],
+        "mz": fmz[qi],
+        "rt_min": frt[qi],
+        "library_name": lib["name"].to_numpy()[li],
+        "library_mz": lib["precursor_mz"].to_numpy()[li],
+        "ppm_error": (fmz[qi] - lib["precursor_mz"].to_numpy()[li]) / lib["precursor_mz"].to_numpy()[li] * 1e6,
+        "delta_rt": frt[qi] - lib["rt_min"].to_numpy()[li],
+        "cosine": np.nan,
+    })
+    if query is not None and len(out):
+        cos = cosine_matrix(query, library, bin_width)
+        # candidate × (every query spectrum of its feature); keep the best score per candidate
+        specs = pd.DataFrame({"feature": query.meta["feature_id"].astype(str),
+                              "spec": np.arange(len(query.meta))})
+        pairs = pd.DataFrame({"cand": np.arange(len(out)), "feature": out["feature"].astype(str),
+                              "lib": li}).merge(specs, on="feature")
+        if len(pairs):
+            pairs["cosine"] = np.asarray(cos[pairs["spec"].to_numpy(), pairs["lib"].to_numpy()]).ravel()
+            out["cosine"] = pairs.groupby("cand")["cosine"].max().reindex(np.arange(len(out))).to_numpy()
+    out["level"] = np.where(out["cosine"] >= min_cosine, 2, 3)
+    return out.sort_values(["feature", "cosine", "ppm_error"], key=lambda s: -s if s.name == "cosine"
+                           else (s.abs() if s.name == "ppm_error" else s), na_position="last",
+                           ignore_index=True)
+
+
+def best_hits(candidates: pd.DataFrame) -> pd.DataFrame:
+    """Top candidate per feature."""
+    return candidates.drop_duplicates("feature", keep="first").reset_index(drop=True)
+
+
+if __name__ == "__main__":
+    # python -m showcase.annotation — annotate the feature table and write the candidates TSV
+    import sys
+    import time
+    from showcase.config import compile_config
+    from showcase.data import ROOT, data_path, read_matrix
+
+    cfg = compile_config(ROOT / "content_config.yaml").cfg
+    feats, lib = data_path(cfg, "feature_table"), data_path(cfg, "pmf_library")
+    if not (feats and lib):
+        raise SystemExit("data.feature_table / data.pmf_library are not set or missing")
+    t0 = time.perf_counter()
+    md = data_path(cfg, "feature_metadata")
+    ms2 = data_path(cfg, "ms2_spectra")
+    cands = annotate(feature_coordinates(read_matrix(feats).index,
+                                         pd.read_csv(md, sep=None, engine="python", index_col=0) if md else None),
+                     read_mgf(lib), read_mgf(ms2) if ms2 else None)
+    out = Path(sys.argv[1]) if len(sys.argv) > 1 else ROOT / ".cache" / "pmf_annotations.tsv"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    cands.to_csv(out, sep="\t", index=False)
+    best = best_hits(cands)
+    print(f"{len(best)} features annotated ({int((best['level'] == 2).sum())} at level 2) "
+          f"→ {out} ({time.perf_counter() - t0:.1f} s)")
@@ -0,0 +1,255 @@
+"""
+Headless per-page render benchmark (``streamlit.testing.v1.AppTest``).
+
+For every page in the sidebar router it records, cold (Streamlit data and
+resource caches cleared) and warm (same session, caches filled):
+
+* ``seconds``   median wall time of the page rerun
+* ``peak_mb``   peak Python allocation during the rerun (tracemalloc, separate pass;
+                the script is compiled once up front, as the server's script cache does)
+* ``elements``  number of delta elements in the rendered tree
+* ``bytes``     serialized element protos plus media files (images, downloads)
+
+Results go to a JSON file and are compared with a baseline; any metric that
+grows beyond the tolerance fails the run. On-disk build products under
+``.cache/`` are not cleared — "cold" means a fresh server process, not a
+fresh checkout.
+
+    python -m showcase.bench                       # all pages, compare with the baseline
+    python -m showcase.bench --pages Findings Overview --repeat 5
+    python -m showcase.bench --save-baseline       # accept the current numbers
+    python -m showcase.bench --ci                  # also fail without a baseline (default when $CI is set)
+"""
+
+import json
+import logging
+import os
+import statistics
+import time
+import tracemalloc
+from contextlib import contextmanager
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+APP = ROOT / "app.py"
+BASELINE = ROOT / "benchmarks" / "baseline.json"
+RESULTS = ROOT / ".cache" / "bench" / "results.json"
+
+# A metric regresses when it exceeds baseline × (1 + tolerance) AND the
+# absolute increase is above its floor (so tiny pages don't flap on noise).
+TOLERANCE = {"seconds": 0.5, "peak_mb": 0.5, "elements": 0.1, "bytes": 0.2}
+FLOOR = {"seconds": 0.05, "peak_mb": 2.0, "elements": 2, "bytes": 4096}
+
+
+def walk_tree(node):
+    yield node
+    children = getattr(node, "children", None)
+    if children:
+        for c in children.values() if isinstance(children, dict) else children:
+            yield from walk_tree(c)
+
+
+def tree_stats(at) -> tuple[int, int]:
+    """(delta elements, serialized proto bytes) of the last run's element tree."""
+    n = size = 0
+    for node in walk_tree(at._tree):
+        proto = getattr(node, "proto", None)
+        if proto is not None and not getattr(node, "children", None):
+            n += 1
+            size += proto.ByteSize()
+    return n, size
+
+
+@contextmanager
+def media_store():
+    """Capture media handed to the in-memory store while the block runs: file id → (bytes, mimetype)."""
+    from streamlit.runtime.memory_media_file_storage import MemoryMediaFileStorage
+
+    files: dict[str, tuple[bytes, str]] = {}
+    orig = MemoryMediaFileStorage.load_and_get_id
+
+    def capture(self, path_or_data, mimetype, *args, **kwargs):
+        file_id = orig(self, path_or_data, mimetype, *args, **kwargs)
+        blob = path_or_data if isinstance(path_or_data, (bytes, bytearray)) else Path(path_or_data).read_bytes()
+        files[file_id] = (bytes(blob), mimetype)
+        return file_id
+
+    MemoryMediaFileStorage.load_and_get_id = capture
+    try:
+        yield files
+    finally:
+        MemoryMediaFileStorage.load_and_get_id = orig
+
+
+@contextmanager
+def shared_bytecode():
+    """
+    Compile each script once for every ``AppTest`` run in the block. AppTest
+    gives each run a fresh ``ScriptCache``, so every rerun would recompile
+    ``app.py``; that compile alone peaks at ~8 MB and would hide the page's own
+    allocations in ``peak_mb``. The server keeps the bytecode across reruns.
+    """
+    from streamlit.runtime.scriptrunner.script_cache import ScriptCache
+
+    compiled = {}
+    orig = ScriptCache.get_bytecode
+
+    def get_bytecode(self, script_path):
+        path = os.path.abspath(script_path)
+        if path not in compiled:
+            compiled[path] = orig(self, script_path)
+        return compiled[path]
+
+    ScriptCache.get_bytecode = get_bytecode
+    try:
+        yield
+    finally:
+        ScriptCache.get_bytecode = orig
+
+
+def _clear_caches():
+    import streamlit as st
+    st.cache_data.clear()
+    st.cache_resource.clear()
+
+
+def _render(at, page: str) -> tuple[float, int, int, int]:
+    """Switch to ``page``; returns (seconds, elements, proto bytes, media bytes)."""
+    with media_store() as media:
+        t0 = time.perf_counter()
+        at.sidebar.radio[0].set_value(page).run()
+        elapsed = time.perf_counter() - t0
+    if at.exception:
+        raise RuntimeError(f"{page}: {at.exception[0].value}")
+    n, size = tree_stats(at)
+    return elapsed, n, size, sum(len(blob) for blob, _ in media.values())
+
+
+def _peak_mb(at, page: str) -> float:
+    tracemalloc.start()
+    try:
+        at.sidebar.radio[0].set_value(page).run()
+        return tracemalloc.get_traced_memory()[1] / 2**20
+    finally:
+        tracemalloc.stop()
+
+
+def _other(pages: list[str], page: str) -> str:
+    return next((p for p in pages if p != page), page)
+
+
+def bench_page(page: str, pages: list[str], repeat: int = 3, timeout: float = 300) -> dict:
+    from streamlit.testing.v1 import AppTest
+
+    out = {}
+    # cold: fresh session on another page, caches cleared, then switch to ``page``
+    cold = []
+    for _ in range(repeat):
+        at = AppTest.from_file(str(APP), default_timeout=timeout).run()
+        at.sidebar.radio[0].set_value(_other(pages, page)).run()
+        _clear_caches()
+        cold.append(_render(at, page))
+    _clear_caches()
+    at = AppTest.from_file(str(APP), default_timeout=timeout).run()
+    at.sidebar.radio[0].set_value(_other(pages, page)).run()
+    _clear_caches()
+    cold_peak = _peak_mb(at, page)
+
+    # warm: same session, bounce to another page and back so the script reruns in full
+    _render(at, page)
+    warm = []
+    for _ in range(repeat):
+        at.sidebar.radio[0].set_value(_other(pages, page)).run()
+        warm.append(_render(at, page))
+    at.sidebar.radio[0].set_value(_other(pages, page)).run()
+    warm_peak = _peak_mb(at, page)
+
+    for label, runs, peak in (("cold", cold, cold_peak), ("warm", warm, warm_peak)):
+        out[label] = {
+            "seconds": round(statistics.median(r[0] for r in runs), 4),
+            "peak_mb": round(peak, 2),
+            "elements": runs[-1][1],
+            "bytes": runs[-1][2] + runs[-1][3],
+        }
+    return out
+
+
+def compare(results: dict, baseline: dict, strict: bool = False) -> list[str]:
+    """Human-readable regressions of ``results`` against ``baseline`` (``strict``: pages it lacks too)."""
+    problems = []
+    for page, modes in results["pages"].items():
+        for mode, metrics in modes.items():
+            base = baseline.get("pages", {}).get(page, {}).get(mode)
+            if not base:
+                if strict:
+                    problems.append(f"{page} [{mode}]: not in the baseline")
+                continue
+            for key, value in metrics.items():
+                ref = base.get(key)
+                if ref is None:
+                    continue
+                if value > ref * (1 + TOLERANCE[key]) and value - ref > FLOOR[key]:
+                    problems.append(f"{page} [{mode}] {key}: {value:g} vs baseline {ref:g} "
+                                    f"(+{(value / ref - 1) * 100 if ref else float('inf'):.0f}%)")
+    return problems
+
+
+def app_pages(timeout: float = 300) -> list[str]:
+    from streamlit.testing.v1 import AppTest
+    at = AppTest.from_file(str(APP), default_timeout=timeout).run()
+    return list(at.sidebar.radio[0].options)
+
+
+def run(pages: list[str] | None = None, repeat: int = 3, timeout: float = 300) -> dict:
+    import platform
+    import streamlit
+
+    with shared_bytecode():
+        all_pages = app_pages(timeout)
+        results = {"created": time.strftime("%Y-%m-%dT%H:%M:%S"), "repeat": repeat,
+                   "python": platform.python_version(), "streamlit": streamlit.__version__, "pages": {}}
+        for page in pages or all_pages:
+            if page not in all_pages:
+                raise SystemExit(f"unknown page {page!r}; pages: {', '.join(all_pages)}")
+            results["pages"][page] = bench_page(page, all_pages, repeat, timeout)
+            c, w = results["pages"][page]["cold"], results["pages"][page]["warm"]
+            print(f"{page:<26} cold {c['seconds'] * 1000:8.1f} ms {c['peak_mb']:7.1f} MB │ "
+                  f"warm {w['seconds'] * 1000:8.1f} ms {w['peak_mb']:7.1f} MB │ "
+                  f"{w['elements']:4d} elements {w['bytes'] / 1024:9.1f} KB", flush=True)
+    return results
+
+
+if __name__ == "__main__":
+    import argparse
+
+    ap = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    ap.add_argument("--pages", nargs="*", help="page names (default: every page in the router)")
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--timeout", type=float, default=300, help="per-run timeout, seconds")
+    ap.add_argument("--out", type=Path, default=RESULTS)
+    ap.add_argument("--baseline", type=Path, default=BASELINE)
+    ap.add_argument("--save-baseline", action="store_true", help="write the results as the new baseline")
+    ap.add_argument("--ci", action="store_true",
+                    default=os.environ.get("CI", "").strip().lower() in ("1", "true", "yes"),
+                    help="fail when the baseline is missing or lacks a benchmarked page")
+    args = ap.parse_args()
+
+    logging.disable(logging.WARNING)       # deprecation chatter from every rerun
+    results = run(args.pages, args.repeat, args.timeout)
+    args.out.parent.mkdir(parents=True, exist_ok=True)
+    args.out.write_text(json.dumps(results, indent=2))
+    print(f"→ {args.out}")
+    if args.save_baseline:
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        args.baseline.write_text(json.dumps(results, indent=2))
+        print(f"baseline saved → {args.baseline}")
+    elif args.baseline.exists():
+        problems = compare(results, json.loads(args.baseline.read_text()), strict=args.ci)
+        if problems:
+            print("REGRESSIONS:\n  " + "\n  ".join(problems))
+            raise SystemExit(1)
+        print(f"no regressions against {args.baseline}")
+    elif args.ci:
+        raise SystemExit(f"no baseline at {args.baseline}; record one with --save-baseline and commit it")
+    else:
+        print(f"no baseline at {args.baseline}; run with --save-baseline to create one")
@@ -0,0 +1,152 @@
+"""
+Study catalog — several showcases served from one deployment.
+
+``catalog.yaml`` lists the studies: an id, the title shown in the picker and
+the study's ``content_config.yaml``. Relative data and figure paths in a
+study's config resolve against the folder holding that config, so a study is
+a self-contained folder (``studies/<id>/content_config.yaml`` next to its
+``assets/`` and ``data/``). The first entry is the default study; without a
+catalog file the deployment serves ``content_config.yaml`` alone.
+
+Only the selected study is ever loaded: the picker reads nothing but the
+catalog. ``LoadedStudies`` bounds memory across studies. Cached functions
+wrapped with ``scoped`` record their arguments under the study that called
+them; when more than ``SHOWCASE_MAX_STUDIES`` studies have been used, the
+least recently used one is evicted and the cache entries no other loaded
+study shares are cleared.
+"""
+
+from __future__ import annotations
+
+import functools
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+
+import yaml
+
+from showcase.config import ConfigError
+
+ROOT = Path(__file__).resolve().parent.parent
+CATALOG_PATH = ROOT / "catalog.yaml"
+DEFAULT_CONFIG = ROOT / "content_config.yaml"
+MAX_STUDIES = int(os.environ.get("SHOWCASE_MAX_STUDIES", "3"))
+_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+
+@dataclass(frozen=True)
+class Study:
+    id: str
+    title: str
+    config: Path
+    default: bool = False
+
+    def dir_in(self, base: Path) -> Path:
+        """Per-study subdirectory of a shared cache/output directory (``base`` itself for the default)."""
+        return base if self.default else base / self.id
+
+
+def load(path: Path = CATALOG_PATH) -> tuple[Study, ...]:
+    """Studies listed in ``catalog.yaml``; raises ``ConfigError`` on a malformed catalog."""
+    path = Path(path)
+    if not path.exists():
+        return (Study("main", "Main study", DEFAULT_CONFIG, default=True),)
+    try:
+        raw = yaml.load(path.read_text(encoding="utf-8"), Loader=_LOADER) or {}
+    except yaml.YAMLError as e:
+        raise ConfigError(f"{path.name}: invalid YAML — {e}") from e
+    entries = raw.get("studies") if isinstance(raw, dict) else None
+    if not entries or not isinstance(entries, list):
+        raise ConfigError(f"{path.name}: studies: expected a non-empty list")
+    studies, errors = [], []
+    for i, e in enumerate(entries):
+        missing = [k for k in ("id", "title", "config") if not isinstance((e or {}).get(k), str)]
+        if missing:
+            errors.append(f"studies[{i}]: missing {', '.join(missing)}")
+            continue
+        studies.append(Study(e["id"], e["title"], (path.parent / e["config"]).resolve(), default=not studies))
+    ids = [s.id for s in studies]
+    errors += [f"duplicate study id {i!r}" for i in sorted({i for i in ids if ids.count(i) > 1})]
+    if errors:
+        raise ConfigError(f"{path.name}: " + "; ".join(errors))
+    return tuple(studies)
+
+
+# ── Memory bound across studies ────────────────────────────────────────────────
+class LoadedStudies:
+    """LRU of study ids plus the cache entries each one has used."""
+
+    def __init__(self, capacity: int = MAX_STUDIES):
+        self.capacity = max(1, capacity)
+        self._lock = threading.Lock()
+        self._order: OrderedDict[str, set] = OrderedDict()     # study → {(fn name, args, kwargs)}
+        self._fns: dict[str, object] = {}                       # fn name → latest cached callable
+        self.evictions = 0
+
+    def touch(self, study_id: str) -> list[str]:
+        """Mark ``study_id`` most recently used; returns the studies evicted to make room."""
+        with self._lock:
+            self._order.setdefault(study_id, set())
+            self._order.move_to_end(study_id)
+            evicted = []
+            while len(self._order) > self.capacity:
+                old, entries = self._order.popitem(last=False)
+                shared = set().union(*self._order.values())
+                for name, args, kw in entries - shared:
+                    self._fns[name].clear(*args, **dict(kw))
+                evicted.append(old)
+                self.evictions += 1
+            return evicted
+
+    def track(self, study_id: str, name: str, fn, args: tuple, kwargs: dict) -> None:
+        with self._lock:
+            self._fns[name] = fn
+            self._order.setdefault(study_id, set()).add((name, args, tuple(sorted(kwargs.items()))))
+
+    def loaded(self) -> list[str]:
+        with self._lock:
+            return list(self._order)
+
+
+LOADED = LoadedStudies()
+
+
+def scoped(decorator, current, loaded: LoadedStudies = LOADED):
+    """
+    Wrap a cache decorator (``st.cache_resource`` …) so each call is recorded
+    under the study ``current()`` returns. Arguments must be hashable.
+    Supports bare and parameterised use, like the decorator it wraps.
+    """
+    def wrap(cached):
+        name = cached.__qualname__
+
+        @functools.wraps(cached)
+        def call(*args, **kw):
+            loaded.track(current(), name, cached, args, kw)
+            return cached(*args, **kw)
+
+        call.clear = cached.clear
+        return call
+
+    def deco(fn=None, **kwargs):
+        if fn is None:
+            return lambda f: wrap(decorator(**kwargs)(f))
+        return wrap(decorator(fn))
+
+    return deco
+
+
+if __name__ == "__main__":
+    # python -m showcase.catalog — list the studies and check each config compiles
+    from showcase.config import compile_config
+
+    for s in load():
+        try:
+            snap = compile_config(s.config)
+            status = f"OK ({snap.digest})"
+        except (ConfigError, OSError) as e:
+            status = f"ERROR {e}"
+        where = s.config.relative_to(ROOT) if s.config.is_relative_to(ROOT) else s.config
+        print(f"{'*' if s.default else ' '} {s.id:<20} {str(where):<40} {status}")
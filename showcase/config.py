@@ -0,0 +1,229 @@
+"""
+Config compiler — validate ``content_config.yaml`` once and precompute page views.
+
+``compile_config`` parses the YAML, checks it against ``SCHEMA`` and builds a
+frozen ``Snapshot`` holding the config itself plus everything the pages used to
+derive on every rerun (placeholder flags, evidence table, glossary columns,
+link table). The app keeps one snapshot per content hash in a resource cache,
+so all sessions share it and a rebuild only happens when the file changes.
+Relative ``data:`` and ``figures:`` paths resolve against the config's own
+folder and are rebased onto the repo root here, so a study kept in
+``studies/<id>/`` works like the root one.
+The two tables are built on first use, so pages without a dataframe never
+import pandas. ``precompiled`` keeps the validated content as JSON under
+``.cache/config/`` so a cold process skips YAML parsing and validation.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from dataclasses import dataclass
+from functools import cached_property
+from pathlib import Path
+from types import MappingProxyType
+
+import yaml
+
+from showcase.util import file_digest, lazy_import
+
+pd = lazy_import("pandas")
+
+NEED_MARKER = "[NEED"
+ROOT = Path(__file__).resolve().parent.parent
+CACHE_DIR = ROOT / ".cache" / "config"
+_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)     # libyaml when available
+METHOD_KEYS = ("genome", "transcriptomics", "metabolomics", "integration", "validation")
+
+# ── Schema ─────────────────────────────────────────────────────────────────────
+# A dict lists required keys (extra keys are allowed; a trailing "?" marks a key
+# optional); ``{str: str}`` is a free mapping; a one-element list means
+# "list of"; a type is a leaf check.
+_METHOD = {"inputs": [str], "steps": [str], "tools": [str], "outputs": [str]}
+SCHEMA = {
+    "study": {"title": str, "short_title": str, "citation": str, "summary": str},
+    "deliverables": [{"id": str, "label": str, "detail": str}],
+    "glossary": {str: str},
+    "findings": [{
+        "id": str, "claim": str, "evidence_type": str, "artifacts": [str],
+        "why_it_matters": str, "figure_ref": str,
+    }],
+    "methods": {k: _METHOD for k in METHOD_KEYS},
+    "impact": {"scientific": [str], "resource": [str], "translational": [str], "follow_ups": [str]},
+    "resources": {
+        "paper_doi": str, "genome_accession": str,
+        "rnaseq_accession": str, "metabolomics_accession": str,
+    },
+    "data?": {str: str},
+    "figures?": [{"img": str, "caption": str}],
+    "contrasts?": [{"id": str, "label": str, "factor": str, "numerator": str, "denominator": str}],
+    "modules?": {"power?": int, "network_type?": str, "r2_cut?": float, "min_module_size?": int,
+                 "deep_split?": int, "merge_cut_height?": float, "power_sample?": int, "seed?": int},
+}
+
+
+class ConfigError(ValueError):
+    """Raised when ``content_config.yaml`` does not match ``SCHEMA``."""
+
+
+def validate(node, schema=SCHEMA, path: str = "") -> list[str]:
+    """Return a list of human-readable problems (empty when valid)."""
+    where = path or "<root>"
+    if isinstance(schema, type):
+        return [] if isinstance(node, schema) else [f"{where}: expected {schema.__name__}, got {type(node).__name__}"]
+    if isinstance(schema, list):
+        if not isinstance(node, list):
+            return [f"{where}: expected a list, got {type(node).__name__}"]
+        return [e for i, item in enumerate(node) for e in validate(item, schema[0], f"{path}[{i}]")]
+    if not isinstance(node, dict):
+        return [f"{where}: expected a mapping, got {type(node).__name__}"]
+    if set(schema) == {str}:
+        return [e for k, v in node.items() for e in validate(v, schema[str], f"{path}.{k}" if path else str(k))]
+    errors = []
+    for key, sub in schema.items():
+        optional = key.endswith("?")
+        key = key.rstrip("?")
+        child = f"{path}.{key}" if path else key
+        if key not in node:
+            if not optional:
+                errors.append(f"{child}: missing")
+        else:
+            errors.extend(validate(node[key], sub, child))
+    return errors
+
+
+def _freeze(node):
+    if isinstance(node, dict):
+        return MappingProxyType({k: _freeze(v) for k, v in node.items()})
+    if isinstance(node, list):
+        return tuple(_freeze(v) for v in node)
+    return node
+
+
+# ── Snapshot ───────────────────────────────────────────────────────────────────
+@dataclass(frozen=True)
+class Snapshot:
+    """Read-only config plus the derived views the pages render from."""
+    digest: str
+    cfg: MappingProxyType
+    deliverables: tuple          # (deliverable, needs_data) pairs
+    findings: tuple              # (finding, validated, expander title) triples
+    glossary_columns: tuple      # two tuples of (term, definition)
+
+    @cached_property
+    def evidence_df(self) -> pd.DataFrame:
+        return _evidence_df(self.cfg["findings"])
+
+    @cached_property
+    def links_df(self) -> pd.DataFrame:
+        return _links_df(self.cfg["resources"])
+
+
+def _evidence_df(findings) -> pd.DataFrame:
+    rows = [
+        {
+            "Finding": f["id"],
+            "Claim (short)": f["claim"][:60] + "…",
+            "Evidence type": f["evidence_type"].split(";")[0].strip(),
+            "Artifact": artifact,
+            "Figure": f["figure_ref"],
+        }
+        for f in findings for artifact in f["artifacts"]
+    ]
+    return pd.DataFrame(rows)
+
+
+def _links_df(r) -> pd.DataFrame:
+    return pd.DataFrame({
+        "Resource": ["Paper (DOI)", "Genome Accession", "RNA-seq Accession", "Metabolomics Accession"],
+        "Link / Accession": [
+            r["paper_doi"], r["genome_accession"],
+            r["rnaseq_accession"], r["metabolomics_accession"],
+        ],
+        "Status": ["available", "available", "available", "available via request"],
+    })
+
+
+def _parse(path: Path) -> dict:
+    """YAML → validated plain data; raises ``ConfigError`` on bad content."""
+    try:
+        raw = yaml.load(path.read_text(encoding="utf-8"), Loader=_LOADER)
+    except yaml.YAMLError as e:
+        raise ConfigError(f"{path.name}: invalid YAML — {e}") from e
+    errors = validate(raw)
+    if errors:
+        raise ConfigError(f"{path.name}: " + "; ".join(errors))
+    return raw
+
+
+def _rebase(raw: dict, base: Path) -> dict:
+    """Data and figure paths relative to ``base`` → relative to the repo root."""
+    if base == ROOT:
+        return raw
+
+    def move(rel: str) -> str:
+        return os.path.relpath(base / rel, ROOT) if rel and not Path(rel).is_absolute() else rel
+
+    raw = dict(raw)
+    if raw.get("data"):
+        raw["data"] = {k: move(v) for k, v in raw["data"].items()}
+    if raw.get("figures"):
+        raw["figures"] = [dict(f, img=move(f["img"])) for f in raw["figures"]]
+    return raw
+
+
+def _snapshot(digest: str, raw: dict, path: Path) -> Snapshot:
+    cfg = _freeze(_rebase(raw, path.resolve().parent))
+    gloss = tuple(cfg["glossary"].items())
+    return Snapshot(
+        digest=digest,
+        cfg=cfg,
+        deliverables=tuple((d, NEED_MARKER in d["detail"]) for d in cfg["deliverables"]),
+        findings=tuple(
+            (f, NEED_MARKER not in f["claim"], f"**{f['id']}** — {f['claim'][:80]}...")
+            for f in cfg["findings"]
+        ),
+        glossary_columns=(gloss[0::2], gloss[1::2]),
+    )
+
+
+def compile_config(path: Path) -> Snapshot:
+    """Parse, validate and precompute; raises ``ConfigError`` on bad content."""
+    path = Path(path)
+    return _snapshot(file_digest(path), _parse(path), path)
+
+
+def precompiled(path: Path, cache_dir: Path = CACHE_DIR) -> Snapshot:
+    """
+    ``compile_config`` that skips parsing and validation for content it has
+    seen before: the validated data is kept as ``<path tag>.<digest>.json``
+    under ``cache_dir``, so a cold process only reads JSON.
+    """
+    path = Path(path)
+    digest = file_digest(path)
+    tag = hashlib.sha256(str(path.resolve()).encode()).hexdigest()[:8]
+    hit = cache_dir / f"{tag}.{digest}.json"
+    if hit.exists():
+        return _snapshot(digest, json.loads(hit.read_text(encoding="utf-8")), path)
+    raw = _parse(path)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    tmp = hit.with_suffix(".tmp")
+    tmp.write_text(json.dumps(raw, default=str), encoding="utf-8")
+    tmp.replace(hit)
+    for old in cache_dir.glob(f"{tag}.*.json"):     # earlier versions of this file only
+        if old != hit:
+            old.unlink(missing_ok=True)
+    return _snapshot(digest, raw, path)
+
+
+if __name__ == "__main__":
+    # python -m showcase.config [content_config.yaml] — validate (and precompile) without starting the app
+    import sys
+    target = Path(sys.argv[1]) if len(sys.argv) > 1 else ROOT / "content_config.yaml"
+    try:
+        snap = precompiled(target)
+    except ConfigError as e:
+        sys.exit(str(e))
+    print(f"{target.name} OK ({snap.digest}); {len(snap.evidence_df)} evidence rows; "
+          f"precompiled under {CACHE_DIR}")
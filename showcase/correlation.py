@@ -0,0 +1,188 @@
+"""
+Gene–metabolite Pearson correlation, chunked over genes.
+
+Rows of both matrices are z-scored once, so each gene chunk × metabolite block
+of r is a single matrix product. Memory stays at O((chunk_size + top_k) × m)
+regardless of genome size: only the ``top_k`` strongest genes per metabolite
+are carried from chunk to chunk.
+
+FDR: a second pass over the chunks counts, for every retained hit, how many of
+all N tests are at least as strong (|r| ≥ its |r|), which is its exact p-value
+rank. Benjamini–Hochberg q-values are then p·N/rank with the step-up minimum
+taken over the retained hits; that is never below the full-matrix BH value, so
+``q < alpha`` here implies BH significance at ``alpha``.
+
+Results are cached under ``.cache/correlation/`` per input hash and ``top_k``
+(``ensure``), so the page and the precomputation scheduler share them.
+"""
+
+import hashlib
+import json
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterator
+
+import numpy as np
+import pandas as pd
+from scipy.special import stdtr
+
+from showcase.util import file_digest, staged_dir
+
+CACHE_DIR = Path(__file__).resolve().parent.parent / ".cache" / "correlation"
+
+
+@dataclass(frozen=True)
+class CorrelationResult:
+    hits: pd.DataFrame      # metabolite, gene, r, p, q — top_k per metabolite
+    n_tests: int
+    n_samples: int
+
+
+def _zscore(x: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Row-standardise; returns (z, keep-mask) dropping constant/NaN rows."""
+    mu = x.mean(axis=1, keepdims=True)
+    sd = x.std(axis=1, ddof=1, keepdims=True)
+    keep = np.isfinite(sd[:, 0]) & (sd[:, 0] > 0)
+    z = (x[keep] - mu[keep]) / sd[keep]
+    return z, keep
+
+
+def pearson_pvalue(r: np.ndarray, n: int) -> np.ndarray:
+    """Two-sided p-value for Pearson r with n samples."""
+    r = np.clip(np.abs(r), 0.0, 1.0 - 1e-12)
+    t = r * np.sqrt((n - 2) / (1.0 - r * r))
+    return 2.0 * stdtr(n - 2, -t)
+
+
+def align_samples(expr: pd.DataFrame, metab: pd.DataFrame) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """Restrict both tables to shared sample columns, in expression order."""
+    shared = [c for c in expr.columns if c in set(metab.columns)]
+    if len(shared) < 3:
+        raise ValueError(f"need ≥ 3 shared samples between expression and metabolite tables, found {len(shared)}")
+    return expr[shared], metab[shared]
+
+
+def _chunks(z: np.ndarray, size: int):
+    for start in range(0, z.shape[0], size):
+        yield start, z[start:start + size]
+
+
+def correlate(expr: pd.DataFrame, metab: pd.DataFrame,
+              top_k: int = 50, chunk_size: int = 2048) -> CorrelationResult:
+    """Top-``top_k`` genes per metabolite by |r|, with p- and BH q-values."""
+    expr, metab = align_samples(expr, metab)
+    n = expr.shape[1]
+    zg, gkeep = _zscore(expr.to_numpy(np.float64))
+    zm, mkeep = _zscore(metab.to_numpy(np.float64))
+    genes = expr.index[gkeep].to_numpy()
+    mets = metab.index[mkeep].to_numpy()
+    g, m = zg.shape[0], zm.shape[0]
+    k = min(top_k, g)
+    zmT = zm.T / (n - 1)
+
+    # Pass 1 — running top-k per metabolite (column)
+    best_r = np.empty((0, m))
+    best_i = np.empty((0, m), dtype=np.int64)
+    for start, block in _chunks(zg, chunk_size):
+        r = block @ zmT
+        cand_r = np.vstack([best_r, r])
+        cand_i = np.vstack([best_i, np.broadcast_to(np.arange(start, start + len(block))[:, None], r.shape)])
+        if cand_r.shape[0] > k:
+            sel = np.argpartition(-np.abs(cand_r), k - 1, axis=0)[:k]
+            cand_r = np.take_along_axis(cand_r, sel, axis=0)
+            cand_i = np.take_along_axis(cand_i, sel, axis=0)
+        best_r, best_i = cand_r, cand_i
+
+    # Pass 2 — exact rank of each retained |r| among all g × m tests
+    kept = np.abs(best_r).ravel()
+    order = np.argsort(kept)
+    sorted_kept = kept[order]
+    counts = np.zeros(len(kept) + 1, dtype=np.int64)
+    for _, block in _chunks(zg, chunk_size):
+        a = np.abs(block @ zmT).ravel()
+        counts += np.bincount(np.searchsorted(sorted_kept, a, side="right"), minlength=len(kept) + 1)
+    at_least = np.cumsum(counts[::-1])[::-1][1:]        # tests with |r| ≥ sorted_kept[i]
+    rank = np.empty_like(at_least)
+    rank[order] = at_least
+
+    n_tests = g * m
+    r_flat = best_r.ravel()
+    p = pearson_pvalue(r_flat, n)
+    q_raw = np.minimum(p * n_tests / np.maximum(rank, 1), 1.0)
+    by_rank = np.argsort(-rank, kind="stable")           # weakest first
+    q = np.empty_like(q_raw)
+    q[by_rank] = np.minimum.accumulate(q_raw[by_rank])
+
+    hits = pd.DataFrame({
+        "metabolite": np.tile(mets, best_r.shape[0]),
+        "gene": genes[best_i.ravel()],
+        "r": r_flat,
+        "p": p,
+        "q": q,
+    })
+    hits = hits.sort_values(["metabolite", "r"], key=lambda s: s.abs() if s.name == "r" else s,
+                            ascending=[True, False], ignore_index=True)
+    return CorrelationResult(hits=hits, n_tests=n_tests, n_samples=n)
+
+
+def iter_correlations(expr: pd.DataFrame, metab: pd.DataFrame,
+                      rows: int = 200_000) -> Iterator[pd.DataFrame]:
+    """
+    Every gene × metabolite r and p in long format, about ``rows`` rows per
+    chunk, for streaming exports of the full table (BH q-values need the
+    global ranking and are only on the ``correlate`` hits).
+    """
+    expr, metab = align_samples(expr, metab)
+    n = expr.shape[1]
+    zg, gkeep = _zscore(expr.to_numpy(np.float64))
+    zm, mkeep = _zscore(metab.to_numpy(np.float64))
+    genes = expr.index[gkeep].to_numpy()
+    mets = metab.index[mkeep].to_numpy()
+    zmT = zm.T / (n - 1)
+    for start, block in _chunks(zg, max(1, rows // max(len(mets), 1))):
+        r = (block @ zmT).ravel()
+        yield pd.DataFrame({
+            "gene": np.repeat(genes[start:start + len(block)], len(mets)),
+            "metabolite": np.tile(mets, len(block)),
+            "r": r,
+            "p": pearson_pvalue(r, n),
+        })
+
+
+# ── Persistence ────────────────────────────────────────────────────────────────
+def result_dir(expr_path: Path, metab_path: Path, top_k: int = 50) -> Path:
+    """Cache directory keyed by both input files and ``top_k``."""
+    tag = hashlib.sha256(json.dumps([file_digest(expr_path), file_digest(metab_path), top_k])
+                         .encode()).hexdigest()[:16]
+    return CACHE_DIR / tag
+
+
+def save(result: CorrelationResult, out: Path) -> None:
+    """Write the result into a staging directory and rename it to ``out``."""
+    with staged_dir(out) as tmp:
+        result.hits.to_csv(tmp / "hits.tsv", sep="\t", index=False)
+        # meta.json last: its presence marks a complete result
+        (tmp / "meta.json").write_text(json.dumps({"n_tests": result.n_tests, "n_samples": result.n_samples}))
+
+
+def load(out: Path) -> CorrelationResult | None:
+    if not (out / "meta.json").exists():
+        return None
+    meta = json.loads((out / "meta.json").read_text())
+    hits = pd.read_csv(out / "hits.tsv", sep="\t", dtype={"metabolite": str, "gene": str})
+    return CorrelationResult(hits=hits, n_tests=meta["n_tests"], n_samples=meta["n_samples"])
+
+
+def ensure(frames_fn, expr_path: Path, metab_path: Path, top_k: int = 50) -> tuple[CorrelationResult, Path]:
+    """Cached result for these inputs, computing (``frames_fn()`` → (expr, metab)) on a miss."""
+    out = result_dir(expr_path, metab_path, top_k)
+    res = load(out)
+    if res is None:
+        res = correlate(*frames_fn(), top_k=top_k)
+        save(res, out)
+    return res, out
+
+
+def threshold(hits: pd.DataFrame, min_abs_r: float = 0.8, max_fdr: float = 0.05) -> pd.DataFrame:
+    """Hits passing the |r| / FDR checkpoint used in the Integration methods."""
+    return hits[(hits["r"].abs() > min_abs_r) & (hits["q"] < max_fdr)]
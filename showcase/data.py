@@ -0,0 +1,38 @@
+"""
+Locating and reading the processed omics matrices.
+
+Paths come from the optional ``data:`` section of ``content_config.yaml`` and
+are resolved against the repo root (``config`` rebases a study folder's own
+paths onto it). The files themselves are not shipped with the app; pages
+check ``data_path`` and show a placeholder when it returns None.
+"""
+
+from pathlib import Path
+
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parent.parent
+MATRIX_KEY_SUFFIXES = ("_matrix", "_table")
+
+
+def data_path(cfg, key: str) -> Path | None:
+    """Resolved path for ``data.<key>``, or None when unset or missing on disk."""
+    rel = (cfg.get("data") or {}).get(key)
+    if not rel:
+        return None
+    p = ROOT / rel
+    return p if p.exists() else None
+
+
+def table_keys(cfg) -> list[str]:
+    """``data:`` keys holding numeric features × samples tables (named ``*_matrix`` / ``*_table``)."""
+    return [k for k in (cfg.get("data") or {}) if k.endswith(MATRIX_KEY_SUFFIXES)]
+
+
+def read_matrix(path: Path) -> pd.DataFrame:
+    """Features × samples table; first column is the feature ID."""
+    path = Path(path)
+    sep = "," if path.suffix == ".csv" else "\t"
+    df = pd.read_csv(path, sep=sep, index_col=0)
+    df.index = df.index.astype(str)
+    return df.apply(pd.to_numeric, errors="coerce")
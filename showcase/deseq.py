@@ -0,0 +1,323 @@
+"""
+DESeq2-style differential expression for single-factor designs, in NumPy.
+
+All genes are processed at once as arrays (dispersion search in gene chunks):
+
+1. median-of-ratios size factors;
+2. group means by vectorised Newton steps of the negative-binomial GLM
+   (``~ factor``, log link);
+3. gene-wise dispersions maximising the Cox–Reid adjusted profile likelihood
+   on a log-spaced grid;
+4. parametric trend ``a0 + a1 / mean`` (gamma-family IRLS with outlier
+   removal), then MAP dispersions under a log-normal prior around the trend;
+   gene-wise values more than 2 prior SDs above the trend are kept as is;
+5. Wald test of ``numerator − denominator`` and Benjamini–Hochberg adjustment.
+
+Not reproduced from DESeq2: Cook's-distance outlier replacement, independent
+filtering and LFC shrinkage. Contrasts on the same factor share one design, so
+``run_contrasts`` fits each design once and reads every contrast off that fit
+as a Wald test; designs are spread over a process pool and results are cached
+per contrast under ``.cache/de/``.
+"""
+
+import hashlib
+import json
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from scipy.special import gammaln, ndtr, polygamma
+
+from showcase.util import file_digest
+
+CACHE_DIR = Path(__file__).resolve().parent.parent / ".cache" / "de"
+MIN_DISP = 1e-8
+RESULT_COLUMNS = ["gene", "baseMean", "log2FoldChange", "lfcSE", "stat", "pvalue", "padj"]
+
+
+class ContrastError(ValueError):
+    """Raised when configured contrasts name a factor or level the sample sheet lacks."""
+
+
+@dataclass(frozen=True)
+class Contrast:
+    id: str
+    label: str
+    factor: str          # sample-sheet column
+    numerator: str
+    denominator: str
+
+
+# ── Model pieces ───────────────────────────────────────────────────────────────
+def size_factors(counts: np.ndarray) -> np.ndarray:
+    """Median-of-ratios over genes with no zero counts."""
+    pos = (counts > 0).all(axis=1)
+    if not pos.any():
+        raise ValueError("every gene has at least one zero count; cannot estimate size factors")
+    logk = np.log(counts[pos])
+    return np.exp(np.median(logk - logk.mean(axis=1, keepdims=True), axis=0))
+
+
+def _fit_means(y, s, x, alpha, beta=None, n_iter=25):
+    """Per-gene, per-level log means for the NB GLM with an indicator design ``x``."""
+    if beta is None:
+        beta = np.log(np.maximum((y / s) @ x / x.sum(axis=0), 1e-3))
+    for _ in range(n_iter):
+        m = s * np.exp(beta @ x.T)
+        w = 1.0 / (1.0 + alpha[:, None] * m)
+        info = (m * w) @ x
+        step = ((y - m) * w) @ x / np.maximum(info, 1e-12)
+        beta = np.clip(beta + step, -30.0, 30.0)
+        if np.abs(step).max() < 1e-8:
+            break
+    m = s * np.exp(beta @ x.T)
+    info = (m / (1.0 + alpha[:, None] * m)) @ x
+    return beta, m, info
+
+
+def _cr_loglik(y, m, x, log_alpha):
+    """Cox–Reid adjusted NB log-likelihood; ``log_alpha`` broadcasts as (genes, grid)."""
+    a = np.exp(log_alpha)[..., None]                   # (g, k, 1)
+    y3, m3 = y[:, None, :], m[:, None, :]
+    inv = 1.0 / a
+    ll = (gammaln(y3 + inv) - gammaln(inv) - (y3 + inv) * np.log1p(a * m3) + y3 * np.log(a * m3)).sum(axis=2)
+    w = m3 / (1.0 + a * m3)
+    cr = 0.5 * np.log(np.maximum(w @ x, 1e-300)).sum(axis=2)
+    return ll - cr
+
+
+def _grid_max(y, m, x, max_disp, penalty=None):
+    """Dispersion maximising the (optionally penalised) CR likelihood, per gene."""
+    coarse = np.linspace(np.log(MIN_DISP), np.log(max_disp), 40)
+    chunk = max(64, 4_000_000 // (len(coarse) * y.shape[1]))    # ~32 MB per temporary
+    out = np.empty(y.shape[0])
+    for a in range(0, y.shape[0], chunk):
+        b = a + chunk
+        grid = np.broadcast_to(coarse, (len(y[a:b]), len(coarse)))
+        for width in (None, coarse[1] - coarse[0]):
+            if width is not None:                    # refine around the coarse optimum
+                grid = best[:, None] + np.linspace(-width, width, 21)
+            score = _cr_loglik(y[a:b], m[a:b], x, grid)
+            if penalty is not None:
+                score = score + penalty(grid, slice(a, b))
+            best = grid[np.arange(len(grid)), score.argmax(axis=1)]
+        out[a:b] = np.exp(best)
+    return np.clip(out, MIN_DISP, max_disp)
+
+
+def _fit_trend(base_mean, disp):
+    """Parametric dispersion trend a0 + a1/mean (gamma IRLS); returns callable."""
+    use = (base_mean > 0) & (disp > 100 * MIN_DISP)
+    mu, d = base_mean[use], disp[use]
+    coef = np.array([0.1, 1.0])
+    for _ in range(10):
+        fitted = coef[0] + coef[1] / mu
+        keep = (d / fitted > 1e-4) & (d / fitted < 15)
+        xm = np.column_stack([np.ones(keep.sum()), 1.0 / mu[keep]])
+        for _ in range(10):
+            f = xm @ coef
+            sw = 1.0 / np.maximum(f, 1e-12)
+            coef_new = np.linalg.lstsq(xm * sw[:, None], d[keep] * sw, rcond=None)[0]
+            if np.allclose(coef_new, coef, rtol=1e-6):
+                break
+            coef = coef_new
+        if (coef <= 0).any():
+            med = float(np.median(d))                   # DESeq2 would switch to a local fit
+            return lambda m: np.full_like(m, med, dtype=float)
+    return lambda m: coef[0] + coef[1] / np.maximum(m, 1e-12)
+
+
+def _bh(p: np.ndarray) -> np.ndarray:
+    out = np.full_like(p, np.nan)
+    ok = np.isfinite(p)
+    pv = p[ok]
+    order = np.argsort(pv)
+    q = pv[order] * len(pv) / np.arange(1, len(pv) + 1)
+    q = np.minimum.accumulate(q[::-1])[::-1]
+    res = np.empty_like(pv)
+    res[order] = np.minimum(q, 1.0)
+    out[ok] = res
+    return out
+
+
+def fit(counts: pd.DataFrame, levels: pd.Series) -> dict:
+    """
+    Fit ``~ levels`` on a genes × samples count table; ``levels`` maps sample →
+    factor level (samples with NaN are dropped). Returns arrays for ``wald``.
+    """
+    levels = levels.dropna().astype(str)
+    samples = [c for c in counts.columns if c in levels.index]
+    y = np.round(counts[samples].to_numpy(np.float64))
+    names = sorted(levels[samples].unique())
+    if len(names) < 2:
+        raise ValueError("need at least two factor levels")
+    x = (levels[samples].to_numpy()[:, None] == np.array(names)[None, :]).astype(np.float64)
+    n, p = x.shape
+    if n <= p:
+        raise ValueError("need replicates: more samples than factor levels")
+
+    s = size_factors(y)
+    base_mean = (y / s).mean(axis=1)
+    expressed = base_mean > 0
+    yg = y[expressed]
+    max_disp = max(10.0, n)
+
+    # rough moments estimate → means → gene-wise CR-MLE
+    mu0 = ((yg / s) @ x / x.sum(axis=0)) @ x.T * s
+    rough = np.clip((((yg - mu0) ** 2 - mu0) / np.maximum(mu0, 1e-12) ** 2).sum(axis=1) / (n - p),
+                    MIN_DISP, max_disp)
+    _, m, _ = _fit_means(yg, s, x, rough)
+    disp_gw = _grid_max(yg, m, x, max_disp)
+
+    trend = _fit_trend(base_mean[expressed], disp_gw)
+    disp_trend = trend(base_mean[expressed])
+    resid = np.log(disp_gw) - np.log(disp_trend)
+    sel = disp_gw > 100 * MIN_DISP
+    mad = np.median(np.abs(resid[sel] - np.median(resid[sel]))) * 1.4826
+    prior_var = max(mad ** 2 - float(polygamma(1, (n - p) / 2.0)), 0.25)
+    log_trend = np.log(disp_trend)
+
+    def prior(grid, rows):
+        return -((grid - log_trend[rows, None]) ** 2) / (2 * prior_var)
+
+    disp_map = _grid_max(yg, m, x, max_disp, penalty=prior)
+    outlier = np.log(disp_gw) > log_trend + 2 * np.sqrt(prior_var)
+    disp = np.where(outlier, disp_gw, disp_map)
+
+    beta, _, info = _fit_means(yg, s, x, disp)
+    return {"genes": counts.index[expressed], "all_genes": counts.index, "base_mean": base_mean,
+            "expressed": expressed, "levels": names, "beta": beta, "info": info,
+            "dispersion": disp, "size_factors": s}
+
+
+def wald(model: dict, numerator: str, denominator: str) -> pd.DataFrame:
+    """
+    DESeq2-style results table for ``numerator`` vs ``denominator``: a Wald
+    test of the contrast vector on the fitted coefficients. The design is one
+    indicator column per level, so each gene's coefficient covariance is
+    diagonal (``1 / info``) and any pair of levels is read off the same fit.
+    """
+    w = np.zeros(len(model["levels"]))
+    w[model["levels"].index(numerator)] = 1.0
+    w[model["levels"].index(denominator)] = -1.0
+    lfc = model["beta"] @ w
+    se = np.sqrt((w ** 2 / model["info"]).sum(axis=1))
+    stat = lfc / se
+    pval = 2.0 * ndtr(-np.abs(stat))
+
+    g = len(model["all_genes"])
+    full = {k: np.full(g, np.nan) for k in ("log2FoldChange", "lfcSE", "stat", "pvalue")}
+    ex = model["expressed"]
+    full["log2FoldChange"][ex] = lfc / np.log(2)
+    full["lfcSE"][ex] = se / np.log(2)
+    full["stat"][ex] = stat
+    full["pvalue"][ex] = pval
+    return pd.DataFrame({"gene": model["all_genes"], "baseMean": model["base_mean"], **full,
+                         "padj": _bh(full["pvalue"])})[RESULT_COLUMNS]
+
+
+# ── Contrasts, caching and parallelism ─────────────────────────────────────────
+def contrast_key(counts_path: Path, sheet_path: Path, c: Contrast) -> str:
+    blob = json.dumps([file_digest(counts_path), file_digest(sheet_path), asdict(c)], sort_keys=True)
+    return hashlib.sha256(blob.encode()).hexdigest()[:16]
+
+
+def cache_path(counts_path: Path, sheet_path: Path, c: Contrast, cache_dir: Path = CACHE_DIR) -> Path:
+    return cache_dir / f"{c.id}.{contrast_key(counts_path, sheet_path, c)}.tsv"
+
+
+def read_sheet(path: Path) -> pd.DataFrame:
+    """Sample sheet indexed by sample ID (CSV or TSV)."""
+    sheet = pd.read_csv(path, sep="," if Path(path).suffix == ".csv" else "\t", index_col=0)
+    sheet.index = sheet.index.astype(str)
+    return sheet
+
+
+def check_contrasts(sheet: pd.DataFrame, contrasts) -> None:
+    """Raise ``ContrastError`` listing every contrast whose factor or levels are not in ``sheet``."""
+    problems = []
+    for c in contrasts:
+        if c.factor not in sheet:
+            problems.append(f"{c.id}: the sample sheet has no column {c.factor!r}")
+            continue
+        levels = sorted(sheet[c.factor].dropna().astype(str).unique())
+        missing = [lv for lv in dict.fromkeys((c.numerator, c.denominator)) if lv not in levels]
+        if missing:
+            problems.append(f"{c.id}: {c.factor} has no level {', '.join(map(repr, missing))} "
+                            f"(levels: {', '.join(levels)})")
+        elif c.numerator == c.denominator:
+            problems.append(f"{c.id}: numerator and denominator are both {c.numerator!r}")
+    if problems:
+        raise ContrastError("invalid contrasts in content_config.yaml: " + "; ".join(problems))
+
+
+def _run_design(args) -> list[str]:
+    """Fit ``~ factor`` once and write the results of every contrast on it."""
+    counts_path, sheet_path, factor, todo = args
+    from showcase.data import read_matrix
+    model = fit(read_matrix(counts_path), read_sheet(sheet_path)[factor])
+    for c, out in todo:
+        res = wald(model, c.numerator, c.denominator)
+        out = Path(out)
+        out.parent.mkdir(parents=True, exist_ok=True)
+        tmp = out.with_suffix(f".{os.getpid()}.tmp")
+        res.to_csv(tmp, sep="\t", index=False)
+        tmp.replace(out)
+    return [out for _, out in todo]
+
+
+def run_contrasts(counts_path: Path, sheet_path: Path, contrasts, n_jobs: int | None = None,
+                  cache_dir: Path = CACHE_DIR) -> dict[str, Path]:
+    """
+    Compute every contrast not already cached; returns contrast id → result
+    file. Contrasts are checked against the sample sheet first, so a bad one
+    raises ``ContrastError`` before any work is dispatched.
+    """
+    check_contrasts(read_sheet(sheet_path), contrasts)
+    paths = {c.id: cache_path(counts_path, sheet_path, c, cache_dir) for c in contrasts}
+    designs: dict[str, list] = {}
+    for c in contrasts:
+        if not paths[c.id].exists():
+            designs.setdefault(c.factor, []).append((c, str(paths[c.id])))
+    tasks = [(str(counts_path), str(sheet_path), factor, todo) for factor, todo in designs.items()]
+    jobs = min(n_jobs or os.cpu_count() or 1, len(tasks))
+    if jobs > 1:
+        # spawn: safe to call from inside the (threaded) Streamlit server
+        with ProcessPoolExecutor(max_workers=jobs, mp_context=multiprocessing.get_context("spawn")) as pool:
+            list(pool.map(_run_design, tasks))
+    else:
+        for t in tasks:
+            _run_design(t)
+    return paths
+
+
+def load_result(path: Path) -> pd.DataFrame:
+    return pd.read_csv(path, sep="\t", dtype={"gene": str})
+
+
+def contrasts_from_config(cfg) -> list[Contrast]:
+    return [Contrast(**dict(c)) for c in cfg.get("contrasts") or ()]
+
+
+if __name__ == "__main__":
+    # python -m showcase.deseq [--jobs N] — compute and cache every configured contrast
+    import argparse
+    import time
+    from showcase.config import compile_config
+    from showcase.data import ROOT, data_path
+
+    ap = argparse.ArgumentParser(description="Differential expression for the configured contrasts")
+    ap.add_argument("--jobs", type=int)
+    args = ap.parse_args()
+    cfg = compile_config(ROOT / "content_config.yaml").cfg
+    counts_path, sheet_path = data_path(cfg, "count_matrix"), data_path(cfg, "sample_sheet")
+    if counts_path is None or sheet_path is None:
+        raise SystemExit("data.count_matrix and data.sample_sheet must both exist")
+    t0 = time.perf_counter()
+    for cid, path in run_contrasts(counts_path, sheet_path, contrasts_from_config(cfg), args.jobs).items():
+        print(f"{cid}: {path}")
+    print(f"done in {time.perf_counter() - t0:.1f} s")
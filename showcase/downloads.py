@@ -0,0 +1,277 @@
+"""
+Download center — supplementary tables written chunk by chunk to disk.
+
+An ``Export`` is a named table plus a generator of DataFrame chunks and a key
+over everything its content depends on. ``build`` streams the chunks into
+CSV, Parquet (row group per chunk) or a ZIP bundle of CSVs, so no table is
+ever held whole in memory — the genome-wide correlation table is produced
+one gene block at a time.
+
+Built files land in ``static/exports/`` under content-hash names
+(``correlation_hits.3f9a2c1d5e7b.parquet``) and are served by Streamlit's
+static file server (``server.enableStaticServing``), which answers Range
+requests and sends ETags; the URL itself changes whenever the bytes do, so
+clients and CDNs can cache it forever. ``manifest.json`` maps each
+export/format to the file built for its current key, so a file is only
+rebuilt when its inputs change. Each study other than the default one gets
+its own subfolder (and manifest).
+
+    python -m showcase.downloads          # pre-build every export the data allows
+"""
+
+import hashlib
+import importlib.util
+import io
+import json
+import threading
+import zipfile
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Iterable
+
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parent.parent
+EXPORT_DIR = ROOT / "static" / "exports"
+URL_PREFIX = "app/static/exports"
+CHUNK_ROWS = 200_000                # rows per chunk when reading or generating large tables
+PARQUET = importlib.util.find_spec("pyarrow") is not None
+FORMATS = ("csv", "parquet") if PARQUET else ("csv",)
+_ZIP_TIME = (1980, 1, 1, 0, 0, 0)   # fixed entry timestamps: same tables → same bytes → same hash
+
+_manifest_lock = threading.Lock()
+_build_locks: dict[str, threading.Lock] = {}
+
+
+@dataclass(frozen=True)
+class Export:
+    name: str                                       # file stem
+    label: str
+    key: str                                        # digest of the inputs
+    chunks: Callable[[], Iterable[pd.DataFrame]]
+    description: str = ""
+
+
+@dataclass(frozen=True)
+class Built:
+    file: str
+    sha256: str
+    bytes: int
+    rows: int
+    folder: str = ""                                # subfolder of EXPORT_DIR
+
+    @property
+    def path(self) -> Path:
+        return EXPORT_DIR / self.folder / self.file
+
+    @property
+    def url(self) -> str:
+        return "/".join(p for p in (URL_PREFIX, self.folder, self.file) if p)
+
+
+def _folder(out_dir: Path) -> str:
+    try:
+        rel = Path(out_dir).relative_to(EXPORT_DIR).as_posix()
+    except ValueError:                              # outside the served tree (CLI --out)
+        return ""
+    return "" if rel == "." else rel
+
+
+def export_key(*parts) -> str:
+    return hashlib.sha256(json.dumps(parts, sort_keys=True, default=str).encode()).hexdigest()[:16]
+
+
+# ── Chunk sources ──────────────────────────────────────────────────────────────
+def frame_chunks(df: pd.DataFrame, rows: int = CHUNK_ROWS) -> Iterable[pd.DataFrame]:
+    for start in range(0, len(df), rows):
+        yield df.iloc[start:start + rows]
+    if not len(df):
+        yield df
+
+
+def file_chunks(path: Path, rows: int = CHUNK_ROWS) -> Iterable[pd.DataFrame]:
+    """A TSV/CSV on disk, read ``rows`` at a time."""
+    path = Path(path)
+    yield from pd.read_csv(path, sep="," if path.suffix == ".csv" else "\t", chunksize=rows)
+
+
+# ── Writers ────────────────────────────────────────────────────────────────────
+def _write_csv(chunks: Iterable[pd.DataFrame], fh) -> int:
+    rows, header = 0, True
+    for df in chunks:
+        df.to_csv(fh, index=False, header=header)
+        header = False
+        rows += len(df)
+    return rows
+
+
+def _write_parquet(chunks: Iterable[pd.DataFrame], path: Path) -> int:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    writer, rows = None, 0
+    try:
+        for df in chunks:
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(path, table.schema, compression="zstd")
+            writer.write_table(table.cast(writer.schema))
+            rows += len(df)
+    finally:
+        if writer is not None:
+            writer.close()
+    if writer is None:
+        pq.write_table(pa.table({}), path)
+    return rows
+
+
+def _write_zip(parts: list[Export], path: Path) -> int:
+    rows = 0
+    with zipfile.ZipFile(path, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        for e in parts:
+            info = zipfile.ZipInfo(f"{e.name}.csv", date_time=_ZIP_TIME)
+            info.compress_type = zipfile.ZIP_DEFLATED
+            with zf.open(info, "w", force_zip64=True) as raw:
+                with io.TextIOWrapper(raw, encoding="utf-8", newline="") as fh:
+                    rows += _write_csv(e.chunks(), fh)
+    return rows
+
+
+def _sha256(path: Path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+# ── Manifest ───────────────────────────────────────────────────────────────────
+def _read_manifest(out_dir: Path) -> dict:
+    p = out_dir / "manifest.json"
+    return json.loads(p.read_text()) if p.exists() else {}
+
+
+def lookup(name: str, fmt: str, key: str, out_dir: Path = EXPORT_DIR) -> Built | None:
+    """The file already built for ``key``, if it is still on disk."""
+    entry = _read_manifest(out_dir).get(f"{name}.{fmt}")
+    if entry and entry["key"] == key and (out_dir / entry["file"]).exists():
+        return Built(entry["file"], entry["sha256"], entry["bytes"], entry["rows"], _folder(out_dir))
+    return None
+
+
+def _record(out_dir: Path, slot: str, key: str, built: Built) -> None:
+    with _manifest_lock:
+        manifest = _read_manifest(out_dir)
+        old = manifest.get(slot)
+        manifest[slot] = {"key": key, "file": built.file, "sha256": built.sha256,
+                          "bytes": built.bytes, "rows": built.rows}
+        tmp = out_dir / "manifest.json.tmp"
+        tmp.write_text(json.dumps(manifest, indent=2))
+        tmp.replace(out_dir / "manifest.json")
+        if old and old["file"] != built.file and all(e.get("file") != old["file"] for e in manifest.values()):
+            (out_dir / old["file"]).unlink(missing_ok=True)
+
+
+# ── Build ──────────────────────────────────────────────────────────────────────
+def _build(name: str, fmt: str, key: str, write: Callable[[Path], int], out_dir: Path) -> Built:
+    slot = f"{name}.{fmt}"
+    with _manifest_lock:
+        lock = _build_locks.setdefault(slot, threading.Lock())
+    with lock:                          # concurrent sessions asking for the same file wait for one build
+        hit = lookup(name, fmt, key, out_dir)
+        if hit:
+            return hit
+        out_dir.mkdir(parents=True, exist_ok=True)
+        tmp = out_dir / f".{slot}.{threading.get_ident()}.tmp"
+        try:
+            rows = write(tmp)
+            sha = _sha256(tmp)
+            final = out_dir / f"{name}.{sha[:12]}.{fmt}"
+            tmp.replace(final)
+        finally:
+            tmp.unlink(missing_ok=True)
+        built = Built(final.name, sha, final.stat().st_size, rows, _folder(out_dir))
+        _record(out_dir, slot, key, built)
+        return built
+
+
+def build(export: Export, fmt: str, out_dir: Path = EXPORT_DIR) -> Built:
+    """Stream ``export`` to disk as ``fmt`` (``csv`` / ``parquet``), reusing a build with the same key."""
+    if fmt == "csv":
+        def write(path):
+            with open(path, "w", encoding="utf-8", newline="") as fh:
+                return _write_csv(export.chunks(), fh)
+    elif fmt == "parquet":
+        def write(path):
+            return _write_parquet(export.chunks(), path)
+    else:
+        raise ValueError(f"unknown format {fmt!r}; expected one of {FORMATS}")
+    return _build(export.name, fmt, export.key, write, out_dir)
+
+
+def bundle_key(parts: list[Export]) -> str:
+    return export_key(*[(e.name, e.key) for e in parts])
+
+
+def build_bundle(name: str, parts: list[Export], out_dir: Path = EXPORT_DIR) -> Built:
+    """One ZIP with a CSV per export, each streamed straight into its archive entry."""
+    return _build(name, "zip", bundle_key(parts), lambda path: _write_zip(parts, path), out_dir)
+
+
+def size_label(n: int) -> str:
+    for unit in ("B", "KB", "MB", "GB"):
+        if n < 1024 or unit == "GB":
+            return f"{n:.0f} {unit}" if unit == "B" else f"{n:.1f} {unit}"
+        n /= 1024
+
+
+# ── Catalogue ──────────────────────────────────────────────────────────────────
+def standard_exports(snap, hits: Callable[[], pd.DataFrame] | None = None) -> list[Export]:
+    """
+    Exports computable from the config and data files alone (the app adds the
+    candidate list). ``hits`` supplies the top-k correlation table when the
+    caller already has it cached.
+    """
+    from showcase import correlation, modules
+    from showcase.data import data_path, read_matrix
+    from showcase.util import file_digest
+
+    cfg = snap.cfg
+    out = [Export("evidence_map", "Evidence map", snap.digest, lambda: frame_chunks(snap.evidence_df),
+                  "Findings × evidence types × output artifacts")]
+    expr_path, met_path = data_path(cfg, "expression_matrix"), data_path(cfg, "metabolite_table")
+    if expr_path and met_path:
+        version = (file_digest(expr_path), file_digest(met_path))
+        load_hits = hits or (lambda: correlation.correlate(read_matrix(expr_path), read_matrix(met_path)).hits)
+        out.append(Export("correlation_hits", "Correlation hits", export_key("hits", 50, *version),
+                          lambda: frame_chunks(load_hits()), "Top 50 genes per metabolite, with BH q-values"))
+        out.append(Export("correlation_all", "Genome-wide correlation", export_key("all", *version),
+                          lambda: correlation.iter_correlations(read_matrix(expr_path), read_matrix(met_path)),
+                          "Every gene × metabolite r and p, generated one gene block at a time"))
+    if expr_path:
+        mod_dir = modules.result_dir(expr_path, met_path, modules.params_from_config(cfg))
+        if (mod_dir / "meta.json").exists():
+            for stem, label in (("assignments", "Module assignments"), ("trait_cor", "Module–trait correlations")):
+                out.append(Export(f"module_{stem}", label, export_key(mod_dir.name, stem),
+                                  lambda p=mod_dir / f"{stem}.tsv": file_chunks(p), "Co-expression modules"))
+    return out
+
+
+BUNDLE = "supplementary_tables"
+BUNDLE_SKIP = ("correlation_all",)      # too large to be worth zipping with the small tables
+
+
+if __name__ == "__main__":
+    # python -m showcase.downloads — pre-build the exports that need no app state
+    import time
+
+    from showcase.config import compile_config
+
+    exports = standard_exports(compile_config(ROOT / "content_config.yaml"))
+    for e in exports:
+        for fmt in FORMATS:
+            t0 = time.perf_counter()
+            b = build(e, fmt)
+            print(f"{b.file:<48} {size_label(b.bytes):>10} {b.rows:>12,} rows  {time.perf_counter() - t0:6.1f} s")
+    b = build_bundle(BUNDLE, [e for e in exports if e.name not in BUNDLE_SKIP])
+    print(f"{b.file:<48} {size_label(b.bytes):>10} {b.rows:>12,} rows")
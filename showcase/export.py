@@ -0,0 +1,400 @@
+"""
+Static HTML export of the content pages (Overview … Resources).
+
+Each page is rendered headlessly through ``AppTest`` — the same page
+functions the live app runs — and its element tree is written out as plain
+HTML with the app's shared CSS. Images are the optimized derivatives the app
+serves; small ones are inlined as data URIs, the rest are written under
+``assets/`` with content-hash file names (``fig1_genome.3f9a2c1d.webp``) so
+they can be cached forever by a CDN.
+
+Re-export is incremental: ``.export-manifest.json`` stores, per page, a key
+over the page function's source and that of the app helpers it calls, the
+``showcase`` modules those use, the config sections and data files it reads,
+the derived artifacts it shows (their files and precompute ledger entries),
+the assets it references and the shared CSS. Only pages whose key changed are
+re-rendered (and AppTest is not started at all when none did). The export
+renders the default study of ``catalog.yaml``.
+
+    python -m showcase.export                 # → site/
+    python -m showcase.export --out public --force
+"""
+
+import base64
+import hashlib
+import html
+import json
+import re
+import textwrap
+from pathlib import Path
+
+import yaml
+
+from showcase import catalog
+from showcase.bench import media_store, walk_tree
+from showcase.util import file_digest
+
+ROOT = Path(__file__).resolve().parent.parent
+APP = ROOT / "app.py"
+OUT_DIR = ROOT / "site"
+MANIFEST = ".export-manifest.json"
+INLINE_BYTES = 8 * 1024             # images below this are embedded as data URIs
+
+# page → (page function, config sections, data keys, precompute artifacts) it
+# reads; every page also shows the sidebar (``study``).
+PAGES = {
+    "Overview":     ("page_overview", ("study", "deliverables", "glossary", "figures"), (), ()),
+    "Study Design": ("page_study_design", (), (), ()),
+    "Methods":      ("page_methods", ("methods",), (), ()),
+    "Findings":     ("page_findings", ("findings", "data", "contrasts", "modules"),
+                     ("expression_matrix", "metabolite_table", "feature_table", "ms2_spectra", "pmf_library",
+                      "feature_metadata"), ("modules",)),
+    "Pipeline":     ("page_pipeline", (), (), ()),
+    "Impact":       ("page_impact", ("impact",), (), ()),
+    "Resources":    ("page_resources", ("resources",), (), ()),
+}
+
+_SITE_CSS = """
+body { margin: 0; display: flex; font-family: 'Inter', 'Segoe UI', sans-serif; color: #1f2937; }
+nav.sidebar { width: 15rem; min-height: 100vh; background: #f0f2f6; padding: 1.5rem 1rem; box-sizing: border-box; }
+nav.sidebar ul { list-style: none; padding: 0; }
+nav.sidebar li { margin: 0.3rem 0; }
+nav.sidebar a { color: #1f2937; text-decoration: none; }
+nav.sidebar a.active { font-weight: 700; color: #1a56a0; }
+main { flex: 1; max-width: 72rem; padding: 2rem 3rem; }
+hr { border: none; border-top: 1px solid #e2e8f0; margin: 1.5rem 0; }
+.row { display: flex; gap: 1.5rem; }
+.row > .col { flex: 1 1 0; min-width: 0; }
+.info { background: #e8f1fb; border-radius: 6px; padding: 0.9rem 1.1rem; color: #1e3a5f; }
+table.frame { border-collapse: collapse; width: 100%; font-size: 0.85rem; margin: 0.5rem 0 1rem; }
+table.frame th, table.frame td { border: 1px solid #e2e8f0; padding: 0.35rem 0.6rem; text-align: left; vertical-align: top; }
+table.frame th { background: #f8fafc; }
+pre { background: #f8fafc; border: 1px solid #e2e8f0; border-radius: 6px; padding: 0.8rem; overflow-x: auto; font-size: 0.82rem; }
+details { border: 1px solid #e2e8f0; border-radius: 6px; padding: 0.4rem 0.8rem; margin: 0.5rem 0; }
+details > summary { cursor: pointer; font-weight: 600; }
+figure { margin: 0 0 1rem; }
+figure img { width: 100%; height: auto; }
+figcaption, .caption { color: #6b7280; font-size: 0.85rem; }
+.tab { border-top: 2px solid #e2e8f0; margin-top: 1rem; }
+.metric .label { color: #6b7280; font-size: 0.85rem; }
+.metric .value { font-size: 1.8rem; font-weight: 600; }
+"""
+
+
+def slug(page: str) -> str:
+    return "index" if page == "Overview" else re.sub(r"[^a-z0-9]+", "-", page.lower()).strip("-")
+
+
+def _sha(data: bytes | str, n: int = 8) -> str:
+    return hashlib.sha256(data.encode() if isinstance(data, str) else data).hexdigest()[:n]
+
+
+# ── Dependency keys ────────────────────────────────────────────────────────────
+def page_source(app_text: str, fn: str) -> str:
+    """Source of ``def fn`` up to the next top-level definition or section banner."""
+    m = re.search(rf"^def {fn}\(.*?(?=^def |^# ═|^@|\Z)", app_text, re.S | re.M)
+    return m.group(0) if m else ""
+
+
+def helper_sources(app_text: str, src: str) -> dict[str, str]:
+    """Source of every top-level app function ``src`` calls, transitively."""
+    defined = set(re.findall(r"^def (\w+)\(", app_text, re.M))
+    found: dict[str, str] = {}
+    stack = [src]
+    while stack:
+        for name in set(re.findall(r"\b(\w+)\(", stack.pop())) & defined - found.keys():
+            found[name] = page_source(app_text, name)
+            stack.append(found[name])
+    return found
+
+
+def module_digests(*sources: str) -> dict[str, str]:
+    """Digest of each ``showcase`` module referenced as ``name.attr`` in ``sources``."""
+    names = set(re.findall(r"\b([a-z_]+)\.[A-Za-z_]", "\n".join(sources)))
+    return {n: file_digest(ROOT / "showcase" / f"{n}.py") for n in sorted(names)
+            if (ROOT / "showcase" / f"{n}.py").exists()}
+
+
+def _derived_files(cfg, artifact: str) -> list[Path]:
+    """Files a page reads for ``artifact`` whether or not the scheduler built them."""
+    from showcase import data, modules
+    if artifact == "modules" and data.data_path(cfg, "expression_matrix"):
+        out = modules.result_dir(data.data_path(cfg, "expression_matrix"), data.data_path(cfg, "metabolite_table"),
+                                 modules.params_from_config(cfg))
+        return [out / "meta.json"]
+    return []
+
+
+def derived_state(study: catalog.Study, cfg, artifacts) -> dict:
+    """Per artifact: its ledger entry (key, outcome, building) and the digests of its result files."""
+    if not artifacts:
+        return {}
+    from showcase import precompute
+    ledger = precompute.read_ledger(study.id)
+    out = {}
+    for a in artifacts:
+        entry = ledger.get(a, {})
+        out[a] = {"key": entry.get("key"), "status": entry.get("status"),
+                  "building": precompute.building(study.id, a, ledger) is not None,
+                  "files": {str(p): file_digest(p) if p.exists() else None for p in _derived_files(cfg, a)}}
+    return out
+
+
+def app_css(app_text: str) -> str:
+    m = re.search(r"<style>(.*?)</style>", app_text, re.S)
+    return _SITE_CSS + (m.group(1) if m else "")
+
+
+def page_key(page: str, app_text: str, cfg: dict, css_hash: str, study: catalog.Study) -> str:
+    from showcase.data import data_path
+    fn, sections, data_keys, artifacts = PAGES[page]
+    src = page_source(app_text, fn)
+    helpers = helper_sources(app_text, src)
+    helpers.pop(fn, None)
+    content = {k: cfg.get(k) for k in ("study",) + sections}
+    assets = sorted(set(re.findall(r"assets/[\w.\-]+", src + json.dumps(content, default=str))))
+    parts = {
+        "source": src,
+        "helpers": helpers,
+        "modules": module_digests(src, *helpers.values()),
+        "config_path": str(study.config),
+        "config": content,
+        "assets": {a: file_digest(ROOT / a) for a in assets if (ROOT / a).exists()},
+        "data": {k: file_digest(data_path(cfg, k)) for k in data_keys if data_path(cfg, k)},
+        "derived": derived_state(study, cfg, artifacts),
+        "css": css_hash,
+    }
+    return _sha(json.dumps(parts, sort_keys=True, default=str), 16)
+
+
+# ── Markdown ───────────────────────────────────────────────────────────────────
+_INLINE = [
+    (re.compile(r"`([^`]+)`"), r"<code>\1</code>"),
+    (re.compile(r"\*\*(.+?)\*\*"), r"<strong>\1</strong>"),
+    (re.compile(r"(?<![\w*])\*(?!\s)(.+?)(?<!\s)\*(?![\w*])"), r"<em>\1</em>"),
+    (re.compile(r"\[([^\]]+)\]\(([^)\s]+)\)"), r'<a href="\2">\1</a>'),
+]
+
+
+def _inline(text: str) -> str:
+    for pat, rep in _INLINE:
+        text = pat.sub(rep, text)
+    return text
+
+
+def markdown(text: str) -> str:
+    """The Markdown subset the pages use: headings, lists, emphasis, code, links; HTML passes through."""
+    text = textwrap.dedent(text).strip()
+    if text.startswith("<"):
+        return text
+    out, para, lst = [], [], None
+
+    def flush():
+        nonlocal lst
+        if para:
+            out.append(f"<p>{_inline(' '.join(para))}</p>")
+            para.clear()
+        if lst:
+            out.append(f"</{lst}>")
+            lst = None
+
+    for line in text.splitlines():
+        s = line.strip()
+        h = re.match(r"(#{1,6})\s+(.*)", s)
+        li = re.match(r"(?:[-*]|(\d+)\.)\s+(.*)", s)
+        if not s:
+            flush()
+        elif h:
+            flush()
+            out.append(f"<h{len(h.group(1))}>{_inline(h.group(2))}</h{len(h.group(1))}>")
+        elif li:
+            kind = "ol" if li.group(1) else "ul"
+            if para or lst != kind:
+                flush()
+                out.append(f"<{kind}>")
+                lst = kind
+            out.append(f"<li>{_inline(li.group(2))}</li>")
+        elif s == "---":
+            flush()
+            out.append("<hr>")
+        else:
+            if lst:
+                flush()
+            para.append(s)
+    flush()
+    return "\n".join(out)
+
+
+# ── Element tree → HTML ────────────────────────────────────────────────────────
+class _Assets:
+    """Fingerprinted (or inlined) image assets for one export run."""
+
+    def __init__(self, out_dir: Path, media: dict):
+        self.out_dir, self.media = out_dir, media
+        self.written: set[str] = set()
+
+    def url(self, media_url: str, name_hint: str = "image") -> str:
+        file_id = Path(media_url).stem
+        blob, mimetype = self.media.get(file_id, (None, None))
+        if blob is None:
+            return media_url
+        if len(blob) <= INLINE_BYTES:
+            return f"data:{mimetype};base64,{base64.b64encode(blob).decode()}"
+        ext = Path(media_url).suffix or ".bin"
+        name = f"{re.sub(r'[^A-Za-z0-9_-]+', '_', name_hint)[:40]}.{_sha(blob)}{ext}"
+        if name not in self.written:
+            (self.out_dir / "assets").mkdir(parents=True, exist_ok=True)
+            target = self.out_dir / "assets" / name
+            if not target.exists():
+                target.write_bytes(blob)
+            self.written.add(name)
+        return f"assets/{name}"
+
+
+def _render(node, assets: _Assets) -> str:
+    kind = type(node).__name__
+    children = getattr(node, "children", None) or {}
+    inner = "\n".join(_render(c, assets) for c in (children.values() if isinstance(children, dict) else children))
+    if kind == "Title":
+        return f"<h1>{html.escape(node.value)}</h1>"
+    if kind == "Markdown":
+        if node.value.lstrip().startswith("<style>"):
+            return ""                                   # shared CSS goes to the stylesheet
+        return markdown(node.value)
+    if kind == "Caption":
+        return f'<p class="caption">{_inline(node.value)}</p>'
+    if kind == "Divider":
+        return "<hr>"
+    if kind in ("Info", "Success", "Warning", "Error"):
+        cls = "info" if kind == "Info" else f"info {kind.lower()}"
+        return f'<div class="{cls}">{_inline(html.escape(node.value))}</div>'
+    if kind == "Code":
+        return f"<pre><code>{html.escape(node.value)}</code></pre>"
+    if kind == "Dataframe":
+        return node.value.to_html(index=False, classes="frame", border=0, na_rep="")
+    if kind == "Metric":
+        return (f'<div class="metric"><div class="label">{html.escape(node.label)}</div>'
+                f'<div class="value">{html.escape(str(node.value))}</div></div>')
+    if kind == "Image":
+        figs = []
+        for img in node.proto.imgs:
+            hint = img.caption.split("—")[-1].strip() or "image"
+            src = assets.url(img.url, hint)
+            cap = f"<figcaption>{html.escape(img.caption)}</figcaption>" if img.caption else ""
+            figs.append(f'<figure><img src="{src}" alt="{html.escape(img.caption)}" loading="lazy">{cap}</figure>')
+        return "\n".join(figs)
+    if kind == "Expander":
+        return f"<details open><summary>{_inline(node.label)}</summary>\n{inner}\n</details>"
+    if kind == "Tab":
+        return f'<section class="tab"><h3>{html.escape(node.label)}</h3>\n{inner}\n</section>'
+    if kind == "Column":
+        return f'<div class="col">{inner}</div>'
+    if kind == "Block" and children and all(type(c).__name__ == "Column" for c in children.values()):
+        return f'<div class="row">{inner}</div>'
+    return inner                                        # containers; widgets are dropped
+
+
+def page_html(page: str, body: str, css_href: str, short_title: str) -> str:
+    nav = "\n".join(f'<li><a href="{slug(p)}.html"{" class=active" if p == page else ""}>{html.escape(p)}</a></li>'
+                    for p in PAGES)
+    return f"""<!doctype html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<meta name="viewport" content="width=device-width, initial-scale=1">
+<title>{html.escape(page)} · PMF Biosynthesis | Multi-Omics Showcase</title>
+<link rel="stylesheet" href="{css_href}">
+</head>
+<body>
+<nav class="sidebar">
+<h3>🍊 Multi-Omics Showcase</h3>
+<p><em>{html.escape(short_title)}</em></p>
+<ul>
+{nav}
+</ul>
+</nav>
+<main>
+{body}
+</main>
+</body>
+</html>
+"""
+
+
+# ── Export ─────────────────────────────────────────────────────────────────────
+def export(out_dir: Path = OUT_DIR, pages=None, force: bool = False, timeout: float = 300) -> dict:
+    """Write the static site; returns {page: "built" | "unchanged"}."""
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    app_text = APP.read_text(encoding="utf-8")
+    study = catalog.load()[0]                           # what AppTest renders without ?study=
+    cfg = yaml.safe_load(study.config.read_text(encoding="utf-8"))
+
+    css = app_css(app_text)
+    css_name = f"site.{_sha(css)}.css"
+    (out_dir / "assets").mkdir(exist_ok=True)
+    if not (out_dir / "assets" / css_name).exists():
+        (out_dir / "assets" / css_name).write_text(css, encoding="utf-8")
+
+    manifest_path = out_dir / MANIFEST
+    manifest = json.loads(manifest_path.read_text()) if manifest_path.exists() else {}
+    keys = {p: page_key(p, app_text, cfg, css_name, study) for p in (pages or PAGES)}
+    todo = [p for p, k in keys.items()
+            if force or manifest.get(p, {}).get("key") != k or not (out_dir / f"{slug(p)}.html").exists()]
+    status = {p: "unchanged" for p in keys}
+    if todo:
+        from streamlit.testing.v1 import AppTest
+
+        with media_store() as media:
+            at = AppTest.from_file(str(APP), default_timeout=timeout)
+            at.query_params["export"] = "static"        # pages drop server-only sections
+            at.run()
+            assets = _Assets(out_dir, media)
+            for p in todo:
+                at.sidebar.radio[0].set_value(p).run()
+                if at.exception:
+                    raise RuntimeError(f"{p}: {at.exception[0].value}")
+                body = _render(at.main, assets)
+                target = out_dir / f"{slug(p)}.html"
+                tmp = target.with_suffix(".tmp")
+                tmp.write_text(page_html(p, body, f"assets/{css_name}", cfg["study"]["short_title"]),
+                               encoding="utf-8")
+                tmp.replace(target)
+                manifest[p] = {"key": keys[p], "file": target.name,
+                               "assets": sorted(assets.written)}
+                assets.written = set()
+                status[p] = "built"
+    manifest["_css"] = css_name
+    _prune_assets(out_dir, manifest)
+    manifest_path.write_text(json.dumps(manifest, indent=2))
+    return status
+
+
+def _prune_assets(out_dir: Path, manifest: dict) -> None:
+    """Drop fingerprinted files no page references any more."""
+    live = {manifest.get("_css")}
+    for entry in manifest.values():
+        if isinstance(entry, dict):
+            live.update(entry.get("assets", ()))
+    for f in (out_dir / "assets").glob("*"):
+        if f.name not in live:
+            f.unlink()
+
+
+if __name__ == "__main__":
+    import argparse
+    import logging
+    import time
+
+    ap = argparse.ArgumentParser(description="Export the content pages as a static site.")
+    ap.add_argument("--out", type=Path, default=OUT_DIR)
+    ap.add_argument("--pages", nargs="*", choices=list(PAGES))
+    ap.add_argument("--force", action="store_true", help="rebuild every page")
+    args = ap.parse_args()
+
+    logging.disable(logging.WARNING)
+    t0 = time.perf_counter()
+    status = export(args.out, args.pages, args.force)
+    for p, s in status.items():
+        print(f"{s:<9} {slug(p)}.html  ({p})")
+    print(f"→ {args.out} ({time.perf_counter() - t0:.1f} s)")
@@ -0,0 +1,289 @@
+"""
+Indexed random access to the genome FASTA and GFF3 annotation.
+
+* FASTA: a samtools-compatible ``.fai`` (name, length, offset, line bases, line
+  bytes) is written next to the file; sequence is sliced straight out of an
+  ``mmap`` of the FASTA, so a fetch only touches the pages it needs.
+* GFF3: features are parsed once into per-sequence arrays sorted by start and
+  saved as ``<gff>.idx.npz``. Overlap queries binary-search the start array
+  and a running maximum of end coordinates, so they return exact overlaps
+  without scanning the chromosome.
+
+Coordinates follow GFF3: 1-based, inclusive. Both indexes are rebuilt when
+the source file's size or mtime no longer matches.
+"""
+
+import mmap
+import re
+from dataclasses import dataclass
+from pathlib import Path
+from urllib.parse import unquote
+
+import numpy as np
+import pandas as pd
+
+_COMPLEMENT = str.maketrans("ACGTRYMKBDHVNacgtrymkbdhvn", "TGCAYRKMVHDBNtgcayrkmvhdbn")
+_REGION = re.compile(r"^\s*([^:\s]+)(?::\s*([\d.,_]+)\s*([kKmM][bB]?)?\s*[-–]\s*([\d.,_]+)\s*([kKmM][bB]?)?)?\s*$")
+
+
+def revcomp(seq: str) -> str:
+    return seq.translate(_COMPLEMENT)[::-1]
+
+
+# ── FASTA ──────────────────────────────────────────────────────────────────────
+@dataclass(frozen=True)
+class FaiEntry:
+    length: int
+    offset: int
+    line_bases: int
+    line_bytes: int
+
+
+def build_fai(fasta: Path) -> Path:
+    """Write ``<fasta>.fai`` in samtools format (uniform line length per record)."""
+    fai = fasta.with_name(fasta.name + ".fai")
+    entries, name, length, offset, lb, lw = [], None, 0, 0, 0, 0
+    pos = 0
+    with open(fasta, "rb") as f:
+        for line in f:
+            if line.startswith(b">"):
+                if name is not None:
+                    entries.append((name, length, offset, lb, lw))
+                name = line[1:].split()[0].decode()
+                length, offset, lb, lw = 0, pos + len(line), 0, 0
+            elif name is not None:
+                bases = len(line.rstrip(b"\r\n"))
+                if lb == 0:
+                    lb, lw = bases, len(line)
+                length += bases
+            pos += len(line)
+    if name is not None:
+        entries.append((name, length, offset, lb, lw))
+    tmp = fai.with_suffix(".fai.tmp")
+    tmp.write_text("".join(f"{n}\t{ln}\t{o}\t{b}\t{w}\n" for n, ln, o, b, w in entries))
+    tmp.replace(fai)
+    return fai
+
+
+class Fasta:
+    """Random-access FASTA over an mmap, indexed by ``.fai``."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        fai = self.path.with_name(self.path.name + ".fai")
+        if not fai.exists() or fai.stat().st_mtime < self.path.stat().st_mtime:
+            build_fai(self.path)
+        self.index: dict[str, FaiEntry] = {}
+        for line in fai.read_text().splitlines():
+            n, ln, o, b, w = line.split("\t")[:5]
+            self.index[n] = FaiEntry(int(ln), int(o), int(b), int(w))
+        self._fh = open(self.path, "rb")
+        self._mm = mmap.mmap(self._fh.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def lengths(self) -> pd.DataFrame:
+        return pd.DataFrame({"seqid": list(self.index), "length": [e.length for e in self.index.values()]})
+
+    def fetch(self, seqid: str, start: int = 1, end: int | None = None) -> str:
+        """Bases ``start..end`` (1-based, inclusive) of ``seqid``."""
+        e = self.index[seqid]
+        end = e.length if end is None else min(end, e.length)
+        start = max(start, 1)
+        if end < start:
+            return ""
+        s0, s1 = start - 1, end                          # 0-based half-open
+        b0 = e.offset + (s0 // e.line_bases) * e.line_bytes + s0 % e.line_bases
+        b1 = e.offset + (s1 // e.line_bases) * e.line_bytes + s1 % e.line_bases
+        return self._mm[b0:b1].decode("ascii").replace("\n", "").replace("\r", "")
+
+
+# ── GFF3 ───────────────────────────────────────────────────────────────────────
+_FIELDS = ("seqid", "type", "id", "name", "parent", "strand")
+
+
+def _attrs(col9: str) -> dict:
+    out = {}
+    for kv in col9.strip().split(";"):
+        if "=" in kv:
+            k, v = kv.split("=", 1)
+            out[k.strip()] = unquote(v.strip())
+    return out
+
+
+def build_gff_index(gff: Path) -> Path:
+    """Parse ``gff`` once and save sorted feature arrays to ``<gff>.idx.npz``."""
+    cols = {k: [] for k in _FIELDS + ("start", "end", "phase")}
+    with open(gff, encoding="utf-8") as f:
+        for line in f:
+            if line.startswith("##FASTA"):
+                break
+            if not line.strip() or line.startswith("#"):
+                continue
+            p = line.rstrip("\n").split("\t")
+            if len(p) < 9:
+                continue
+            a = _attrs(p[8])
+            cols["seqid"].append(p[0])
+            cols["type"].append(p[2])
+            cols["start"].append(int(p[3]))
+            cols["end"].append(int(p[4]))
+            cols["strand"].append(p[6])
+            cols["phase"].append(-1 if p[7] == "." else int(p[7]))
+            cols["id"].append(a.get("ID", ""))
+            cols["name"].append(a.get("Name", ""))
+            cols["parent"].append(a.get("Parent", ""))
+    arrays = {k: np.array(v, dtype=np.int64 if k in ("start", "end", "phase") else str)
+              for k, v in cols.items()}
+    order = np.lexsort((arrays["start"], arrays["seqid"]))
+    arrays = {k: v[order] for k, v in arrays.items()}
+    st = gff.stat()
+    out = gff.with_name(gff.name + ".idx.npz")
+    tmp = gff.with_name(gff.name + ".idx.tmp.npz")
+    np.savez(tmp, source=np.array([st.st_size, st.st_mtime_ns], dtype=np.int64), **arrays)
+    tmp.replace(out)
+    return out
+
+
+class Annotation:
+    """Interval and ID lookups over an indexed GFF3."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        idx = self.path.with_name(self.path.name + ".idx.npz")
+        st = self.path.stat()
+        if not idx.exists() or list(np.load(idx)["source"]) != [st.st_size, st.st_mtime_ns]:
+            build_gff_index(self.path)
+        z = np.load(idx)
+        self.cols = {k: z[k] for k in _FIELDS + ("start", "end", "phase")}
+        seqids = self.cols["seqid"]
+        bounds = np.flatnonzero(np.r_[True, seqids[1:] != seqids[:-1], True]) if len(seqids) else []
+        # per-sequence slice + running max of end for the overlap search
+        self._span = {str(seqids[a]): (a, b) for a, b in zip(bounds[:-1], bounds[1:])}
+        self._max_end = np.empty_like(self.cols["end"])
+        for a, b in self._span.values():
+            self._max_end[a:b] = np.maximum.accumulate(self.cols["end"][a:b])
+        # A feature may span several lines sharing one ID (e.g. a CDS split over exons);
+        # an ID maps to its first line, ``segments`` returns them all.
+        self._segments: dict[str, list[int]] = {}
+        for i, v in enumerate(self.cols["id"]):
+            if v:
+                self._segments.setdefault(v, []).append(i)
+        self._by_id = {v: rows[0] for v, rows in self._segments.items()}
+        # Names are often shared by a gene and its transcripts: the gene wins, else the first line
+        self._by_name: dict[str, int] = {}
+        for i, v in enumerate(self.cols["name"]):
+            if v and (v not in self._by_name or (self.cols["type"][i] == "gene"
+                                                 and self.cols["type"][self._by_name[v]] != "gene")):
+                self._by_name[v] = i
+        self._children: dict[str, list[int]] = {}
+        for i, par in enumerate(self.cols["parent"]):
+            for p in par.split(",") if par else ():
+                self._children.setdefault(p, []).append(i)
+
+    def __len__(self) -> int:
+        return len(self.cols["start"])
+
+    def _frame(self, rows) -> pd.DataFrame:
+        rows = np.asarray(rows, dtype=np.int64)
+        return pd.DataFrame({k: self.cols[k][rows] for k in ("seqid", "start", "end", "strand", "type", "id", "name", "parent")})
+
+    def region(self, seqid: str, start: int, end: int, types=None) -> pd.DataFrame:
+        """Features overlapping ``seqid:start-end``."""
+        if seqid not in self._span:
+            return self._frame([])
+        a, b = self._span[seqid]
+        lo = a + int(np.searchsorted(self._max_end[a:b], start, side="left"))
+        hi = a + int(np.searchsorted(self.cols["start"][a:b], end, side="right"))
+        rows = np.arange(lo, hi)
+        rows = rows[self.cols["end"][rows] >= start]
+        if types:
+            rows = rows[np.isin(self.cols["type"][rows], list(types))]
+        return self._frame(rows)
+
+    def find(self, key: str) -> int | None:
+        """Row of the feature whose ID or Name is ``key``."""
+        return self._by_id.get(key, self._by_name.get(key))
+
+    def segments(self, row: int) -> list[int]:
+        """Every line of the feature on ``row`` (just ``row`` unless its ID recurs)."""
+        return self._segments.get(self.cols["id"][row], [row])
+
+    def children(self, row: int, ftype: str | None = None) -> list[int]:
+        kids = self._children.get(self.cols["id"][row], [])
+        return [k for k in kids if ftype is None or self.cols["type"][k] == ftype]
+
+    def feature(self, row: int) -> pd.Series:
+        """The feature on ``row``, spanning all of its segments."""
+        feat = self._frame([row]).iloc[0]
+        segs = self.segments(row)
+        if len(segs) > 1:
+            feat["start"], feat["end"] = int(self.cols["start"][segs].min()), int(self.cols["end"][segs].max())
+        return feat
+
+
+def parse_region(text: str) -> tuple[str, int | None, int | None]:
+    """``chr3:10-12Mb`` / ``chr3:10,000,000-12,000,000`` / ``chr3`` → (seqid, start, end)."""
+    m = _REGION.match(text)
+    if not m:
+        raise ValueError(f"cannot parse region {text!r}")
+    seqid, a, unit_a, b, unit_b = m.groups()
+    if a is None:
+        return seqid, None, None
+    unit = (unit_b or unit_a or "")[:1].lower()
+    scale = {"k": 1_000, "m": 1_000_000}.get(unit, 1)
+    start = float(a.replace(",", "").replace("_", "")) * scale
+    end = float(b.replace(",", "").replace("_", "")) * scale
+    return seqid, max(1, int(start)), int(end)
+
+
+# ── Combined lookups ───────────────────────────────────────────────────────────
+class Genome:
+    def __init__(self, fasta: Path, gff: Path):
+        self.fasta = Fasta(fasta)
+        self.annotation = Annotation(gff)
+
+    def spliced(self, key: str, ftype: str = "CDS") -> tuple[pd.Series, str]:
+        """
+        Feature ``key`` plus its sequence. For a gene, the first transcript's
+        ``ftype`` (CDS or exon) segments are joined, as are the lines of a
+        multi-line ``ftype`` feature itself; ``ftype="gene"`` returns the
+        genomic span. Minus-strand results are reverse-complemented.
+        """
+        ann = self.annotation
+        row = ann.find(key)
+        if row is None:
+            raise KeyError(key)
+        feat = ann.feature(row)
+        if ftype == "gene":
+            seq = self.fasta.fetch(feat["seqid"], int(feat["start"]), int(feat["end"]))
+            return feat, revcomp(seq) if feat["strand"] == "-" else seq
+        if ann.cols["type"][row] == ftype:
+            parts = ann.segments(row)
+        else:
+            parts = ann.children(row, ftype)
+            if not parts:
+                tx = ann.children(row)
+                parts = ann.children(tx[0], ftype) if tx else []
+            if not parts:
+                raise KeyError(f"{key} has no {ftype} features")
+        parts = sorted(parts, key=lambda r: ann.cols["start"][r])
+        seq = "".join(self.fasta.fetch(ann.cols["seqid"][r], int(ann.cols["start"][r]), int(ann.cols["end"][r]))
+                      for r in parts)
+        return feat, revcomp(seq) if feat["strand"] == "-" else seq
+
+
+if __name__ == "__main__":
+    # python -m showcase.genome — build the .fai and GFF3 interval index next to the data
+    import time
+    from showcase.config import compile_config
+    from showcase.data import ROOT, data_path
+
+    cfg = compile_config(ROOT / "content_config.yaml").cfg
+    fasta, gff = data_path(cfg, "genome_fasta"), data_path(cfg, "genome_gff3")
+    if fasta:
+        t0 = time.perf_counter()
+        print(f"{build_fai(fasta)} ({time.perf_counter() - t0:.1f} s)")
+    if gff:
+        t0 = time.perf_counter()
+        print(f"{build_gff_index(gff)} ({time.perf_counter() - t0:.1f} s)")
+    if not (fasta or gff):
+        raise SystemExit("data.genome_fasta / data.genome_gff3 are not set or missing")
@@ -0,0 +1,300 @@
+"""
+Multi-resolution Hi-C contact store and tile server (mcool-like).
+
+``build`` streams a contact-pairs file once and writes, per resolution,
+
+    .cache/hic/<digest>/<res>/bin1.npy     int32  genome-wide bin of the upper end, sorted
+    .cache/hic/<digest>/<res>/bin2.npy     int32  (bin1 <= bin2)
+    .cache/hic/<digest>/<res>/count.npy    float32
+    .cache/hic/<digest>/<res>/indptr.npy   int64  bin1 → first pixel (CSR over rows)
+    .cache/hic/<digest>/meta.json          chromosomes, lengths, resolutions
+
+Bins never straddle chromosomes (each chromosome starts a fresh bin, as in
+cooler). Coarser levels are aggregated from the finest one. ``ContactMap``
+memory-maps the arrays and serves fixed-size square tiles from the CSR row
+slices, keeping a bounded LRU of decoded tiles; a view only decodes the tiles
+that overlap it, at the coarsest resolution that still fills the viewport.
+
+Pairs input: 4DN ``.pairs`` (``#columns:`` / ``#chromsize:`` headers, gzip
+allowed) or a headerless ``chrom1 pos1 chrom2 pos2 [count]`` TSV. Chromosome
+sizes come from the header or the genome FASTA index.
+"""
+
+import gzip
+import json
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from showcase.genome import parse_region
+from showcase.util import file_digest, staged_dir
+
+CACHE_DIR = Path(__file__).resolve().parent.parent / ".cache" / "hic"
+RESOLUTIONS = (10_000, 50_000, 250_000, 1_000_000, 5_000_000)
+TILE = 256
+CHUNK_LINES = 2_000_000
+
+
+def _open(path: Path):
+    return gzip.open(path, "rt") if path.suffix == ".gz" else open(path, encoding="utf-8")
+
+
+def pairs_header(path: Path) -> tuple[list[str] | None, dict[str, int]]:
+    """Column names and chromosome sizes from a ``.pairs`` header (None / {} when absent)."""
+    columns, sizes = None, {}
+    with _open(path) as f:
+        for line in f:
+            if not line.startswith("#"):
+                break
+            if line.startswith("#columns:"):
+                columns = line.split(":", 1)[1].split()
+            elif line.startswith("#chromsize:"):
+                name, length = line.split(":", 1)[1].split()
+                sizes[name] = int(length)
+    return columns, sizes
+
+
+def _bin_offsets(lengths: np.ndarray, res: int) -> np.ndarray:
+    """First genome-wide bin of each chromosome (plus the total at the end)."""
+    return np.concatenate([[0], np.cumsum(-(-lengths // res))]).astype(np.int64)
+
+
+def _reduce(b1: np.ndarray, b2: np.ndarray, count: np.ndarray, n_bins: int):
+    key = b1.astype(np.int64) * n_bins + b2
+    uniq, inv = np.unique(key, return_inverse=True)
+    return (uniq // n_bins).astype(np.int32), (uniq % n_bins).astype(np.int32), \
+        np.bincount(inv, weights=count).astype(np.float32)
+
+
+def build(pairs: Path, chromsizes: dict[str, int] | None = None, out_dir: Path | None = None,
+          resolutions=RESOLUTIONS) -> Path:
+    """Bin ``pairs`` at every resolution and write the pyramid; returns its directory."""
+    pairs = Path(pairs)
+    resolutions = sorted(resolutions)
+    base = resolutions[0]
+    if any(r % base for r in resolutions):
+        raise ValueError("resolutions must be multiples of the finest one")
+    columns, header_sizes = pairs_header(pairs)
+    sizes = header_sizes or chromsizes
+    if not sizes:
+        raise ValueError("no chromosome sizes: add #chromsize: lines or set data.genome_fasta")
+    names = list(sizes)
+    lengths = np.array([sizes[c] for c in names], dtype=np.int64)
+    chrom_id = {c: i for i, c in enumerate(names)}
+    if columns:
+        use = [columns.index(c) for c in ("chrom1", "pos1", "chrom2", "pos2")]
+        count_col = columns.index("count") if "count" in columns else None
+    else:
+        use, count_col = [0, 1, 2, 3], None
+        with _open(pairs) as f:
+            first = next((ln for ln in f if not ln.startswith("#")), "")
+        count_col = 4 if len(first.split()) >= 5 else None
+    usecols = use + ([count_col] if count_col is not None else [])
+
+    off = _bin_offsets(lengths, base)
+    n_base = int(off[-1])
+    parts = []
+    reader = pd.read_csv(pairs, sep=r"\s+", comment="#", header=None, usecols=usecols,
+                         chunksize=CHUNK_LINES, dtype={use[0]: str, use[2]: str})
+    for chunk in reader:
+        c1 = chunk[use[0]].map(chrom_id).to_numpy()
+        c2 = chunk[use[2]].map(chrom_id).to_numpy()
+        ok = ~(pd.isna(c1) | pd.isna(c2))
+        c1, c2 = c1[ok].astype(np.int64), c2[ok].astype(np.int64)
+        g1 = off[c1] + (chunk[use[1]].to_numpy()[ok].astype(np.int64) - 1) // base
+        g2 = off[c2] + (chunk[use[3]].to_numpy()[ok].astype(np.int64) - 1) // base
+        w = chunk[count_col].to_numpy(np.float64)[ok] if count_col is not None else np.ones(len(g1))
+        lo, hi = np.minimum(g1, g2), np.maximum(g1, g2)
+        parts.append(_reduce(lo, hi, w, n_base))
+    if parts:
+        b1, b2, cnt = _reduce(*(np.concatenate(x) for x in zip(*parts)), n_base)
+    else:
+        b1, b2, cnt = np.empty(0, np.int32), np.empty(0, np.int32), np.empty(0, np.float32)
+
+    out_dir = Path(out_dir or CACHE_DIR / file_digest(pairs))
+    # a private staging directory, renamed over any previous build as a whole
+    with staged_dir(out_dir, replace=True) as tmp:
+        # chromosome of each base bin, to re-bin within chromosomes at coarser levels
+        chrom_of = np.repeat(np.arange(len(names)), np.diff(off))
+        for res in resolutions:
+            f = res // base
+            roff = _bin_offsets(lengths, res)
+            if f == 1:
+                r1, r2, rc = b1, b2, cnt
+            else:
+                c1, c2 = chrom_of[b1], chrom_of[b2]
+                r1 = roff[c1] + (b1 - off[c1]) // f
+                r2 = roff[c2] + (b2 - off[c2]) // f
+                r1, r2, rc = _reduce(r1, r2, cnt, int(roff[-1]))
+            d = tmp / str(res)
+            d.mkdir()
+            np.save(d / "bin1.npy", r1.astype(np.int32))
+            np.save(d / "bin2.npy", r2.astype(np.int32))
+            np.save(d / "count.npy", rc.astype(np.float32))
+            np.save(d / "indptr.npy", np.searchsorted(r1, np.arange(int(roff[-1]) + 1)).astype(np.int64))
+        (tmp / "meta.json").write_text(json.dumps({
+            "source": pairs.name, "chromosomes": names, "lengths": lengths.tolist(),
+            "resolutions": resolutions, "contacts": float(cnt.sum()),
+        }, indent=2))
+    return out_dir
+
+
+# ── Tile server ────────────────────────────────────────────────────────────────
+class ContactMap:
+    """Memory-mapped pyramid with a bounded cache of dense tiles."""
+
+    def __init__(self, path: Path, max_tiles: int = 128):
+        self.path = Path(path)
+        self.meta = json.loads((self.path / "meta.json").read_text())
+        self.chromosomes = self.meta["chromosomes"]
+        self.lengths = np.array(self.meta["lengths"], dtype=np.int64)
+        self.resolutions = self.meta["resolutions"]
+        self._levels = {}
+        self._tiles: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()          # shared across sessions via the resource cache
+        self.max_tiles = max_tiles
+        self.tiles_decoded = 0
+
+    def level(self, res: int) -> dict:
+        if res not in self._levels:
+            d = self.path / str(res)
+            self._levels[res] = {k: np.load(d / f"{k}.npy", mmap_mode="r")
+                                 for k in ("bin1", "bin2", "count", "indptr")}
+        return self._levels[res]
+
+    def offsets(self, res: int) -> np.ndarray:
+        return _bin_offsets(self.lengths, res)
+
+    def n_bins(self, res: int) -> int:
+        return int(self.offsets(res)[-1])
+
+    def bin_range(self, res: int, chrom: str | None = None, start: int | None = None,
+                  end: int | None = None) -> tuple[int, int]:
+        """Half-open genome-wide bin range for ``chrom:start-end`` (whole genome if chrom is None)."""
+        off = self.offsets(res)
+        if chrom is None:
+            return 0, int(off[-1])
+        i = self.chromosomes.index(chrom)
+        start = 1 if start is None else max(1, start)
+        end = int(self.lengths[i]) if end is None else min(end, int(self.lengths[i]))
+        return int(off[i] + (start - 1) // res), int(off[i] + (end - 1) // res + 1)
+
+    def span(self, region: str) -> tuple[str | None, int, int]:
+        """
+        ``all`` / ``chr`` / ``chr:start-end`` → (chrom or None, start, end) in bp,
+        clipped to the sequence. Raises ``ValueError`` for an unknown sequence,
+        a reversed range or one that starts past the sequence end.
+        """
+        if region.strip().lower() in ("", "all", "genome"):
+            return None, 1, int(self.lengths.sum())
+        chrom, start, end = parse_region(region)
+        if chrom not in self.chromosomes:
+            raise ValueError(f"Unknown sequence {chrom!r}")
+        length = int(self.lengths[self.chromosomes.index(chrom)])
+        if start is None:
+            return chrom, 1, length
+        if start > end:
+            raise ValueError(f"Region {region.strip()!r} ends before it starts")
+        if start > length:
+            raise ValueError(f"Region {region.strip()!r} starts past the end of {chrom} ({length:,} bp)")
+        return chrom, max(start, 1), min(end, length)
+
+    def pick_resolution(self, span_bp: int, max_bins: int = 600) -> int:
+        """Finest resolution at which ``span_bp`` fits in ``max_bins`` bins."""
+        for res in self.resolutions:
+            if span_bp / res <= max_bins:
+                return res
+        return self.resolutions[-1]
+
+    def tile(self, res: int, ti: int, tj: int) -> np.ndarray:
+        """Dense TILE × TILE block (rows ti, columns tj), symmetric across the diagonal."""
+        key = (res, ti, tj)
+        with self._lock:
+            hit = self._tiles.get(key)
+            if hit is not None:
+                self._tiles.move_to_end(key)
+                return hit
+        if ti > tj:
+            block = self.tile(res, tj, ti).T
+        else:
+            lv = self.level(res)
+            n = self.n_bins(res)
+            r0, r1 = ti * TILE, min((ti + 1) * TILE, n)
+            c0, c1 = tj * TILE, min((tj + 1) * TILE, n)
+            block = np.zeros((TILE, TILE), dtype=np.float32)
+            if r0 < r1:
+                a, b = int(lv["indptr"][r0]), int(lv["indptr"][r1])
+                b1, b2, cnt = lv["bin1"][a:b], lv["bin2"][a:b], lv["count"][a:b]
+                keep = (b2 >= c0) & (b2 < c1)
+                block[b1[keep] - r0, b2[keep] - c0] = cnt[keep]
+                if ti == tj:                  # mirror the upper triangle
+                    block = np.maximum(block, block.T)
+            self.tiles_decoded += 1
+        with self._lock:
+            self._tiles[key] = block
+            if len(self._tiles) > self.max_tiles:
+                self._tiles.popitem(last=False)
+        return block
+
+    def window(self, res: int, rows: tuple[int, int], cols: tuple[int, int]) -> np.ndarray:
+        """Dense contacts for bin ranges ``rows`` × ``cols``, assembled from covering tiles."""
+        (r0, r1), (c0, c1) = rows, cols
+        out = np.zeros((r1 - r0, c1 - c0), dtype=np.float32)
+        for ti in range(r0 // TILE, (r1 - 1) // TILE + 1):
+            for tj in range(c0 // TILE, (c1 - 1) // TILE + 1):
+                t = self.tile(res, ti, tj)
+                ra, rb = max(r0, ti * TILE), min(r1, (ti + 1) * TILE)
+                ca, cb = max(c0, tj * TILE), min(c1, (tj + 1) * TILE)
+                out[ra - r0:rb - r0, ca - c0:cb - c0] = t[ra - ti * TILE:rb - ti * TILE,
+                                                          ca - tj * TILE:cb - tj * TILE]
+        return out
+
+    def boundaries(self, res: int, lo: int, hi: int) -> list[tuple[int, str]]:
+        """Chromosome starts inside bin range [lo, hi) as (bin, name)."""
+        off = self.offsets(res)
+        return [(int(o), c) for o, c in zip(off[:-1], self.chromosomes) if lo <= o < hi]
+
+
+def render(matrix: np.ndarray, vmax_quantile: float = 0.98) -> np.ndarray:
+    """log1p contacts → RGB uint8 on a white→red scale (juicebox-style)."""
+    x = np.log1p(matrix)
+    nz = x[x > 0]
+    vmax = float(np.quantile(nz, vmax_quantile)) if len(nz) else 1.0
+    t = np.clip(x / (vmax or 1.0), 0, 1)
+    rgb = np.empty(x.shape + (3,), dtype=np.uint8)
+    rgb[..., 0] = 255
+    rgb[..., 1] = (255 * (1 - t)).astype(np.uint8)
+    rgb[..., 2] = (255 * (1 - t)).astype(np.uint8)
+    return rgb
+
+
+def store_dir(pairs: Path) -> Path:
+    return CACHE_DIR / file_digest(pairs)
+
+
+def fasta_sizes(fasta: Path | None) -> dict[str, int] | None:
+    """Chromosome sizes from the genome FASTA's ``.fai`` (built if missing)."""
+    if fasta is None:
+        return None
+    from showcase.genome import Fasta
+    return {n: e.length for n, e in Fasta(fasta).index.items()}
+
+
+if __name__ == "__main__":
+    # python -m showcase.hic — build the multi-resolution pyramid from data.hic_pairs
+    import time
+    from showcase.config import compile_config
+    from showcase.data import ROOT, data_path
+
+    cfg = compile_config(ROOT / "content_config.yaml").cfg
+    src = data_path(cfg, "hic_pairs")
+    if src is None:
+        raise SystemExit("data.hic_pairs is not set or missing")
+    t0 = time.perf_counter()
+    out = build(src, fasta_sizes(data_path(cfg, "genome_fasta")))
+    meta = json.loads((out / "meta.json").read_text())
+    print(f"{out}: {meta['contacts']:,.0f} contacts at {meta['resolutions']} bp "
+          f"({time.perf_counter() - t0:.1f} s)")
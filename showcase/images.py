@@ -0,0 +1,93 @@
+"""
+Figure derivatives — content-hashed, size-bucketed thumbnails for the gallery.
+
+Raw figures in ``assets/`` are multi-megabyte PNGs. The gallery only needs a
+column-width thumbnail, so we re-encode each figure once per size bucket into
+WebP (JPEG when Pillow lacks WebP support) and keep the result on disk under
+``.cache/derivatives/``, one folder per source file (its stem plus a hash of
+its resolved path, so two studies' ``assets/fig1.png`` never share a folder).
+File names embed a hash of the source bytes, so an edited PNG simply produces
+a new name and the stale files in that folder are pruned.
+"""
+
+import hashlib
+import os
+from pathlib import Path
+
+from PIL import Image, features
+
+from showcase.util import file_digest
+
+# ── Settings ───────────────────────────────────────────────────────────────────
+SIZE_BUCKETS = (480, 960, 1600)     # max pixel width of each thumbnail tier
+QUALITY = 82
+CACHE_DIR = Path(__file__).resolve().parent.parent / ".cache" / "derivatives"
+
+FORMAT = "webp" if features.check("webp") else "jpeg"
+_EXT = {"webp": ".webp", "jpeg": ".jpg"}
+
+
+def pick_bucket(width: int) -> int:
+    """Smallest bucket that is at least ``width`` pixels wide."""
+    for b in SIZE_BUCKETS:
+        if b >= width:
+            return b
+    return SIZE_BUCKETS[-1]
+
+
+def derivative(src: Path, width: int | None = None, fmt: str = FORMAT,
+               cache_dir: Path = CACHE_DIR) -> Path:
+    """
+    Return the path of ``src`` re-encoded at a bucketed ``width``.
+
+    ``width=None`` gives the full-resolution variant. Derivatives are built on
+    first request and reused until the source bytes change.
+    """
+    src = Path(src)
+    tag = "full" if width is None else f"w{pick_bucket(width)}"
+    digest = file_digest(src)
+    folder = source_dir(src, cache_dir)
+    out = folder / f"{digest}.{tag}{_EXT[fmt]}"
+    if out.exists():
+        return out
+
+    folder.mkdir(parents=True, exist_ok=True)
+    with Image.open(src) as im:
+        im = _flatten(im, fmt)
+        if width is not None and im.width > pick_bucket(width):
+            bw = pick_bucket(width)
+            im = im.resize((bw, round(im.height * bw / im.width)), Image.LANCZOS)
+        tmp = out.with_suffix(f"{out.suffix}.{os.getpid()}.tmp")
+        if fmt == "webp":
+            im.save(tmp, format="WEBP", quality=QUALITY, method=4)
+        else:
+            im.save(tmp, format="JPEG", quality=QUALITY, optimize=True, progressive=True)
+        tmp.replace(out)        # atomic, so concurrent sessions never read half a file
+
+    _prune(folder, digest)
+    return out
+
+
+def source_dir(src: Path, cache_dir: Path = CACHE_DIR) -> Path:
+    """The derivatives folder of ``src``, keyed on its resolved path."""
+    src = Path(src).resolve()
+    return cache_dir / f"{src.stem}-{hashlib.sha256(str(src).encode()).hexdigest()[:12]}"
+
+
+def _flatten(im: Image.Image, fmt: str) -> Image.Image:
+    """Drop palette/alpha so the target encoder accepts the image."""
+    if im.mode in ("P", "LA", "RGBA"):
+        im = im.convert("RGBA")
+        if fmt == "jpeg":
+            bg = Image.new("RGB", im.size, (255, 255, 255))
+            bg.paste(im, mask=im.getchannel("A"))
+            return bg
+        return im
+    return im.convert("RGB") if im.mode != "RGB" else im
+
+
+def _prune(folder: Path, digest: str) -> None:
+    """Remove derivatives in ``folder`` built from an older version of its source."""
+    for p in folder.iterdir():
+        if not p.name.startswith(f"{digest}.") and not p.name.endswith(".tmp"):
+            p.unlink(missing_ok=True)
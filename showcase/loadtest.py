@@ -0,0 +1,223 @@
+"""
+Multi-session load test: N concurrent viewers navigating the sidebar of a real server.
+
+Starts ``streamlit run app.py`` headless (or targets ``--url``) and opens N
+websocket sessions speaking the browser's protocol: each asks for the first
+render, then switches the sidebar radio through the pages in its own shuffled
+order for ``--rounds`` rounds, waiting for ``script_finished`` each time.
+Reported:
+
+* ``p50_ms`` / ``p95_ms``   rerun latency over all page switches
+* ``throughput``           page reruns per second across all sessions
+* ``per_session_mb``       server RSS growth per live session once shared caches are warm
+* ``capacity``             sessions that fit in the memory limit at that rate
+
+A warm-up session visits every page first and stays connected, so shared
+``st.cache_*`` entries count once in ``base_mb`` and not against each viewer.
+
+    python -m showcase.loadtest --sessions 20 --rounds 2
+    python -m showcase.loadtest --sessions 50 --think 2 --memory-mb 2700
+    python -m showcase.loadtest --url http://host:8501 --sessions 10   # latency only
+"""
+
+import asyncio
+import json
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+from pathlib import Path
+
+from showcase.util import rss_bytes
+
+ROOT = Path(__file__).resolve().parent.parent
+APP = ROOT / "app.py"
+RESULTS = ROOT / ".cache" / "loadtest" / "results.json"
+NAV_LABEL = "Navigate"                  # the sidebar radio in app.py
+
+
+def memory_limit() -> int | None:
+    """Container memory limit in bytes (cgroup v2 / v1), or None when unlimited."""
+    for p in ("/sys/fs/cgroup/memory.max", "/sys/fs/cgroup/memory/memory.limit_in_bytes"):
+        try:
+            raw = Path(p).read_text().strip()
+        except OSError:
+            continue
+        if raw.isdigit() and int(raw) < 2**60:
+            return int(raw)
+    return None
+
+
+# ── Server ─────────────────────────────────────────────────────────────────────
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(port: int, timeout: float = 60) -> subprocess.Popen:
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "streamlit", "run", str(APP), "--server.headless", "true",
+         "--server.port", str(port), "--server.fileWatcherType", "none",
+         "--browser.gatherUsageStats", "false"],
+        cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            urllib.request.urlopen(f"http://127.0.0.1:{port}/_stcore/health", timeout=1)
+            return proc
+        except OSError:
+            if proc.poll() is not None:
+                break
+            time.sleep(0.2)
+    proc.kill()
+    raise SystemExit(f"streamlit did not come up on port {port}")
+
+
+# ── Client ─────────────────────────────────────────────────────────────────────
+class Session:
+    """One browser tab: a websocket plus the sidebar radio's widget id."""
+
+    def __init__(self, ws):
+        self.ws, self.nav_id, self.pages, self.errors = ws, None, [], []
+
+    @classmethod
+    async def open(cls, url: str) -> "Session":
+        import websockets
+
+        host = url.split("://", 1)[-1].rstrip("/")
+        ws = await websockets.connect(f"ws://{host}/_stcore/stream", subprotocols=["streamlit"],
+                                      origin=f"http://{host}", max_size=None)
+        return cls(ws)
+
+    async def rerun(self, page: str | None = None) -> float:
+        """Send a rerun (switching to ``page``) and wait for it to finish; returns seconds."""
+        from streamlit.proto.BackMsg_pb2 import BackMsg
+        from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+        from streamlit.proto.Radio_pb2 import Radio
+
+        msg = BackMsg()
+        msg.rerun_script.query_string = ""
+        if page is not None:
+            w = msg.rerun_script.widget_states.widgets.add()
+            w.id = self.nav_id
+            if "raw_value" in Radio.DESCRIPTOR.fields_by_name:
+                w.string_value = page            # radios send the option since 1.4x
+            else:
+                w.int_value = self.pages.index(page)
+        t0 = time.perf_counter()
+        await self.ws.send(msg.SerializeToString())
+        while True:
+            fwd = ForwardMsg()
+            fwd.ParseFromString(await self.ws.recv())
+            kind = fwd.WhichOneof("type")
+            if kind == "delta" and fwd.delta.WhichOneof("type") == "new_element":
+                el = fwd.delta.new_element
+                etype = el.WhichOneof("type")
+                if etype == "radio" and el.radio.label == NAV_LABEL:
+                    self.nav_id, self.pages = el.radio.id, list(el.radio.options)
+                elif etype == "exception":
+                    self.errors.append(f"{page or 'first run'}: {el.exception.message}")
+            elif kind == "script_finished" and fwd.script_finished != ForwardMsg.FINISHED_EARLY_FOR_RERUN:
+                return time.perf_counter() - t0
+
+    async def close(self):
+        await self.ws.close()
+
+
+async def _viewer(url: str, pages: list[str] | None, rounds: int, think: float, seed: int,
+                  latencies: list, sessions: list) -> None:
+    rng = random.Random(seed)
+    s = await Session.open(url)
+    sessions.append(s)
+    latencies.append(await s.rerun())
+    for _ in range(rounds):
+        order = list(pages or s.pages)
+        rng.shuffle(order)
+        for page in order:
+            if think:
+                await asyncio.sleep(rng.expovariate(1 / think))
+            latencies.append(await s.rerun(page))
+
+
+async def _run(url: str, n: int, rounds: int, pages: list[str] | None, think: float, pid: int | None) -> dict:
+    warm = await Session.open(url)
+    await warm.rerun()
+    unknown = [p for p in pages or () if p not in warm.pages]
+    if unknown:
+        raise SystemExit(f"unknown page(s) {', '.join(map(repr, unknown))}; pages: {', '.join(warm.pages)}")
+    for page in pages or warm.pages:                # fill the shared caches once
+        await warm.rerun(page)
+    base = rss_bytes(pid) if pid else 0
+
+    latencies, sessions = [], []
+    t0 = time.perf_counter()
+    await asyncio.gather(*(_viewer(url, pages, rounds, think, i, latencies, sessions) for i in range(n)))
+    wall = time.perf_counter() - t0
+    after = rss_bytes(pid) if pid else 0
+    for s in [warm] + sessions:
+        await s.close()
+
+    q = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else latencies * 99
+    return {
+        "sessions": n, "rounds": rounds, "think_s": think, "pages": pages or warm.pages,
+        "reruns": len(latencies), "errors": [e for s in sessions for e in s.errors],
+        "wall_s": round(wall, 2),
+        "p50_ms": round(q[49] * 1000, 1),
+        "p95_ms": round(q[94] * 1000, 1),
+        "throughput": round(len(latencies) / wall, 2),
+        "base_mb": round(base / 2**20, 1) if pid else None,
+        "per_session_mb": round(max(after - base, 0) / n / 2**20, 2) if pid else None,
+    }
+
+
+def run(sessions: int = 10, rounds: int = 1, pages: list[str] | None = None, think: float = 0.0,
+        url: str | None = None, memory_mb: float | None = None) -> dict:
+    proc = None
+    if url is None:
+        port = _free_port()
+        proc = start_server(port)
+        url = f"http://127.0.0.1:{port}"
+    try:
+        r = asyncio.run(_run(url, sessions, rounds, pages, think, proc.pid if proc else None))
+    finally:
+        if proc:
+            proc.terminate()
+            proc.wait(timeout=30)
+    limit = memory_mb * 2**20 if memory_mb else memory_limit()
+    per = (r["per_session_mb"] or 0) * 2**20
+    r.update(created=time.strftime("%Y-%m-%dT%H:%M:%S"), url=url,
+             limit_mb=round(limit / 2**20) if limit else None,
+             capacity=int((limit - r["base_mb"] * 2**20) / per) if limit and per else None)
+    return r
+
+
+if __name__ == "__main__":
+    import argparse
+
+    ap = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    ap.add_argument("--sessions", type=int, default=10, help="concurrent sessions")
+    ap.add_argument("--rounds", type=int, default=1, help="passes over the pages per session")
+    ap.add_argument("--pages", nargs="*", help="page names (default: every page in the sidebar)")
+    ap.add_argument("--think", type=float, default=0.0, help="mean pause between page switches, seconds")
+    ap.add_argument("--url", help="running server to target (no memory figures); default: start one")
+    ap.add_argument("--memory-mb", type=float, help="container memory limit (default: cgroup limit)")
+    ap.add_argument("--out", type=Path, default=RESULTS)
+    args = ap.parse_args()
+
+    r = run(args.sessions, args.rounds, args.pages, args.think, args.url, args.memory_mb)
+    print(f"{r['sessions']} sessions × {r['rounds']} round(s), {r['reruns']} reruns in {r['wall_s']} s")
+    print(f"latency p50 {r['p50_ms']} ms · p95 {r['p95_ms']} ms · {r['throughput']} reruns/s")
+    if r["per_session_mb"] is not None:
+        print(f"memory base {r['base_mb']} MB · {r['per_session_mb']} MB per session"
+              + (f" · ~{r['capacity']} sessions in {r['limit_mb']} MB" if r["capacity"] else ""))
+    for e in r["errors"]:
+        print("ERROR", e)
+    args.out.parent.mkdir(parents=True, exist_ok=True)
+    args.out.write_text(json.dumps(r, indent=2))
+    print(f"→ {args.out}")
+    if r["errors"]:
+        raise SystemExit(1)
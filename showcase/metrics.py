@@ -0,0 +1,195 @@
+"""
+Render instrumentation: block timers, cache hit/miss counts and active sessions.
+
+Enabled with ``SHOWCASE_METRICS=1``. When disabled, ``timer`` hands back one
+shared no-op context manager and ``cache`` returns the Streamlit decorator
+unchanged, so instrumented code pays a dict-free function call at most.
+
+* ``timer(name)`` — histogram of wall time per block (``page:Findings``,
+  ``config_load``, ``block:gallery`` …).
+* ``cache(st.cache_data)`` — drop-in decorator that counts calls outside the
+  cache and executions inside it; misses = executions, hits = calls − misses.
+* ``touch_session(id)`` — sessions seen within ``SESSION_WINDOW`` seconds.
+* ``prometheus()`` — the aggregates in Prometheus text exposition format;
+  ``write_textfile`` drops them where a node-exporter textfile collector can
+  pick them up (``SHOWCASE_METRICS_FILE``).
+
+Aggregates are per process and shared by all sessions.
+"""
+
+import functools
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+
+from showcase.util import rss_bytes
+
+ENABLED = os.environ.get("SHOWCASE_METRICS", "").strip().lower() in ("1", "true", "yes", "on")
+TEXTFILE = os.environ.get("SHOWCASE_METRICS_FILE") or None
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SESSION_WINDOW = 300.0              # a session is active if it reran within the last 5 min
+
+_lock = threading.Lock()
+_timers: dict[str, list] = {}       # name → [count, sum, max, bucket counts...]
+_calls: dict[str, int] = {}
+_misses: dict[str, int] = {}
+_sessions: dict[str, float] = {}
+_started = time.time()
+_last_write = 0.0
+_NOOP = nullcontext()
+
+
+# ── Recording ──────────────────────────────────────────────────────────────────
+def observe(name: str, seconds: float) -> None:
+    with _lock:
+        t = _timers.get(name)
+        if t is None:
+            t = _timers[name] = [0, 0.0, 0.0] + [0] * len(BUCKETS)
+        t[0] += 1
+        t[1] += seconds
+        t[2] = max(t[2], seconds)
+        for i, b in enumerate(BUCKETS):
+            if seconds <= b:
+                t[3 + i] += 1
+
+
+@contextmanager
+def _timed(name: str):
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(name, time.perf_counter() - t0)
+
+
+def timer(name: str):
+    """Context manager timing a block (a shared no-op when metrics are off)."""
+    return _timed(name) if ENABLED else _NOOP
+
+
+def _bump(table: dict, name: str) -> None:
+    with _lock:
+        table[name] = table.get(name, 0) + 1
+
+
+def cache(decorator):
+    """
+    Wrap ``st.cache_data`` / ``st.cache_resource`` so the cached function's
+    hits and misses are counted. Supports bare and parameterised use::
+
+        cache_data = metrics.cache(st.cache_data)
+
+        @cache_data(show_spinner=False)
+        def f(...): ...
+    """
+    if not ENABLED:
+        return decorator
+
+    def instrument(fn, **kwargs):
+        name = fn.__qualname__
+
+        @functools.wraps(fn)
+        def body(*args, **kw):
+            _bump(_misses, name)
+            return fn(*args, **kw)
+
+        cached = decorator(body, **kwargs) if kwargs else decorator(body)
+
+        @functools.wraps(fn)
+        def call(*args, **kw):
+            _bump(_calls, name)
+            return cached(*args, **kw)
+
+        call.clear = cached.clear
+        return call
+
+    def deco(fn=None, **kwargs):
+        if fn is None:
+            return lambda f: instrument(f, **kwargs)
+        return instrument(fn)
+
+    return deco
+
+
+def touch_session(session_id: str | None) -> None:
+    if ENABLED and session_id:
+        now = time.time()
+        with _lock:
+            _sessions[session_id] = now
+            for sid in [s for s, seen in _sessions.items() if now - seen > SESSION_WINDOW]:
+                del _sessions[sid]
+
+
+# ── Reporting ──────────────────────────────────────────────────────────────────
+def active_sessions() -> int:
+    now = time.time()
+    with _lock:
+        return sum(now - seen <= SESSION_WINDOW for seen in _sessions.values())
+
+
+def snapshot() -> dict:
+    """Copies of the aggregates: timers, cache (calls, misses) and sessions."""
+    with _lock:
+        timers = {k: {"count": v[0], "total_s": v[1], "mean_ms": v[1] / v[0] * 1000 if v[0] else 0.0,
+                      "max_ms": v[2] * 1000} for k, v in _timers.items()}
+        caches = {k: {"calls": c, "misses": _misses.get(k, 0), "hits": c - _misses.get(k, 0)}
+                  for k, c in _calls.items()}
+    return {"timers": timers, "caches": caches, "sessions": active_sessions(),
+            "uptime_s": time.time() - _started}
+
+
+def _label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def prometheus() -> str:
+    """Aggregates in the Prometheus text exposition format (version 0.0.4)."""
+    lines = ["# HELP showcase_render_seconds Wall time of instrumented pages and blocks.",
+             "# TYPE showcase_render_seconds histogram"]
+    with _lock:
+        timers = {k: list(v) for k, v in _timers.items()}
+        calls, misses = dict(_calls), dict(_misses)
+    for name, t in sorted(timers.items()):
+        lab = f'block="{_label(name)}"'
+        for b, n in zip(BUCKETS, t[3:]):
+            lines.append(f'showcase_render_seconds_bucket{{{lab},le="{b:g}"}} {n}')
+        lines.append(f'showcase_render_seconds_bucket{{{lab},le="+Inf"}} {t[0]}')
+        lines.append(f"showcase_render_seconds_sum{{{lab}}} {t[1]:.6f}")
+        lines.append(f"showcase_render_seconds_count{{{lab}}} {t[0]}")
+    lines += ["# HELP showcase_cache_requests_total Calls to st.cache_* functions by result.",
+              "# TYPE showcase_cache_requests_total counter"]
+    for name in sorted(calls):
+        lab = f'function="{_label(name)}"'
+        miss = misses.get(name, 0)
+        lines.append(f'showcase_cache_requests_total{{{lab},result="hit"}} {calls[name] - miss}')
+        lines.append(f'showcase_cache_requests_total{{{lab},result="miss"}} {miss}')
+    lines += ["# HELP showcase_active_sessions Sessions that reran within the activity window.",
+              "# TYPE showcase_active_sessions gauge",
+              f"showcase_active_sessions {active_sessions()}",
+              "# HELP showcase_process_resident_bytes Resident set size of the app process.",
+              "# TYPE showcase_process_resident_bytes gauge",
+              f"showcase_process_resident_bytes {rss_bytes()}",
+              "# HELP showcase_uptime_seconds Seconds since the metrics registry was created.",
+              "# TYPE showcase_uptime_seconds gauge",
+              f"showcase_uptime_seconds {time.time() - _started:.0f}"]
+    return "\n".join(lines) + "\n"
+
+
+def write_textfile(path: str | Path | None = TEXTFILE, every: float = 15.0) -> None:
+    """Atomically rewrite the textfile-collector dump, at most once per ``every`` seconds."""
+    global _last_write
+    if not (ENABLED and path) or time.time() - _last_write < every:
+        return
+    _last_write = time.time()
+    path = Path(path)
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(prometheus())
+    tmp.replace(path)
+
+
+def reset() -> None:
+    with _lock:
+        for table in (_timers, _calls, _misses, _sessions):
+            table.clear()
@@ -0,0 +1,446 @@
+"""
+WGCNA-style co-expression modules, computed blockwise in bounded memory.
+
+The pipeline follows ``blockwiseModules`` from the WGCNA R package:
+
+1. z-score the expression matrix once into a float32 ``.npy`` memmap;
+2. pick the soft-threshold power from the scale-free fit on a gene sample;
+3. pre-cluster genes (projective k-means on correlation) into blocks whose
+   adjacency + TOM fit in ``memory_budget_mb``;
+4. per block, in a process pool: adjacency → TOM → average-linkage tree →
+   dynamic branch cut;
+5. merge modules whose eigengenes correlate above ``1 - merge_cut_height``,
+   then compute eigengenes, kME and module–trait correlations.
+
+The branch cut is a top-down simplification of dynamicTreeCut's "tree"
+method: branches below the cut height are split only when both children
+reach ``min_module_size`` and are separated by a gap that shrinks with
+``deep_split`` (0–4). Genes in no module get the label ``grey``.
+
+The parameters a study is analysed with live in the ``modules:`` section of
+its config (``params_from_config``); the pages, the download center, the
+precomputation scheduler and this module's CLI all look results up with them.
+"""
+
+import argparse
+import hashlib
+import json
+import math
+import multiprocessing
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass, fields
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from scipy.cluster.hierarchy import fcluster, linkage
+
+from showcase.correlation import align_samples, pearson_pvalue
+from showcase.util import file_digest, staged_dir
+
+CACHE_DIR = Path(__file__).resolve().parent.parent / ".cache" / "modules"
+EXECUTION_PARAMS = ("n_jobs", "memory_budget_mb")     # how a result is computed, not what it is
+POWERS = (1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 12, 14, 16, 18, 20)
+COLORS = ("turquoise", "blue", "brown", "yellow", "green", "red", "black", "pink", "magenta",
+          "purple", "greenyellow", "tan", "salmon", "cyan", "midnightblue", "lightcyan",
+          "grey60", "lightgreen", "lightyellow", "royalblue", "darkred", "darkgreen",
+          "darkturquoise", "darkgrey", "orange", "darkorange", "white", "skyblue")
+GREY = "grey"
+_DEEP_SPLIT_GAP = (0.75, 0.5, 0.35, 0.2, 0.1)   # min gap as a fraction of the tree height range
+
+
+@dataclass(frozen=True)
+class ModuleParams:
+    power: int | None = None         # None → smallest power with scale-free R² ≥ r2_cut
+    network_type: str = "unsigned"   # or "signed"
+    r2_cut: float = 0.85
+    min_module_size: int = 30
+    deep_split: int = 2
+    merge_cut_height: float = 0.25
+    memory_budget_mb: int = 1024     # per worker
+    n_jobs: int | None = None        # None → all cores the budget allows
+    power_sample: int = 5000         # genes used for power selection
+    seed: int = 0
+
+
+@dataclass(frozen=True)
+class ModuleResult:
+    power: int
+    power_table: pd.DataFrame        # power, r2, slope, mean_k
+    assignments: pd.DataFrame        # gene, module, kME
+    eigengenes: pd.DataFrame         # module × samples
+    trait_cor: pd.DataFrame          # module, trait, r, p (empty without traits)
+
+
+# ── Building blocks ────────────────────────────────────────────────────────────
+def _adjacency(c: np.ndarray, power: int, network_type: str) -> np.ndarray:
+    a = np.power((0.5 + 0.5 * c) if network_type == "signed" else np.abs(c), power, dtype=np.float32)
+    a[a < np.finfo(np.float32).tiny] = 0.0     # subnormals make the TOM matmul ~100x slower
+    return a
+
+
+def _scale_free_fit(k: np.ndarray, n_bins: int = 10) -> tuple[float, float]:
+    """WGCNA's signed R² and slope of log10 p(k) ~ log10 k."""
+    counts, edges = np.histogram(k, bins=n_bins)
+    dk = np.array([k[(k >= lo) & (k <= hi)].mean() if c else np.nan
+                   for c, lo, hi in zip(counts, edges[:-1], edges[1:])])
+    ok = (counts > 0) & (dk > 0)
+    if ok.sum() < 3:
+        return 0.0, 0.0
+    x, y = np.log10(dk[ok]), np.log10(counts[ok] / counts.sum())
+    slope, intercept = np.polyfit(x, y, 1)
+    resid = y - (slope * x + intercept)
+    r2 = 1.0 - resid.var() / y.var() if y.var() > 0 else 0.0
+    return float(-np.sign(slope) * r2), float(slope)
+
+
+def pick_power(z: np.ndarray, params: ModuleParams, block_rows: int) -> tuple[int, pd.DataFrame]:
+    """Scale-free topology fit over ``POWERS`` on a random gene sample."""
+    rng = np.random.default_rng(params.seed)
+    g = z.shape[0]
+    idx = np.sort(rng.choice(g, size=min(g, params.power_sample), replace=False))
+    zs = np.asarray(z[idx])
+    k = np.zeros((len(POWERS), len(idx)))
+    for start in range(0, len(idx), block_rows):
+        c = zs[start:start + block_rows] @ zs.T
+        for pi, p in enumerate(POWERS):
+            k[pi, start:start + len(c)] = _adjacency(c, p, params.network_type).sum(axis=1) - 1.0
+    rows = []
+    for pi, p in enumerate(POWERS):
+        r2, slope = _scale_free_fit(k[pi])
+        rows.append({"power": p, "r2": r2, "slope": slope, "mean_k": float(k[pi].mean())})
+    table = pd.DataFrame(rows)
+    ok = table[table["r2"] >= params.r2_cut]
+    power = int(ok["power"].iloc[0]) if len(ok) else int(table.loc[table["r2"].idxmax(), "power"])
+    return power, table
+
+
+def _projective_kmeans(z: np.ndarray, n_centers: int, params: ModuleParams,
+                       chunk: int, n_iter: int = 10) -> np.ndarray:
+    """Assign genes to ``n_centers`` correlation centroids (WGCNA pre-clustering)."""
+    rng = np.random.default_rng(params.seed)
+    centers = np.asarray(z[np.sort(rng.choice(z.shape[0], n_centers, replace=False))], dtype=np.float64)
+    labels = np.zeros(z.shape[0], dtype=np.int64)
+    for _ in range(n_iter):
+        sums = np.zeros_like(centers)
+        for start in range(0, z.shape[0], chunk):
+            block = np.asarray(z[start:start + chunk], dtype=np.float64)
+            sim = block @ centers.T
+            score = np.abs(sim) if params.network_type == "unsigned" else sim
+            lab = score.argmax(axis=1)
+            labels[start:start + len(block)] = lab
+            sign = np.sign(sim[np.arange(len(block)), lab])[:, None] if params.network_type == "unsigned" else 1.0
+            np.add.at(sums, lab, block * sign)
+        norms = np.linalg.norm(sums, axis=1, keepdims=True)
+        centers = np.where(norms > 0, sums / np.maximum(norms, 1e-12), centers)
+    return labels
+
+
+def _blocks(labels: np.ndarray, block_size: int) -> list[np.ndarray]:
+    """Pack pre-clusters into blocks of at most ``block_size`` genes."""
+    groups = sorted((np.flatnonzero(labels == c) for c in np.unique(labels)), key=len, reverse=True)
+    blocks, current = [], []
+    for gidx in groups:
+        for start in range(0, len(gidx), block_size):
+            part = gidx[start:start + block_size]
+            if sum(map(len, current)) + len(part) > block_size:
+                blocks.append(np.sort(np.concatenate(current)))
+                current = []
+            current.append(part)
+    if current:
+        blocks.append(np.sort(np.concatenate(current)))
+    return blocks
+
+
+def _tom_dissimilarity(a: np.ndarray) -> np.ndarray:
+    """1 − TOM for a block adjacency (diagonal of ``a`` is ignored)."""
+    np.fill_diagonal(a, 0.0)
+    k = a.sum(axis=1)
+    tom = a @ a
+    tom += a
+    tom /= np.minimum.outer(k, k) + 1.0 - a
+    np.fill_diagonal(tom, 1.0)
+    np.subtract(1.0, tom, out=tom)
+    return tom
+
+
+def dynamic_cut(z_link: np.ndarray, min_size: int, deep_split: int,
+                cut_height: float | None = None) -> np.ndarray:
+    """Module labels (1..K, 0 = unassigned) from a scipy linkage matrix."""
+    n = z_link.shape[0] + 1
+    heights = z_link[:, 2]
+    h_min, h_max = float(heights.min()), float(heights.max())
+    cut = cut_height if cut_height is not None else h_min + 0.99 * (h_max - h_min)
+    min_gap = _DEEP_SPLIT_GAP[deep_split] * (cut - h_min)
+
+    size = np.ones(2 * n - 1, dtype=np.int64)
+    size[n:] = z_link[:, 3]
+    height = np.zeros(2 * n - 1)
+    height[n:] = heights
+    children = {n + i: (int(z_link[i, 0]), int(z_link[i, 1])) for i in range(n - 1)}
+
+    def leaves(node):
+        out, stack = [], [node]
+        while stack:
+            x = stack.pop()
+            if x < n:
+                out.append(x)
+            else:
+                stack.extend(children[x])
+        return out
+
+    labels = np.zeros(n, dtype=np.int64)
+    next_label = 1
+    stack = [2 * n - 2]
+    while stack:
+        node = stack.pop()
+        if size[node] < min_size:
+            continue
+        if node < n:
+            continue
+        left, right = children[node]
+        splittable = size[left] >= min_size and size[right] >= min_size and \
+            height[node] - max(height[left], height[right]) >= min_gap
+        if height[node] > cut or splittable:
+            stack.extend((left, right))
+        else:
+            labels[leaves(node)] = next_label
+            next_label += 1
+    return labels
+
+
+def _cut_block(args) -> np.ndarray:
+    """Worker: TOM tree cut for one block of rows of the z memmap."""
+    z_path, idx, power, params = args
+    z = np.load(z_path, mmap_mode="r")
+    zb = np.asarray(z[idx], dtype=np.float32)
+    dis = _tom_dissimilarity(_adjacency(zb @ zb.T, power, params.network_type))
+    if len(idx) < 2:
+        return np.zeros(len(idx), dtype=np.int64)
+    condensed = dis[np.triu_indices(len(idx), k=1)]
+    del dis
+    tree = linkage(np.clip(condensed, 0.0, None), method="average")
+    return dynamic_cut(tree, params.min_module_size, params.deep_split)
+
+
+def _eigengenes(z: np.ndarray, labels: np.ndarray, modules) -> np.ndarray:
+    """First principal component per module, sign-aligned with mean expression."""
+    out = np.zeros((len(modules), z.shape[1]))
+    for i, m in enumerate(modules):
+        x = np.asarray(z[np.flatnonzero(labels == m)], dtype=np.float64)
+        _, _, vt = np.linalg.svd(x - x.mean(axis=1, keepdims=True), full_matrices=False)
+        me = vt[0]
+        if np.dot(me, x.mean(axis=0)) < 0:
+            me = -me
+        out[i] = (me - me.mean()) / (me.std(ddof=1) or 1.0)
+    return out
+
+
+def _merge_close(z: np.ndarray, labels: np.ndarray, merge_cut_height: float) -> np.ndarray:
+    mods = [m for m in np.unique(labels) if m > 0]
+    if len(mods) < 2:
+        return labels
+    me = _eigengenes(z, labels, mods)
+    diss = 1.0 - np.corrcoef(me)
+    groups = fcluster(linkage(diss[np.triu_indices(len(mods), k=1)], method="average"),
+                      t=merge_cut_height, criterion="distance")
+    remap = dict(zip(mods, groups))
+    return np.array([remap.get(m, 0) for m in labels])
+
+
+# ── Driver ─────────────────────────────────────────────────────────────────────
+def _zscore_memmap(expr: pd.DataFrame, path: Path) -> np.ndarray:
+    """
+    Write unit-norm centred rows (so z_i · z_j is Pearson r) to a float32 .npy
+    memmap; returns the mask of genes kept (non-constant rows).
+    """
+    x = expr.to_numpy(np.float64)
+    x = x - x.mean(axis=1, keepdims=True)
+    norm = np.linalg.norm(x, axis=1, keepdims=True)
+    keep = (norm[:, 0] > 0) & np.isfinite(norm[:, 0])
+    path.parent.mkdir(parents=True, exist_ok=True)
+    z = np.lib.format.open_memmap(path, mode="w+", dtype=np.float32, shape=(int(keep.sum()), x.shape[1]))
+    z[:] = x[keep] / norm[keep]
+    z.flush()
+    return keep
+
+
+def build_modules(expr: pd.DataFrame, traits: pd.DataFrame | None = None,
+                  params: ModuleParams = ModuleParams(), work_dir: Path | None = None) -> ModuleResult:
+    """
+    Detect modules in a genes × samples matrix; ``traits`` is traits × samples.
+    The z-scored matrix is memory-mapped from ``work_dir`` (default: a private
+    temporary directory under ``CACHE_DIR``, removed afterwards).
+    """
+    if work_dir is None:
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        with tempfile.TemporaryDirectory(prefix=".work.", dir=CACHE_DIR) as tmp:
+            return build_modules(expr, traits, params, Path(tmp))
+    if traits is not None:
+        expr, traits = align_samples(expr, traits)
+    keep = _zscore_memmap(expr, work_dir / "z.npy")
+    genes = expr.index[keep]
+    z = np.load(work_dir / "z.npy", mmap_mode="r")
+    g, n = z.shape
+
+    budget = params.memory_budget_mb * 2**20
+    # correlation, adjacency, TOM and its denominator (float32) plus the float64
+    # condensed distances for linkage ≈ 20 bytes per gene pair at peak
+    block_size = max(params.min_module_size * 2, int(math.sqrt(budget / 20)))
+    row_chunk = max(1, budget // (16 * min(g, params.power_sample)))
+
+    power, power_table = pick_power(z, params, row_chunk)
+    power = params.power or power
+
+    n_blocks = math.ceil(g / block_size)
+    pre = _projective_kmeans(z, n_blocks, params, row_chunk) if n_blocks > 1 else np.zeros(g, dtype=np.int64)
+    blocks = _blocks(pre, block_size)
+
+    jobs = params.n_jobs or max(1, min(os.cpu_count() or 1, len(blocks)))
+    tasks = [(str(work_dir / "z.npy"), idx, power, params) for idx in blocks]
+    if jobs > 1:
+        with ProcessPoolExecutor(max_workers=jobs, mp_context=multiprocessing.get_context("spawn")) as pool:
+            cuts = list(pool.map(_cut_block, tasks))
+    else:
+        cuts = [_cut_block(t) for t in tasks]
+
+    labels = np.zeros(g, dtype=np.int64)
+    offset = 0
+    for idx, lab in zip(blocks, cuts):
+        labels[idx] = np.where(lab > 0, lab + offset, 0)
+        offset += int(lab.max(initial=0))
+    labels = _merge_close(z, labels, params.merge_cut_height)
+
+    # Relabel by size: largest → turquoise, ..., unassigned → grey
+    mods = [m for m, _ in sorted(((m, (labels == m).sum()) for m in np.unique(labels) if m > 0),
+                                 key=lambda t: -t[1])]
+    names = {m: COLORS[i] if i < len(COLORS) else f"module{i + 1}" for i, m in enumerate(mods)}
+    me = _eigengenes(z, labels, mods)
+    color = np.array([names.get(m, GREY) for m in labels], dtype=object)
+
+    kme = np.full(g, np.nan)
+    me_unit = (me - me.mean(axis=1, keepdims=True)) / np.linalg.norm(me - me.mean(axis=1, keepdims=True), axis=1, keepdims=True)
+    col = np.full(int(labels.max(initial=0)) + 1, -1)
+    col[mods] = np.arange(len(mods))
+    for start in range(0, g if mods else 0, row_chunk):
+        r = np.asarray(z[start:start + row_chunk], dtype=np.float64) @ me_unit.T
+        c = col[labels[start:start + len(r)]]
+        hit = c >= 0
+        kme[start:start + len(r)][hit] = r[np.flatnonzero(hit), c[hit]]
+
+    eigengenes = pd.DataFrame(me, index=[names[m] for m in mods], columns=expr.columns)
+    eigengenes.index.name = "module"
+    assignments = pd.DataFrame({"gene": genes, "module": color, "kME": kme})
+
+    trait_cor = pd.DataFrame(columns=["module", "trait", "r", "p"])
+    if traits is not None and mods:
+        t = traits.to_numpy(np.float64)
+        t = t - t.mean(axis=1, keepdims=True)
+        tn = np.linalg.norm(t, axis=1, keepdims=True)
+        ok = tn[:, 0] > 0
+        r = me_unit @ (t[ok] / tn[ok]).T
+        trait_cor = pd.DataFrame({
+            "module": np.repeat(eigengenes.index.to_numpy(), ok.sum()),
+            "trait": np.tile(traits.index[ok].to_numpy(), len(mods)),
+            "r": r.ravel(),
+            "p": pearson_pvalue(r.ravel(), n),
+        })
+    return ModuleResult(power=power, power_table=power_table, assignments=assignments,
+                        eigengenes=eigengenes, trait_cor=trait_cor)
+
+
+# ── Parameters and persistence ─────────────────────────────────────────────────
+def params_from_config(cfg, **overrides) -> ModuleParams:
+    """``ModuleParams`` from the config's ``modules:`` section, then ``overrides`` (None = keep)."""
+    section = dict(cfg.get("modules") or {})
+    names = {f.name for f in fields(ModuleParams)} - set(EXECUTION_PARAMS)
+    unknown = sorted(set(section) - names)
+    if unknown:
+        raise ValueError(f"modules: unknown parameter(s) {', '.join(unknown)}; expected {', '.join(sorted(names))}")
+    return ModuleParams(**{**section, **{k: v for k, v in overrides.items() if v is not None}})
+
+
+def result_params(params: ModuleParams) -> dict:
+    """The parameters that change a result (everything but ``EXECUTION_PARAMS``)."""
+    return {k: v for k, v in asdict(params).items() if k not in EXECUTION_PARAMS}
+
+
+def result_dir(expr_path: Path, trait_path: Path | None, params: ModuleParams = ModuleParams()) -> Path:
+    """Cache directory keyed by input contents and the parameters that affect results."""
+    tag = hashlib.sha256(json.dumps(
+        [file_digest(expr_path), file_digest(trait_path) if trait_path else None, result_params(params)],
+        sort_keys=True,
+    ).encode()).hexdigest()[:16]
+    return CACHE_DIR / tag
+
+
+def save(result: ModuleResult, out: Path, params: ModuleParams = ModuleParams()) -> None:
+    """Write the result into a staging directory and rename it to ``out``."""
+    with staged_dir(out) as tmp:
+        result.power_table.to_csv(tmp / "power.tsv", sep="\t", index=False)
+        result.assignments.to_csv(tmp / "assignments.tsv", sep="\t", index=False)
+        result.eigengenes.to_csv(tmp / "eigengenes.tsv", sep="\t")
+        result.trait_cor.to_csv(tmp / "trait_cor.tsv", sep="\t", index=False)
+        # meta.json last: its presence marks a complete result
+        (tmp / "meta.json").write_text(json.dumps({"power": result.power, "params": asdict(params)}, indent=2))
+
+
+def load(out: Path) -> ModuleResult | None:
+    if not (out / "meta.json").exists():
+        return None
+    meta = json.loads((out / "meta.json").read_text())
+    return ModuleResult(
+        power=meta["power"],
+        power_table=pd.read_csv(out / "power.tsv", sep="\t"),
+        assignments=pd.read_csv(out / "assignments.tsv", sep="\t"),
+        eigengenes=pd.read_csv(out / "eigengenes.tsv", sep="\t", index_col=0),
+        trait_cor=pd.read_csv(out / "trait_cor.tsv", sep="\t"),
+    )
+
+
+def module_summary(result: ModuleResult) -> pd.DataFrame:
+    """One row per module: size, mean kME and its strongest trait correlation."""
+    a = result.assignments
+    summary = (a[a["module"] != GREY].groupby("module")
+               .agg(genes=("gene", "size"), mean_kME=("kME", "mean"))
+               .sort_values("genes", ascending=False))
+    if len(result.trait_cor):
+        tc = result.trait_cor
+        top = tc.loc[tc["r"].abs().groupby(tc["module"]).idxmax()].set_index("module")
+        summary = summary.join(top[["trait", "r", "p"]].rename(
+            columns={"trait": "top trait", "r": "trait r", "p": "trait p"}))
+    return summary.reset_index()
+
+
+if __name__ == "__main__":
+    # python -m showcase.modules — build and persist modules for the configured data
+    from showcase.config import compile_config
+    from showcase.data import ROOT, data_path, read_matrix
+
+    ap = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    # Defaults come from modules: in content_config.yaml; flags override them for a one-off run
+    ap.add_argument("--power", type=int)
+    ap.add_argument("--network-type", choices=("unsigned", "signed"))
+    ap.add_argument("--min-module-size", type=int)
+    ap.add_argument("--deep-split", type=int, choices=range(5))
+    ap.add_argument("--memory-mb", type=int)
+    ap.add_argument("--jobs", type=int)
+    args = ap.parse_args()
+
+    cfg = compile_config(ROOT / "content_config.yaml").cfg
+    expr_path, trait_path = data_path(cfg, "expression_matrix"), data_path(cfg, "metabolite_table")
+    if expr_path is None:
+        raise SystemExit("data.expression_matrix is not set or the file is missing")
+    configured = params_from_config(cfg)
+    params = params_from_config(cfg, power=args.power, network_type=args.network_type,
+                                min_module_size=args.min_module_size, deep_split=args.deep_split,
+                                memory_budget_mb=args.memory_mb, n_jobs=args.jobs)
+    if result_params(params) != result_params(configured):
+        print("note: these parameters differ from modules: in content_config.yaml, so the app will not "
+              "show this result; set them there to make it the study's")
+    out = result_dir(expr_path, trait_path, params)
+    res = build_modules(read_matrix(expr_path), read_matrix(trait_path) if trait_path else None, params)
+    save(res, out, params)
+    print(f"power {res.power}; {res.eigengenes.shape[0]} modules → {out}")
@@ -0,0 +1,220 @@
+"""
+PCA and OPLS-DA for the metabolomics feature table.
+
+Matrices here are samples × features (the transpose of the stored tables).
+
+* ``preprocess`` — optional log transform, mean-centring and UV / Pareto scaling.
+* ``pca`` — randomized SVD (Halko et al.), optionally warm-started from the
+  loadings of a previous fit so a preprocessing change converges in fewer
+  power iterations.
+* ``pca_streaming`` — exact PCA for tables too large for RAM: the n × n Gram
+  matrix is accumulated over feature chunks of the memory-mapped store, and
+  loadings are recovered in a second streaming pass. Memory is O(n² + chunk).
+* ``opls_da`` — two-class OPLS-DA (Trygg & Wold NIPALS) with one predictive
+  and ``n_orth`` orthogonal components, R²X/R²Y and k-fold Q².
+
+``fit_pca`` is the fit the Multivariate page makes; ``save_pca`` / ``load_pca``
+keep precomputed fits under ``.cache/pca/`` per input hash and preprocessing.
+"""
+
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from showcase.util import file_digest
+
+SCALINGS = ("none", "uv", "pareto")
+LOGS = ("none", "log2", "log10")
+CACHE_DIR = Path(__file__).resolve().parent.parent / ".cache" / "pca"
+STREAMING_BYTES = 512 * 2**20       # above this, PCA streams the memmap instead of loading it
+
+
+# ── Preprocessing ──────────────────────────────────────────────────────────────
+def transform(x: np.ndarray, log: str = "log2") -> np.ndarray:
+    """Log transform with a +1 offset (negative values are clipped to 0 first)."""
+    if log == "none":
+        return x.astype(np.float64, copy=True)
+    fn = np.log2 if log == "log2" else np.log10
+    return fn(np.clip(x, 0, None) + 1.0)
+
+
+def column_stats(x: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    mean = np.nanmean(x, axis=0)
+    sd = np.nanstd(x, axis=0, ddof=1)
+    return mean, np.where(sd > 0, sd, 1.0)
+
+
+def scale(x: np.ndarray, scaling: str, mean: np.ndarray, sd: np.ndarray) -> np.ndarray:
+    x = np.nan_to_num(x - mean)
+    if scaling == "uv":
+        return x / sd
+    if scaling == "pareto":
+        return x / np.sqrt(sd)
+    return x
+
+
+def preprocess(x: np.ndarray, log: str = "log2", scaling: str = "pareto") -> np.ndarray:
+    t = transform(x, log)
+    return scale(t, scaling, *column_stats(t))
+
+
+# ── PCA ────────────────────────────────────────────────────────────────────────
+@dataclass(frozen=True)
+class PCA:
+    scores: np.ndarray          # samples × k
+    loadings: np.ndarray        # features × k
+    explained: np.ndarray       # fraction of total variance per component
+
+
+def randomized_svd(x: np.ndarray, k: int, n_iter: int = 7, oversample: int = 10,
+                   init: np.ndarray | None = None, seed: int = 0):
+    """Top-``k`` SVD of ``x`` via a randomized range finder with power iterations."""
+    rng = np.random.default_rng(seed)
+    n, p = x.shape
+    l = min(k + oversample, n, p)
+    omega = rng.standard_normal((p, l))
+    if init is not None and init.shape[0] == p:
+        omega[:, :min(l, init.shape[1])] = init[:, :l]
+    q, _ = np.linalg.qr(x @ omega)
+    for _ in range(n_iter):
+        q, _ = np.linalg.qr(x.T @ q)
+        q, _ = np.linalg.qr(x @ q)
+    ub, s, vt = np.linalg.svd(q.T @ x, full_matrices=False)
+    return (q @ ub)[:, :k], s[:k], vt[:k].T
+
+
+def pca(x: np.ndarray, k: int = 5, init: np.ndarray | None = None) -> PCA:
+    """PCA of an already preprocessed samples × features matrix."""
+    k = min(k, min(x.shape) - 1) if min(x.shape) > 1 else 1
+    total = float((x ** 2).sum()) or 1.0
+    if min(x.shape) <= 4 * (k + 10):
+        u, s, vt = np.linalg.svd(x, full_matrices=False)
+        u, s, v = u[:, :k], s[:k], vt[:k].T
+    else:
+        u, s, v = randomized_svd(x, k, n_iter=3 if init is not None else 7, init=init)
+    return PCA(scores=u * s, loadings=v, explained=s ** 2 / total)
+
+
+def pca_streaming(values: np.ndarray, k: int = 5, log: str = "log2", scaling: str = "pareto",
+                  chunk: int = 50_000) -> PCA:
+    """
+    Exact PCA of a features × samples array (e.g. a store memmap) without
+    materialising it: two passes over feature chunks.
+    """
+    p, n = values.shape
+    gram = np.zeros((n, n))
+    total = 0.0
+    for a in range(0, p, chunk):
+        xc = preprocess(np.asarray(values[a:a + chunk], dtype=np.float64).T, log, scaling)
+        gram += xc @ xc.T
+        total += float((xc ** 2).sum())
+    evals, evecs = np.linalg.eigh(gram)
+    order = np.argsort(evals)[::-1][:min(k, n - 1)]
+    s = np.sqrt(np.clip(evals[order], 0, None))
+    u = evecs[:, order]
+    loadings = np.empty((p, len(order)))
+    for a in range(0, p, chunk):
+        xc = preprocess(np.asarray(values[a:a + chunk], dtype=np.float64).T, log, scaling)
+        loadings[a:a + chunk] = xc.T @ u / np.where(s > 0, s, 1.0)
+    return PCA(scores=u * s, loadings=loadings, explained=s ** 2 / (total or 1.0))
+
+
+def fit_pca(values: np.ndarray, k: int = 10, log: str = "log2", scaling: str = "pareto") -> PCA:
+    """PCA of a features × samples table (a store memmap), streamed above ``STREAMING_BYTES``."""
+    if values.nbytes > STREAMING_BYTES:
+        return pca_streaming(values, k, log, scaling)
+    return pca(preprocess(np.asarray(values).T, log, scaling), k)
+
+
+def pca_path(source: Path, log: str, scaling: str, k: int = 10) -> Path:
+    return CACHE_DIR / f"{file_digest(source)}.{log}.{scaling}.k{k}.npz"
+
+
+def save_pca(fit: PCA, path: Path) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp.npz")
+    np.savez(tmp, scores=fit.scores, loadings=fit.loadings, explained=fit.explained)
+    tmp.replace(path)
+
+
+def load_pca(path: Path) -> PCA | None:
+    if not path.exists():
+        return None
+    z = np.load(path)
+    return PCA(scores=z["scores"], loadings=z["loadings"], explained=z["explained"])
+
+
+# ── OPLS-DA ────────────────────────────────────────────────────────────────────
+@dataclass(frozen=True)
+class OPLS:
+    t_pred: np.ndarray          # predictive scores (samples)
+    t_orth: np.ndarray          # orthogonal scores (samples × n_orth)
+    p_pred: np.ndarray          # predictive loadings (features)
+    r2x: float
+    r2y: float
+    q2: float
+
+
+def _opls_fit(x: np.ndarray, y: np.ndarray, n_orth: int):
+    """NIPALS OPLS for a single centred response; returns weights for prediction."""
+    x = x.copy()
+    w = x.T @ y
+    w /= np.linalg.norm(w) or 1.0
+    w_orth, p_orth, t_orth = [], [], []
+    for _ in range(n_orth):
+        t = x @ w
+        p = x.T @ t / (t @ t)
+        wo = p - (w @ p) * w
+        wo /= np.linalg.norm(wo) or 1.0
+        to = x @ wo
+        po = x.T @ to / (to @ to)
+        x -= np.outer(to, po)
+        w_orth.append(wo)
+        p_orth.append(po)
+        t_orth.append(to)
+    t = x @ w
+    c = (y @ t) / (t @ t)
+    p = x.T @ t / (t @ t)
+    return w, c, p, np.array(w_orth), np.array(p_orth), \
+        np.column_stack(t_orth) if t_orth else np.empty((len(y), 0)), t
+
+
+def _opls_predict(x, w, c, w_orth, p_orth):
+    x = x.copy()
+    for wo, po in zip(w_orth, p_orth):
+        x -= np.outer(x @ wo, po)
+    return (x @ w) * c
+
+
+def opls_da(x: np.ndarray, labels, positive, n_orth: int = 1, folds: int = 7) -> OPLS:
+    """Two-class OPLS-DA; ``labels == positive`` is class 1, everything else class 0."""
+    y = (np.asarray(labels) == positive).astype(np.float64)
+    if y.min() == y.max():
+        raise ValueError("OPLS-DA needs samples from both classes")
+    yc = y - y.mean()
+    w, c, p, w_orth, p_orth, t_orth, t = _opls_fit(x, yc, n_orth)
+
+    ss_x = float((x ** 2).sum()) or 1.0
+    r2x = float((np.outer(t, p) ** 2).sum()) / ss_x
+    r2y = 1.0 - float(((yc - t * c) ** 2).sum()) / float((yc ** 2).sum())
+
+    # k-fold Q²Y (features re-centred on each training fold)
+    press = 0.0
+    idx = np.arange(len(y))
+    for f in range(min(folds, len(y))):
+        test = idx % min(folds, len(y)) == f
+        xtr, ytr = x[~test], y[~test]
+        if ytr.min() == ytr.max():
+            continue
+        mu = xtr.mean(axis=0)
+        fw, fc, _, fwo, fpo, _, _ = _opls_fit(xtr - mu, ytr - ytr.mean(), n_orth)
+        pred = _opls_predict(x[test] - mu, fw, fc, fwo, fpo) + ytr.mean()
+        press += float(((y[test] - pred) ** 2).sum())
+    q2 = 1.0 - press / float((yc ** 2).sum())
+    return OPLS(t_pred=t, t_orth=t_orth, p_pred=p, r2x=r2x, r2y=r2y, q2=q2)
+
+
+def scores_frame(scores: np.ndarray, samples, prefix: str = "PC") -> pd.DataFrame:
+    return pd.DataFrame(scores, index=samples, columns=[f"{prefix}{i + 1}" for i in range(scores.shape[1])])
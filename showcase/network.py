@@ -0,0 +1,284 @@
+"""
+Regulatory / correlation network: edge store, cached layout and level-of-detail views.
+
+* ``Network`` holds the edge list as a symmetric CSR adjacency (one entry per
+  direction) with edge IDs, so neighbour lookups are a slice and k-hop
+  neighbourhoods are a few vectorised frontier expansions.
+* Every edge gets an importance rank at build time — its best position in
+  either endpoint's |weight|-sorted neighbour list — so top-k-per-node pruning
+  and weight thresholds are a single mask, and a global importance order lets
+  a viewport take its strongest edges without sorting.
+* ``layout`` runs a force-directed layout (spectral start, edge attraction,
+  grid-density repulsion) on the top-k backbone; positions are saved to
+  ``.cache/network/<digest>.npz`` with the index and reused while the edge
+  list is unchanged.
+* ``visible`` returns only the nodes and edges inside the current viewport,
+  capped to a render budget, which is all that is sent to the browser.
+
+Edge lists are TSV/CSV with ``source``, ``target``, ``weight`` (else the first
+three columns); the optional node table maps node → ``family`` / ``type``.
+"""
+
+import json
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from showcase.util import file_digest
+
+CACHE_DIR = Path(__file__).resolve().parent.parent / ".cache" / "network"
+BACKBONE_K = 5
+
+
+def read_edges(path: Path) -> pd.DataFrame:
+    path = Path(path)
+    df = pd.read_csv(path, sep="," if path.suffix == ".csv" else "\t")
+    cols = {c.lower(): c for c in df.columns}
+    names = [cols.get(k, df.columns[i]) for i, k in enumerate(("source", "target", "weight"))]
+    out = df[names].set_axis(["source", "target", "weight"], axis=1)
+    out["weight"] = pd.to_numeric(out["weight"], errors="coerce").fillna(0.0)
+    return out[out["source"] != out["target"]]
+
+
+def read_nodes(path: Path) -> pd.DataFrame:
+    path = Path(path)
+    df = pd.read_csv(path, sep="," if path.suffix == ".csv" else "\t", index_col=0, dtype=str)
+    df.index = df.index.astype(str)
+    return df.rename(columns=str.lower)
+
+
+# ── Edge store ─────────────────────────────────────────────────────────────────
+class Network:
+    """Undirected weighted graph over integer node IDs with edge-importance ranks."""
+
+    def __init__(self, names: np.ndarray, src: np.ndarray, dst: np.ndarray, weight: np.ndarray,
+                 rank: np.ndarray | None = None, pos: np.ndarray | None = None):
+        self.names = np.asarray(names, dtype=str)
+        self.src, self.dst = src.astype(np.int32), dst.astype(np.int32)
+        self.weight = weight.astype(np.float32)
+        n, m = len(self.names), len(self.src)
+        # symmetric CSR, neighbours sorted by |weight|; ``nbr_edge`` maps each entry to its edge ID
+        rows = np.concatenate([self.src, self.dst])
+        cols = np.concatenate([self.dst, self.src])
+        eid = np.tile(np.arange(m, dtype=np.int64), 2)
+        order = np.lexsort((-np.abs(self.weight[eid]), rows))
+        self.indptr = np.concatenate([[0], np.cumsum(np.bincount(rows, minlength=n))])
+        self.nbr, self.nbr_edge = cols[order], eid[order]
+        self.index = {name: i for i, name in enumerate(self.names)}
+        self.rank = self._ranks() if rank is None else rank
+        # most important (lowest rank) edges first, tie-broken by |weight|
+        self.order = np.lexsort((-np.abs(self.weight), self.rank))
+        self.strength = np.bincount(rows, weights=np.abs(self.weight[eid]), minlength=n)
+        self.pos = pos
+
+    @classmethod
+    def from_edges(cls, edges: pd.DataFrame) -> "Network":
+        codes, names = pd.factorize(pd.concat([edges["source"], edges["target"]]).astype(str))
+        m = len(edges)
+        src, dst = codes[:m], codes[m:]
+        # one entry per unordered pair, keeping the strongest duplicate
+        a, b = np.minimum(src, dst), np.maximum(src, dst)
+        w = edges["weight"].to_numpy(np.float64)
+        keep = np.sort(pd.DataFrame({"a": a, "b": b, "w": np.abs(w)}).sort_values("w", ascending=False)
+                       .drop_duplicates(["a", "b"]).index.to_numpy())
+        return cls(np.asarray(names), a[keep], b[keep], w[keep])
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    @property
+    def n_edges(self) -> int:
+        return len(self.src)
+
+    def _ranks(self) -> np.ndarray:
+        """Per edge: min over its endpoints of the edge's position in that node's neighbour list."""
+        pos = np.arange(len(self.nbr)) - np.repeat(self.indptr[:-1], np.diff(self.indptr))
+        rank = np.full(self.n_edges, np.iinfo(np.int32).max, dtype=np.int32)
+        np.minimum.at(rank, self.nbr_edge, pos.astype(np.int32))
+        return rank
+
+    def edge_mask(self, top_k: int | None = None, min_weight: float = 0.0) -> np.ndarray:
+        """Edges kept by top-k-per-node pruning (an edge survives if either end keeps it) and |weight|."""
+        keep = np.abs(self.weight) >= min_weight
+        if top_k is not None:
+            keep &= self.rank < top_k
+        return keep
+
+    def neighbours(self, node: int, edge_mask: np.ndarray | None = None) -> np.ndarray:
+        a, b = self.indptr[node], self.indptr[node + 1]
+        nb = self.nbr[a:b]
+        return nb if edge_mask is None else nb[edge_mask[self.nbr_edge[a:b]]]
+
+    def neighbourhood(self, seeds, hops: int = 1, edge_mask: np.ndarray | None = None) -> pd.DataFrame:
+        """Nodes within ``hops`` of any seed (names or IDs) with their hop distance."""
+        seeds = np.array([self.index[s] if isinstance(s, str) else int(s) for s in seeds], dtype=np.int64)
+        dist = np.full(len(self), -1, dtype=np.int32)
+        dist[seeds] = 0
+        frontier = seeds
+        for h in range(1, hops + 1):
+            if not len(frontier):
+                break
+            a, b = self.indptr[frontier], self.indptr[frontier + 1]
+            idx = np.repeat(a, b - a) + (np.arange((b - a).sum()) - np.repeat(np.cumsum(b - a) - (b - a), b - a))
+            if edge_mask is not None:
+                idx = idx[edge_mask[self.nbr_edge[idx]]]
+            nxt = np.unique(self.nbr[idx])
+            frontier = nxt[dist[nxt] < 0]
+            dist[frontier] = h
+        hit = np.flatnonzero(dist >= 0)
+        return pd.DataFrame({"node": self.names[hit], "id": hit, "hops": dist[hit],
+                             "strength": self.strength[hit]}).sort_values(["hops", "strength"],
+                                                                          ascending=[True, False],
+                                                                          ignore_index=True)
+
+    def induced_edges(self, nodes: np.ndarray, edge_mask: np.ndarray | None = None) -> np.ndarray:
+        """IDs of edges with both ends in ``nodes``."""
+        inside = np.zeros(len(self), dtype=bool)
+        inside[nodes] = True
+        keep = inside[self.src] & inside[self.dst]
+        if edge_mask is not None:
+            keep &= edge_mask
+        return np.flatnonzero(keep)
+
+    def edges_frame(self, ids: np.ndarray) -> pd.DataFrame:
+        return pd.DataFrame({"source": self.names[self.src[ids]], "target": self.names[self.dst[ids]],
+                             "weight": self.weight[ids], "rank": self.rank[ids]})
+
+
+# ── Layout ─────────────────────────────────────────────────────────────────────
+def layout(net: Network, top_k: int = BACKBONE_K, iterations: int = 60, grid: int = 64,
+           seed: int = 0) -> np.ndarray:
+    """
+    2-D positions in [0, 1]² from the top-k backbone: spectral initialisation,
+    then force iterations with attraction along edges and repulsion from a
+    smoothed node-density grid (O(nodes + edges) per iteration).
+    """
+    n = len(net)
+    rng = np.random.default_rng(seed)
+    ids = np.flatnonzero(net.edge_mask(top_k))
+    s, d, w = net.src[ids], net.dst[ids], np.abs(net.weight[ids]).astype(np.float64)
+    adj = sparse.coo_matrix((np.r_[w, w], (np.r_[s, d], np.r_[d, s])), shape=(n, n)).tocsr()
+    deg = np.asarray(adj.sum(axis=1)).ravel()
+    pos = rng.random((n, 2))
+    if n > 3 and len(ids):
+        from scipy.sparse.linalg import ArpackError, eigsh
+        inv = sparse.diags(1.0 / np.sqrt(np.where(deg > 0, deg, 1.0)))
+        try:
+            _, vec = eigsh(inv @ adj @ inv, k=3, which="LA", tol=1e-3, maxiter=n * 5)
+            spec = vec[:, :2]
+            spec = (spec - spec.min(axis=0)) / np.maximum(np.ptp(spec, axis=0), 1e-12)
+            pos = 0.7 * spec + 0.3 * pos
+        except ArpackError:             # includes ArpackNoConvergence: keep the random start
+            pass
+    ideal = 1.0 / np.sqrt(max(n, 1))
+    temp = 0.1
+    for _ in range(iterations):
+        force = np.zeros_like(pos)
+        # attraction ∝ d² / ideal along backbone edges
+        delta = pos[d] - pos[s]
+        dist = np.sqrt((delta ** 2).sum(axis=1)) + 1e-9
+        f = (delta * (dist * w / ideal)[:, None])
+        for j in range(2):
+            force[:, j] += np.bincount(s, f[:, j], minlength=n) - np.bincount(d, f[:, j], minlength=n)
+        # repulsion down the gradient of a blurred density grid
+        cell = np.clip((pos * grid).astype(int), 0, grid - 1)
+        dens = np.bincount(cell[:, 0] * grid + cell[:, 1], minlength=grid * grid).reshape(grid, grid).astype(float)
+        for axis in (0, 1):
+            dens = (np.roll(dens, 1, axis) + 2 * dens + np.roll(dens, -1, axis)) / 4
+        gx, gy = np.gradient(dens)
+        force[:, 0] -= gx[cell[:, 0], cell[:, 1]] * ideal
+        force[:, 1] -= gy[cell[:, 0], cell[:, 1]] * ideal
+        step = np.sqrt((force ** 2).sum(axis=1)) + 1e-12
+        pos += force / step[:, None] * np.minimum(step, temp)[:, None]
+        pos = np.clip(pos, 0.0, 1.0)
+        temp *= 0.95
+    lo, span = pos.min(axis=0), np.maximum(np.ptp(pos, axis=0), 1e-12)
+    return (pos - lo) / span
+
+
+# ── Persistence ────────────────────────────────────────────────────────────────
+def cache_path(edges_path: Path) -> Path:
+    return CACHE_DIR / f"{file_digest(edges_path)}.npz"
+
+
+def save(net: Network, path: Path) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp.npz")
+    np.savez(tmp, names=net.names, src=net.src, dst=net.dst, weight=net.weight, rank=net.rank, pos=net.pos)
+    tmp.replace(path)
+
+
+def open_network(edges_path: Path) -> Network:
+    """Indexed network with layout, built on first use and cached per edge-list digest."""
+    path = cache_path(edges_path)
+    if path.exists():
+        z = np.load(path)
+        return Network(z["names"], z["src"], z["dst"], z["weight"], rank=z["rank"], pos=z["pos"])
+    net = Network.from_edges(read_edges(edges_path))
+    net.pos = layout(net)
+    save(net, path)
+    return net
+
+
+# ── Level of detail ────────────────────────────────────────────────────────────
+@dataclass(frozen=True)
+class View:
+    nodes: pd.DataFrame         # node, x, y, strength
+    edges: pd.DataFrame         # x, y, x2, y2, weight
+    total_nodes: int            # inside the viewport before the budget cut
+    total_edges: int
+
+
+def visible(net: Network, bbox: tuple[float, float, float, float], edge_mask: np.ndarray | None = None,
+            max_nodes: int = 2000, max_edges: int = 3000) -> View:
+    """Nodes and strongest edges inside ``bbox`` = (x0, x1, y0, y1), capped to a render budget."""
+    x0, x1, y0, y1 = bbox
+    p = net.pos
+    inside = (p[:, 0] >= x0) & (p[:, 0] <= x1) & (p[:, 1] >= y0) & (p[:, 1] <= y1)
+    node_ids = np.flatnonzero(inside)
+    total_nodes = len(node_ids)
+    if total_nodes > max_nodes:
+        node_ids = node_ids[np.argpartition(-net.strength[node_ids], max_nodes)[:max_nodes]]
+    shown = np.zeros(len(net), dtype=bool)
+    shown[node_ids] = True
+    # importance order is precomputed, so the budget is just a prefix of the in-view edges
+    order = net.order
+    ok = shown[net.src[order]] & shown[net.dst[order]]
+    if edge_mask is not None:
+        ok &= edge_mask[order]
+    edge_ids = order[ok]
+    total_edges = len(edge_ids)
+    edge_ids = edge_ids[:max_edges]
+    nodes = pd.DataFrame({"node": net.names[node_ids], "x": p[node_ids, 0], "y": p[node_ids, 1],
+                          "strength": net.strength[node_ids]})
+    edges = pd.DataFrame({"x": p[net.src[edge_ids], 0], "y": p[net.src[edge_ids], 1],
+                          "x2": p[net.dst[edge_ids], 0], "y2": p[net.dst[edge_ids], 1],
+                          "weight": net.weight[edge_ids]})
+    return View(nodes=nodes, edges=edges, total_nodes=total_nodes, total_edges=total_edges)
+
+
+def viewport(net: Network, zoom: float = 1.0, center: str | None = None) -> tuple[float, float, float, float]:
+    """Square bbox of side 1/zoom, centred on a node (or the middle), kept inside [0, 1]²."""
+    half = 0.5 / max(zoom, 1.0)
+    cx, cy = net.pos[net.index[center]] if center in net.index else (0.5, 0.5)
+    cx, cy = np.clip(cx, half, 1 - half), np.clip(cy, half, 1 - half)
+    return (cx - half, cx + half, cy - half, cy + half)
+
+
+if __name__ == "__main__":
+    # python -m showcase.network — index the edge list and compute the layout ahead of time
+    import time
+    from showcase.config import compile_config
+    from showcase.data import ROOT, data_path
+
+    cfg = compile_config(ROOT / "content_config.yaml").cfg
+    src = data_path(cfg, "network_edges")
+    if src is None:
+        raise SystemExit("data.network_edges is not set or missing")
+    t0 = time.perf_counter()
+    net = open_network(src)
+    print(json.dumps({"nodes": len(net), "edges": net.n_edges, "cache": str(cache_path(src)),
+                      "seconds": round(time.perf_counter() - t0, 1)}))
@@ -0,0 +1,496 @@
+"""
+Precomputation scheduler — derived artifacts built before the first visitor asks.
+
+``graph`` lists what the pages derive from a study's data files, each artifact
+tagged with the ``page_pipeline()`` stage it belongs to: stage 3 indexes the
+inputs (matrix stores, genome and Hi-C indexes), stage 4 runs the integration
+analyses (correlation, DE, modules, PCA, network layout), stage 5 the
+candidate comparisons (family and proteome similarity) and stage 7 the
+reporting outputs (figure thumbnails, download tables). Stages 1, 2 and 6
+happen outside the app.
+
+An artifact's key is a digest of its input files, its parameters and its
+dependencies' keys. ``run`` compares the keys with the study's ledger
+(``.cache/precompute/<study>.json``) and builds the stale artifacts in a
+thread pool, each as soon as its dependencies are done; the heavy builders
+fan out to their own process pools. Builders call the same ``ensure`` / cache
+functions the pages use, so a page finds the result on disk. The ledger
+records each build's time and outcome.
+
+While a build runs, its ledger entry carries ``building`` with the pid of the
+process doing it; pages check ``building`` to show the previous result or a
+"building…" notice instead of starting the same computation themselves.
+
+    python -m showcase.precompute [--list] [--only NAME …] [--jobs N] [--study ID]
+    SHOWCASE_PRECOMPUTE=1 streamlit run app.py    # the same, in the background at server start
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable
+
+from showcase import catalog, metrics
+from showcase.config import Snapshot, precompiled
+from showcase.util import file_digest
+
+ROOT = catalog.ROOT
+CACHE_DIR = ROOT / ".cache" / "precompute"
+ENABLED = os.environ.get("SHOWCASE_PRECOMPUTE", "").strip().lower() in ("1", "true", "yes", "on")
+STAGES = {3: "Feature Generation", 4: "Integration Analyses", 5: "Candidate Prioritization",
+          7: "Reporting & Handoff"}
+CORRELATION_TOP_K = 50              # Correlation page default and the download table
+PCA_DEFAULT = ("log2", "pareto")    # Multivariate page default preprocessing
+FAMILY = "OMT"                      # Families page default protein set
+
+_ledger_lock = threading.Lock()
+
+
+class Busy(RuntimeError):
+    """Another scheduler is already running for this study."""
+
+
+@dataclass(frozen=True)
+class Target:
+    study: catalog.Study
+    snap: Snapshot
+    jobs: int = 1                   # processes each builder may use
+
+    @classmethod
+    def of(cls, study: catalog.Study, jobs: int = 1) -> Target:
+        return cls(study, precompiled(study.config), jobs)
+
+    @property
+    def cfg(self):
+        return self.snap.cfg
+
+    def path(self, key: str) -> Path | None:
+        from showcase.data import data_path
+        return data_path(self.cfg, key)
+
+
+@dataclass(frozen=True)
+class Artifact:
+    name: str
+    stage: int                                          # page_pipeline() stage
+    label: str
+    sources: Callable[[Target], list[Path] | None]      # input files; None when a required one is missing
+    build: Callable[[Target], list[Path]]               # idempotent; returns the outputs (first = main)
+    deps: tuple[str, ...] = ()
+    params: Callable[[Target], object] = lambda t: None  # anything else the outputs depend on
+
+
+# ── Builders ───────────────────────────────────────────────────────────────────
+def _needs(*keys: str) -> Callable[[Target], list[Path] | None]:
+    return lambda t: [t.path(k) for k in keys] if all(t.path(k) for k in keys) else None
+
+
+def _store(t: Target, key: str) -> list[Path]:
+    from showcase import store
+    return [store.ensure(key, t.path(key), t.study.dir_in(store.STORE_DIR)).path]
+
+
+def _genome(t: Target) -> list[Path]:
+    from showcase.genome import Genome
+    fasta, gff = t.path("genome_fasta"), t.path("genome_gff3")
+    Genome(fasta, gff)                                  # (re)builds the .fai and GFF3 index when stale
+    return [fasta.with_name(fasta.name + ".fai"), gff.with_name(gff.name + ".idx.npz")]
+
+
+def _hic(t: Target) -> list[Path]:
+    from showcase import hic
+    src = t.path("hic_pairs")
+    out = hic.store_dir(src)
+    if not (out / "meta.json").exists():
+        hic.build(src, hic.fasta_sizes(t.path("genome_fasta")))
+    return [out]
+
+
+def _correlation_result(t: Target):
+    from showcase import correlation, store
+    tables = t.study.dir_in(store.STORE_DIR)
+    frames = lambda: tuple(store.ensure(k, t.path(k), tables).frame()
+                           for k in ("expression_matrix", "metabolite_table"))
+    return correlation.ensure(frames, t.path("expression_matrix"), t.path("metabolite_table"), CORRELATION_TOP_K)
+
+
+def _correlation(t: Target) -> list[Path]:
+    return [_correlation_result(t)[1]]
+
+
+def _de(t: Target) -> list[Path]:
+    from showcase import deseq
+    return list(deseq.run_contrasts(t.path("count_matrix"), t.path("sample_sheet"),
+                                    deseq.contrasts_from_config(t.cfg), t.jobs).values())
+
+
+def _modules_sources(t: Target) -> list[Path] | None:
+    if not t.path("expression_matrix"):
+        return None
+    return [p for p in (t.path("expression_matrix"), t.path("metabolite_table")) if p]
+
+
+def _modules(t: Target) -> list[Path]:
+    from showcase import modules
+    from showcase.data import read_matrix
+    expr, met = t.path("expression_matrix"), t.path("metabolite_table")
+    params = modules.params_from_config(t.cfg, n_jobs=t.jobs)
+    out = modules.result_dir(expr, met, params)
+    if not (out / "meta.json").exists():
+        res = modules.build_modules(read_matrix(expr), read_matrix(met) if met else None, params)
+        modules.save(res, out, params)
+    return [out]
+
+
+def _modules_params(t: Target) -> dict:
+    from showcase import modules
+    return modules.result_params(modules.params_from_config(t.cfg))
+
+
+def _pca(t: Target, key: str) -> list[Path]:
+    from showcase import multivariate, store
+    out = multivariate.pca_path(t.path(key), *PCA_DEFAULT)
+    if not out.exists():
+        m = store.ensure(key, t.path(key), t.study.dir_in(store.STORE_DIR))
+        multivariate.save_pca(multivariate.fit_pca(m.values, 10, *PCA_DEFAULT), out)
+    return [out]
+
+
+def _network(t: Target) -> list[Path]:
+    from showcase import network
+    src = t.path("network_edges")
+    network.open_network(src)
+    return [network.cache_path(src)]
+
+
+def _protein_sources(t: Target) -> list[Path] | None:
+    if t.path("proteome"):
+        return [t.path("proteome")]
+    return _needs("genome_fasta", "genome_gff3")(t)
+
+
+def _family_sources(t: Target) -> list[Path] | None:
+    proteins = _protein_sources(t)
+    return [t.path("gene_annotation"), *proteins] if proteins and t.path("gene_annotation") else None
+
+
+def _similarity(t: Target, family: bool) -> list[Path]:
+    import pandas as pd
+    from showcase import similarity
+    genes = None
+    if family:
+        ann = pd.read_csv(t.path("gene_annotation"), sep="\t", dtype=str, usecols=["gene", "family"])
+        genes = sorted(ann.loc[ann["family"] == FAMILY, "gene"])
+    sources = _protein_sources(t)
+    if t.path("proteome"):
+        fetch = lambda: similarity.read_proteins(sources[0], genes)
+    else:
+        from showcase.genome import Genome
+        fetch = lambda: similarity.translate_genes(Genome(*sources), genes)
+    return [similarity.ensure(fetch, sources, genes, similarity.SimilarityParams(n_jobs=t.jobs))[1]]
+
+
+def _figures(t: Target) -> list[Path] | None:
+    found = [ROOT / f["img"] for f in t.cfg.get("figures") or () if (ROOT / f["img"]).exists()]
+    return found or None
+
+
+def _thumbnails(t: Target) -> list[Path]:
+    from showcase import images
+    return [images.derivative(src, w) for src in _figures(t) for w in (*images.SIZE_BUCKETS, None)]
+
+
+def _download_params(t: Target):
+    from showcase import downloads
+    return [t.snap.digest, downloads.FORMATS]
+
+
+def _downloads(t: Target) -> list[Path]:
+    # The bundle and the candidate list need app state; the Resources page builds them on request
+    from showcase import downloads
+    hits = (lambda: _correlation_result(t)[0].hits) if _needs("expression_matrix", "metabolite_table")(t) else None
+    out_dir = t.study.dir_in(downloads.EXPORT_DIR)
+    return [downloads.build(e, fmt, out_dir).path
+            for e in downloads.standard_exports(t.snap, hits) for fmt in downloads.FORMATS]
+
+
+def graph(t: Target) -> dict[str, Artifact]:
+    """Every derived artifact of the study, dependencies first."""
+    from showcase.data import table_keys
+    tables = table_keys(t.cfg)
+    arts = [Artifact(f"store:{k}", 3, f"Matrix store · {k}", _needs(k), lambda t, k=k: _store(t, k))
+            for k in tables]
+    arts += [
+        Artifact("genome", 3, "Genome .fai + GFF3 index", _needs("genome_fasta", "genome_gff3"), _genome),
+        Artifact("hic", 3, "Hi-C contact pyramid", _needs("hic_pairs"), _hic, deps=("genome",),
+                 params=lambda t: t.path("genome_fasta") and file_digest(t.path("genome_fasta"))),
+        Artifact("correlation", 4, "Gene–metabolite correlation", _needs("expression_matrix", "metabolite_table"),
+                 _correlation, deps=("store:expression_matrix", "store:metabolite_table"),
+                 params=lambda t: CORRELATION_TOP_K),
+        Artifact("de", 4, "Differential expression contrasts", _needs("count_matrix", "sample_sheet"), _de,
+                 params=lambda t: [dict(c) for c in t.cfg.get("contrasts") or ()]),
+        Artifact("modules", 4, "Co-expression modules", _modules_sources, _modules, params=_modules_params),
+    ]
+    arts += [Artifact(f"pca:{k}", 4, f"PCA · {k}", _needs(k), lambda t, k=k: _pca(t, k),
+                      deps=(f"store:{k}",), params=lambda t: PCA_DEFAULT)
+             for k in ("feature_table", "metabolite_table") if k in tables]
+    arts += [
+        Artifact("network", 4, "Network index + layout", _needs("network_edges"), _network),
+        Artifact("families", 5, f"{FAMILY} family similarity + tree", _family_sources,
+                 lambda t: _similarity(t, family=True), deps=("genome",), params=lambda t: FAMILY),
+        Artifact("proteome", 5, "Proteome-wide similarity", _protein_sources,
+                 lambda t: _similarity(t, family=False), deps=("genome",)),
+        Artifact("thumbnails", 7, "Figure thumbnails", _figures, _thumbnails),
+        Artifact("downloads", 7, "Download center tables", lambda t: [], _downloads,
+                 deps=("correlation", "modules"), params=_download_params),
+    ]
+    return {a.name: a for a in arts}
+
+
+def keys(t: Target, g: dict[str, Artifact]) -> dict[str, str | None]:
+    """Artifact → key over its inputs, parameters and dependencies (None when an input is missing)."""
+    out: dict[str, str | None] = {}
+    for name, a in g.items():
+        sources = a.sources(t)
+        if sources is None:
+            out[name] = None
+            continue
+        parts = [name, [file_digest(p) for p in sources], a.params(t), [out.get(d) for d in a.deps]]
+        out[name] = hashlib.sha256(json.dumps(parts, sort_keys=True, default=str).encode()).hexdigest()[:16]
+    return out
+
+
+# ── Ledger ─────────────────────────────────────────────────────────────────────
+def ledger_path(study_id: str) -> Path:
+    return CACHE_DIR / f"{study_id}.json"
+
+
+def read_ledger(study_id: str) -> dict:
+    try:
+        return json.loads(ledger_path(study_id).read_text())
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def _update(study_id: str, name: str, **fields) -> None:
+    """Merge ``fields`` into the ledger entry of ``name`` (None removes a field)."""
+    with _ledger_lock:
+        ledger = read_ledger(study_id)
+        entry = ledger.setdefault(name, {})
+        entry.update(fields)
+        for k in [k for k, v in entry.items() if v is None]:
+            del entry[k]
+        path = ledger_path(study_id)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_text(json.dumps(ledger, indent=2, sort_keys=True))
+        tmp.replace(path)
+
+
+def _alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def building(study_id: str, name: str, ledger: dict | None = None) -> dict | None:
+    """Ledger entry of ``name`` while a live process is (re)building it, else None."""
+    entry = (read_ledger(study_id) if ledger is None else ledger).get(name, {})
+    b = entry.get("building")
+    return entry if b and _alive(b["pid"]) else None
+
+
+def previous(study_id: str, name: str, ledger: dict | None = None) -> Path | None:
+    """Main output of the last completed build of ``name``, if it is still on disk."""
+    outputs = (read_ledger(study_id) if ledger is None else ledger).get(name, {}).get("outputs") or []
+    return Path(outputs[0]) if outputs and Path(outputs[0]).exists() else None
+
+
+def _fresh(entry: dict | None, key: str) -> bool:
+    return bool(entry) and entry.get("key") == key and all(Path(p).exists() for p in entry.get("outputs", ()))
+
+
+def status(t: Target) -> list[dict]:
+    """One row per artifact: stage, state (fresh / stale / building / failed / no input) and last build."""
+    g = graph(t)
+    ks = keys(t, g)
+    ledger = read_ledger(t.study.id)
+    rows = []
+    for name, a in g.items():
+        entry = ledger.get(name, {})
+        if ks[name] is None:
+            state = "no input"
+        elif building(t.study.id, name, ledger):
+            state = "building"
+        elif _fresh(entry, ks[name]):
+            state = "fresh"
+        else:
+            state = "failed" if entry.get("status") == "failed" else "stale"
+        rows.append({"stage": a.stage, "artifact": name, "label": a.label, "state": state,
+                     "seconds": entry.get("seconds"), "finished": entry.get("finished"),
+                     "error": entry.get("error")})
+    return rows
+
+
+# ── Scheduler ──────────────────────────────────────────────────────────────────
+def _acquire(study_id: str) -> Path:
+    lock = CACHE_DIR / f"{study_id}.lock"
+    lock.parent.mkdir(parents=True, exist_ok=True)
+    for _ in range(2):
+        try:
+            fd = os.open(lock, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            try:
+                pid = int(lock.read_text() or 0)
+            except (OSError, ValueError):
+                pid = 0
+            if pid and _alive(pid):
+                raise Busy(f"precompute for {study_id!r} is already running (pid {pid})")
+            lock.unlink(missing_ok=True)              # left behind by a process that died
+            continue
+        with os.fdopen(fd, "w") as f:
+            f.write(str(os.getpid()))
+        return lock
+    raise Busy(f"could not take {lock}")
+
+
+def _closure(g: dict[str, Artifact], names) -> list[str]:
+    want, stack = set(), list(names)
+    while stack:
+        n = stack.pop()
+        if n in g and n not in want:
+            want.add(n)
+            stack += g[n].deps
+    return [n for n in g if n in want]
+
+
+def _timed_build(a: Artifact, t: Target) -> tuple[list[Path], float]:
+    t0 = time.perf_counter()
+    with metrics.timer(f"precompute:{a.name}"):
+        outputs = a.build(t)
+    return outputs, time.perf_counter() - t0
+
+
+def run(t: Target, only=None, workers: int | None = None, force: bool = False,
+        log: Callable[[str], None] | None = None) -> dict[str, str]:
+    """
+    Build the stale artifacts (``only`` these and their dependencies),
+    ``workers`` at a time. Returns artifact → outcome: built, fresh, no input,
+    failed or blocked. Raises ``Busy`` if another process is already at it.
+    """
+    g = graph(t)
+    names = _closure(g, only) if only else list(g)
+    ks = keys(t, g)
+    ledger = read_ledger(t.study.id)
+    todo = [n for n in names if ks[n] and (force or not _fresh(ledger.get(n), ks[n]))]
+    outcome = {n: "fresh" if ks[n] else "no input" for n in names if n not in todo}
+    waiting = {n: {d for d in g[n].deps if d in todo} for n in todo}
+    lock = _acquire(t.study.id)
+
+    def block(failed: str) -> None:
+        for n in [n for n, deps in waiting.items() if failed in deps]:
+            del waiting[n]
+            outcome[n] = f"blocked by {failed}"
+            block(n)
+
+    try:
+        with ThreadPoolExecutor(max_workers=workers or os.cpu_count() or 1,
+                                thread_name_prefix="precompute") as pool:
+            running = {}
+            while waiting or running:
+                for n in [n for n, deps in waiting.items() if not deps]:
+                    del waiting[n]
+                    _update(t.study.id, n, stage=g[n].stage, label=g[n].label,
+                            building={"key": ks[n], "pid": os.getpid(), "started": time.time()})
+                    running[pool.submit(_timed_build, g[n], t)] = n
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for f in done:
+                    n = running.pop(f)
+                    try:
+                        outputs, seconds = f.result()
+                    except Exception as e:
+                        _update(t.study.id, n, building=None, status="failed", error=f"{type(e).__name__}: {e}")
+                        outcome[n] = "failed"
+                        block(n)
+                        if log:
+                            log(f"{n:<28} FAILED {type(e).__name__}: {e}")
+                        continue
+                    _update(t.study.id, n, building=None, status="ok", error=None, key=ks[n],
+                            outputs=[str(p) for p in outputs], seconds=round(seconds, 2), finished=time.time())
+                    outcome[n] = "built"
+                    for deps in waiting.values():
+                        deps.discard(n)
+                    if log:
+                        log(f"{n:<28} built in {seconds:.1f} s")
+    finally:
+        lock.unlink(missing_ok=True)
+    return {n: outcome[n] for n in names}
+
+
+def start(study: catalog.Study, workers: int | None = None) -> threading.Thread:
+    """
+    Run the scheduler for ``study`` in a daemon thread (server start). By
+    default it takes half the CPUs so the server stays responsive.
+    """
+    cpus = os.cpu_count() or 1
+    workers = workers or max(1, cpus // 2)
+
+    def work():
+        try:
+            run(Target.of(study, jobs=max(1, cpus // (2 * workers))), workers=workers)
+        except Busy:
+            pass                                        # a deploy step or another worker is on it
+
+    thread = threading.Thread(target=work, name=f"precompute-{study.id}", daemon=True)
+    thread.start()
+    return thread
+
+
+if __name__ == "__main__":
+    # python -m showcase.precompute — build every stale artifact of every study (or --study ID)
+    import argparse
+
+    ap = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    ap.add_argument("--study", help="study id from catalog.yaml (default: all)")
+    ap.add_argument("--only", nargs="+", metavar="NAME", help="these artifacts and their dependencies")
+    ap.add_argument("--jobs", type=int, help="artifacts built at once (default: CPU count)")
+    ap.add_argument("--force", action="store_true", help="re-run the builders of fresh artifacts too")
+    ap.add_argument("--list", action="store_true", help="show each artifact's state and last build time")
+    args = ap.parse_args()
+
+    studies = [s for s in catalog.load() if args.study in (None, s.id)]
+    if not studies:
+        raise SystemExit(f"no study {args.study!r} in {catalog.CATALOG_PATH.name}")
+    workers = args.jobs or os.cpu_count() or 1
+    for s in studies:
+        target = Target.of(s, jobs=max(1, (os.cpu_count() or 1) // workers))
+        print(f"── {s.id}")
+        if args.list:
+            for r in status(target):
+                took = f"{r['seconds']:8.1f} s" if r["seconds"] is not None else " " * 10
+                print(f"  {r['stage']}  {r['artifact']:<28} {r['state']:<9} {took}  {r['error'] or ''}")
+            continue
+        unknown = set(args.only or ()) - set(graph(target))
+        if unknown:
+            raise SystemExit(f"unknown artifact(s) {', '.join(sorted(unknown))}; see --list")
+        t0 = time.perf_counter()
+        try:
+            result = run(target, args.only, workers, args.force, log=lambda line: print(f"  {line}"))
+        except Busy as e:
+            raise SystemExit(str(e))
+        skipped = {o: sum(v == o for v in result.values()) for o in ("fresh", "no input")}
+        print(f"  {sum(v == 'built' for v in result.values())} built, {skipped['fresh']} fresh, "
+              f"{skipped['no input']} without input, "
+              f"{sum(v.startswith(('failed', 'blocked')) for v in result.values())} failed or blocked "
+              f"in {time.perf_counter() - t0:.1f} s")
@@ -0,0 +1,233 @@
+"""
+Candidate prioritization (Pipeline stage 5): per-gene evidence features → weighted score → top-k.
+
+* Feature builders turn each upstream result (correlation hits, module
+  memberships, DE contrasts, expression, functional annotation) into a few
+  per-gene columns. Each source is built and cached on its own, so a changed
+  input only rebuilds its columns.
+* ``Ranker`` rank-normalises every column once, then keeps a running weighted
+  score and a per-gene count of failed thresholds. Moving one weight or one
+  threshold updates only that column's contribution; the shortlist is a heap
+  top-k over the genes that pass every threshold. ``fork`` gives each
+  session its own weights over one shared set of normalised columns.
+
+Weights, thresholds and the shortlist size live in ``config/prioritization.yaml``.
+"""
+
+import copy
+import heapq
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import yaml
+
+CONFIG_PATH = Path(__file__).resolve().parent.parent / "config" / "prioritization.yaml"
+TEXT_COLUMNS = ("family", "description")      # annotation text the family filter searches
+
+
+@dataclass(frozen=True)
+class Criterion:
+    feature: str
+    weight: float
+    min: float | None = None        # gene fails when feature < min (NaN fails)
+    label: str = ""
+
+
+def load_config(path: Path = CONFIG_PATH) -> tuple[list[Criterion], dict]:
+    """Criteria plus the remaining settings (``candidates``, ``family``, …)."""
+    cfg = yaml.safe_load(Path(path).read_text(encoding="utf-8")) or {}
+    crit = [Criterion(feature=k, weight=float(v.get("weight", 0.0)),
+                      min=None if v.get("min") is None else float(v["min"]), label=v.get("label", k))
+            for k, v in (cfg.pop("features", None) or {}).items()]
+    return crit, cfg
+
+
+# ── Feature builders ───────────────────────────────────────────────────────────
+def correlation_features(hits: pd.DataFrame, max_fdr: float = 0.05) -> pd.DataFrame:
+    """Strongest |r| to any metabolite and the number of metabolites correlated at ``max_fdr``."""
+    h = hits.assign(abs_r=hits["r"].abs())
+    sig = h[h["q"] <= max_fdr]
+    return pd.DataFrame({
+        "max_abs_r": h.groupby("gene")["abs_r"].max(),
+        "n_metabolites": sig.groupby("gene")["metabolite"].nunique(),
+    }).fillna({"n_metabolites": 0})
+
+
+def module_features(assignments: pd.DataFrame, trait_cor: pd.DataFrame) -> pd.DataFrame:
+    """Module membership (kME) and the gene's module's strongest |r| with any trait."""
+    a = assignments.assign(gene=assignments["gene"].astype(str)).set_index("gene")
+    out = pd.DataFrame({"kme": a["kME"].abs(), "module": a["module"]})
+    if len(trait_cor):
+        best = trait_cor.assign(abs_r=trait_cor["r"].abs()).groupby("module")["abs_r"].max()
+        out["module_trait_r"] = out["module"].map(best)
+    return out
+
+
+def de_features(results: dict[str, pd.DataFrame], max_padj: float = 0.05) -> pd.DataFrame:
+    """Largest significant |log2FC| over the contrasts and how many contrasts call the gene."""
+    frames = [r.set_index(r["gene"].astype(str))[["log2FoldChange", "padj"]] for r in results.values()]
+    if not frames:
+        return pd.DataFrame()
+    lfc = pd.concat([f["log2FoldChange"].abs().where(f["padj"] <= max_padj) for f in frames], axis=1)
+    return pd.DataFrame({"max_abs_lfc": lfc.max(axis=1).fillna(0.0), "n_contrasts": lfc.notna().sum(axis=1)})
+
+
+def expression_features(values: np.ndarray, genes) -> pd.DataFrame:
+    """Mean and max expression per gene (values as stored: genes × samples)."""
+    v = np.asarray(values, dtype=np.float64)
+    return pd.DataFrame({"mean_expr": np.nanmean(v, axis=1), "max_expr": np.nanmax(v, axis=1)},
+                        index=pd.Index(genes, dtype=str))
+
+
+def annotation_features(path: Path) -> pd.DataFrame:
+    """gene → family / description columns from a TSV/CSV annotation table."""
+    path = Path(path)
+    df = pd.read_csv(path, sep="," if path.suffix == ".csv" else "\t", index_col=0, dtype=str)
+    df.index = df.index.astype(str)
+    return df.rename(columns=str.lower)
+
+
+def text_mask(features: pd.DataFrame, pattern: str, columns=TEXT_COLUMNS) -> np.ndarray:
+    """Genes whose family / description matches ``pattern`` (case-insensitive regex; raises ``re.error``)."""
+    mask = np.zeros(len(features), dtype=bool)
+    for col in columns:
+        if col in features:
+            text = features[col].astype(object).fillna("")     # object dtype: Python re, not arrow's RE2
+            mask |= text.str.contains(pattern, case=False, regex=True).to_numpy()
+    return mask
+
+
+def family_mask(features: pd.DataFrame, pattern: str | None) -> np.ndarray | None:
+    """
+    Eligibility under the family filter, or None when there is nothing to
+    filter on: an empty pattern, or no annotation text columns (without them
+    every gene would be excluded). Raises ``re.error`` for an invalid pattern.
+    """
+    columns = [c for c in TEXT_COLUMNS if c in features]
+    if not pattern or not columns:
+        return None
+    return text_mask(features, pattern, columns)
+
+
+def feature_table(genes, *parts: pd.DataFrame) -> pd.DataFrame:
+    """Outer-join feature blocks onto the gene universe."""
+    out = pd.DataFrame(index=pd.Index(genes, dtype=str, name="gene"))
+    for p in parts:
+        if p is not None and len(p):
+            out = out.join(p[[c for c in p.columns if c not in out.columns]])
+    return out
+
+
+# ── Ranking ────────────────────────────────────────────────────────────────────
+def _percentile(x: np.ndarray) -> np.ndarray:
+    """Rank-normalise to [0, 1]; NaN → 0."""
+    out = np.zeros(len(x))
+    ok = ~np.isnan(x)
+    if ok.sum() > 1:
+        r = pd.Series(x[ok]).rank(method="average").to_numpy()
+        out[ok] = (r - 1) / (ok.sum() - 1)
+    elif ok.any():
+        out[ok] = 1.0
+    return out
+
+
+class Ranker:
+    """Incremental weighted score over a fixed feature table."""
+
+    def __init__(self, features: pd.DataFrame, criteria: list[Criterion]):
+        self.genes = features.index.to_numpy()
+        self.features = features
+        self.raw = {c.feature: features[c.feature].to_numpy(np.float64)
+                    for c in criteria if c.feature in features}
+        self.norm = {k: _percentile(v) for k, v in self.raw.items()}
+        self.weight = {k: 0.0 for k in self.raw}
+        self.min: dict[str, float | None] = {k: None for k in self.raw}
+        self.score = np.zeros(len(self.genes))
+        self.fails = np.zeros(len(self.genes), dtype=np.int16)
+        self.eligible = np.ones(len(self.genes), dtype=bool)       # e.g. the family filter
+        self.updates = 0
+        for c in criteria:
+            if c.feature in self.raw:
+                self.set_weight(c.feature, c.weight)
+                self.set_min(c.feature, c.min)
+
+    def fork(self) -> "Ranker":
+        """Independent weights and thresholds over the same (read-only) feature columns."""
+        other = copy.copy(self)
+        other.weight, other.min = dict(self.weight), dict(self.min)
+        other.score, other.fails, other.eligible = self.score.copy(), self.fails.copy(), self.eligible.copy()
+        other.updates = 0
+        return other
+
+    def _fail(self, feature: str, threshold: float | None) -> np.ndarray:
+        if threshold is None:
+            return np.zeros(len(self.genes), dtype=np.int16)
+        x = self.raw[feature]
+        return (np.isnan(x) | (x < threshold)).astype(np.int16)
+
+    def set_weight(self, feature: str, weight: float) -> None:
+        old = self.weight[feature]
+        if weight != old:
+            self.score += (weight - old) * self.norm[feature]
+            self.weight[feature] = weight
+            self.updates += 1
+
+    def set_min(self, feature: str, threshold: float | None) -> None:
+        old = self.min[feature]
+        if threshold != old:
+            self.fails += self._fail(feature, threshold) - self._fail(feature, old)
+            self.min[feature] = threshold
+            self.updates += 1
+
+    def set_eligible(self, mask: np.ndarray) -> None:
+        if not np.array_equal(mask, self.eligible):
+            self.eligible = mask
+            self.updates += 1
+
+    def normalised_score(self) -> np.ndarray:
+        total = sum(abs(w) for w in self.weight.values()) or 1.0
+        return self.score / total
+
+    def top(self, k: int) -> pd.DataFrame:
+        """The ``k`` best genes passing every threshold, with score and features."""
+        idx = np.flatnonzero((self.fails == 0) & self.eligible)
+        score = self.normalised_score()
+        best = heapq.nlargest(k, idx.tolist(), key=score.__getitem__)
+        out = self.features.iloc[best].reset_index()
+        out.insert(1, "score", score[best])
+        out.insert(0, "rank", np.arange(1, len(best) + 1))
+        return out
+
+    @property
+    def n_passing(self) -> int:
+        return int(((self.fails == 0) & self.eligible).sum())
+
+
+def shortlist(ranker: Ranker, family: str | None) -> pd.DataFrame:
+    """Every gene passing the thresholds, restricted to ``family`` where the table has annotation text."""
+    mask = family_mask(ranker.features, family)
+    if mask is not None:
+        ranker.set_eligible(mask)
+    return ranker.top(ranker.n_passing)
+
+
+if __name__ == "__main__":
+    # python -m showcase.prioritize — print the configured criteria and a synthetic re-rank timing
+    import time
+
+    crit, settings = load_config()
+    n = 30_000
+    rng = np.random.default_rng(0)
+    feats = pd.DataFrame(rng.random((n, len(crit))), columns=[c.feature for c in crit],
+                         index=pd.Index([f"g{i}" for i in range(n)], name="gene"))
+    t0 = time.perf_counter()
+    r = Ranker(feats, crit)
+    build = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    for c in crit:
+        r.set_weight(c.feature, c.weight * 1.5)
+        r.top(settings.get("candidates", 47))
+    per = (time.perf_counter() - t0) / max(len(crit), 1)
+    print(f"{len(crit)} criteria, {n:,} genes: build {build * 1000:.0f} ms, re-rank {per * 1000:.1f} ms")
@@ -0,0 +1,186 @@
+"""
+Full-text search over the showcase content and, when present, data-store IDs.
+
+``documents`` turns the config into small documents — one per finding,
+deliverable, glossary term, method module, impact bullet and resource — each
+tagged with the page that shows it. Feature IDs (genes, metabolites) from the
+data tables are added as one-token documents pointing at the Expression page.
+
+``Index`` is an inverted index: term → {doc: weight} with title terms
+boosted. Queries match every term exactly, by prefix (binary search over the
+sorted vocabulary) or, for words of four letters or more, within one edit
+(a single-deletion neighbourhood built over the content vocabulary, so a
+typo costs a handful of dict lookups). Documents matching all terms rank
+first; a query with no such document falls back to any-term matches.
+
+The app keeps one index per config digest and data version and only builds
+it when someone first searches.
+"""
+
+import bisect
+import math
+import re
+import time
+from dataclasses import dataclass
+
+TOKEN = re.compile(r"[a-z0-9]+")
+STOP = frozenset("a an and are as at by for from in into is of on or the to via with".split())
+EXACT, PREFIX, FUZZY = 1.0, 0.6, 0.4
+TITLE_BOOST = 2.0
+MAX_PREFIX_TERMS = 200              # expansions per query term (ID prefixes can match thousands)
+MIN_FUZZY_LEN = 4
+
+
+@dataclass(frozen=True)
+class Doc:
+    page: str
+    title: str
+    text: str
+    kind: str = "content"           # content | feature
+    table: str | None = None        # data key of a feature document
+
+
+def tokens(text: str) -> list[str]:
+    return [t for t in TOKEN.findall(text.lower()) if t not in STOP]
+
+
+def documents(cfg) -> list[Doc]:
+    """Searchable documents from ``content_config.yaml``, each tagged with its page."""
+    docs = [Doc("Overview", cfg["study"]["title"], cfg["study"]["summary"])]
+    docs += [Doc("Overview", f"{d['id']}: {d['label']}", d["detail"]) for d in cfg["deliverables"]]
+    docs += [Doc("Overview", term, defn) for term, defn in cfg["glossary"].items()]
+    for f in cfg["findings"]:
+        docs.append(Doc("Findings", f"{f['id']} — {f['claim'][:70]}",
+                        " ".join([f["claim"], f["evidence_type"], *f["artifacts"], f["why_it_matters"],
+                                  f["figure_ref"]])))
+    for key, m in cfg["methods"].items():
+        docs.append(Doc("Methods", f"Methods · {key.capitalize()}",
+                        " ".join([*m["inputs"], *m["steps"], *m["tools"], *m["outputs"]])))
+    labels = {"scientific": "Scientific impact", "resource": "Resource impact",
+              "translational": "Translational impact", "follow_ups": "Follow-up"}
+    for key, bullets in cfg["impact"].items():
+        docs += [Doc("Impact", labels.get(key, key), b) for b in bullets]
+    docs += [Doc("Resources", k.replace("_", " ").capitalize(), v) for k, v in cfg["resources"].items()]
+    return docs
+
+
+def feature_documents(table: str, ids, kind_label: str) -> list[Doc]:
+    return [Doc("Expression", str(i), kind_label, kind="feature", table=table) for i in ids]
+
+
+def _deletes(term: str) -> set[str]:
+    return {term[:i] + term[i + 1:] for i in range(len(term))}
+
+
+def _within_one(a: str, b: str) -> bool:
+    """Levenshtein distance ≤ 1 (plus adjacent transposition)."""
+    if a == b:
+        return True
+    la, lb = len(a), len(b)
+    if abs(la - lb) > 1:
+        return False
+    i = 0
+    while i < min(la, lb) and a[i] == b[i]:
+        i += 1
+    if la == lb:
+        return a[i + 1:] == b[i + 1:] or (a[i + 2:] == b[i + 2:] and a[i:i + 2] == b[i:i + 2][::-1])
+    return (a[i + 1:] == b[i:]) if la > lb else (a[i:] == b[i + 1:])
+
+
+class Index:
+    def __init__(self, docs: list[Doc]):
+        t0 = time.perf_counter()
+        self.docs = docs
+        self.postings: dict[str, dict[int, float]] = {}
+        for i, d in enumerate(docs):
+            if d.kind == "feature":
+                self._add(d.title.lower(), i, TITLE_BOOST)
+                continue
+            for t in tokens(d.title):
+                self._add(t, i, TITLE_BOOST)
+            for t in tokens(d.text):
+                self._add(t, i, 1.0)
+        self.vocab = sorted(self.postings)
+        self.idf = {t: math.log(1 + len(docs) / len(p)) for t, p in self.postings.items()}
+        content = {t for i, d in enumerate(docs) if d.kind == "content" for t in tokens(f"{d.title} {d.text}")}
+        self.neighbours: dict[str, set[str]] = {}
+        for t in content:
+            if len(t) >= MIN_FUZZY_LEN:
+                for v in _deletes(t) | {t}:
+                    self.neighbours.setdefault(v, set()).add(t)
+        self.build_seconds = time.perf_counter() - t0
+
+    def _add(self, term: str, doc: int, weight: float) -> None:
+        p = self.postings.setdefault(term, {})
+        p[doc] = max(p.get(doc, 0.0), weight)
+
+    def expand(self, q: str) -> dict[str, float]:
+        """Index terms matching query term ``q`` → match weight (exact > prefix > fuzzy)."""
+        out = {}
+        lo = bisect.bisect_left(self.vocab, q)
+        for t in self.vocab[lo:lo + MAX_PREFIX_TERMS]:
+            if not t.startswith(q):
+                break
+            out[t] = EXACT if t == q else PREFIX
+        if len(q) >= MIN_FUZZY_LEN:
+            cands = set(self.neighbours.get(q, ()))
+            for v in _deletes(q):
+                cands |= self.neighbours.get(v, set())
+            for t in cands:
+                if t not in out and _within_one(q, t):
+                    out[t] = FUZZY
+        return out
+
+    def _query_terms(self, query: str) -> list[dict[str, float]]:
+        """Expansions per query term; a word that prefixes an ID (``gene_00``) stays whole."""
+        out = []
+        for word in query.lower().split():
+            whole = self.expand(word) if not TOKEN.fullmatch(word) else {}
+            if whole:
+                out.append(whole)
+            else:
+                out += [self.expand(t) for t in TOKEN.findall(word) if t not in STOP]
+        return out
+
+    def search(self, query: str, limit: int = 10) -> list[tuple[Doc, float]]:
+        terms = self._query_terms(query)
+        if not terms:
+            return []
+        per_term = []
+        for expansions in terms:
+            scores: dict[int, float] = {}
+            for t, w in expansions.items():
+                for doc, boost in self.postings[t].items():
+                    s = w * boost * self.idf[t]
+                    if s > scores.get(doc, 0.0):
+                        scores[doc] = s
+            per_term.append(scores)
+        hits = set.intersection(*(set(s) for s in per_term)) or set().union(*per_term)
+        ranked = sorted(((sum(s.get(d, 0.0) for s in per_term), d) for d in hits), reverse=True)[:limit]
+        return [(self.docs[d], score) for score, d in ranked]
+
+
+if __name__ == "__main__":
+    # python -m showcase.search "query" — build from the config and data store, print hits and timings
+    import sys
+    from pathlib import Path
+
+    from showcase.config import compile_config
+    from showcase.data import data_path, table_keys
+    from showcase.store import ensure
+
+    root = Path(__file__).resolve().parent.parent
+    cfg = compile_config(root / "content_config.yaml").cfg
+    docs = documents(cfg)
+    for key in table_keys(cfg):
+        if data_path(cfg, key):
+            docs += feature_documents(key, ensure(key, data_path(cfg, key)).rows, key.replace("_", " "))
+    idx = Index(docs)
+    print(f"{len(docs):,} documents, {len(idx.vocab):,} terms, built in {idx.build_seconds * 1000:.0f} ms")
+    for query in sys.argv[1:] or ["methyltransferase", "methyltransferse", "omt", "busco"]:
+        t0 = time.perf_counter()
+        hits = idx.search(query)
+        ms = (time.perf_counter() - t0) * 1000
+        print(f"\n{query!r}: {len(hits)} hits in {ms:.2f} ms")
+        for d, s in hits[:5]:
+            print(f"  {s:6.2f}  [{d.page}] {d.title}")
@@ -0,0 +1,534 @@
+"""
+Protein similarity within a gene family or across the proteome.
+
+All-vs-all alignment is quadratic, so it runs in two passes:
+
+1. **MinHash.** Each protein becomes the set of its k-mers over the Murphy
+   10-letter reduced alphabet (conservative substitutions keep a k-mer
+   intact). ``num_hashes`` independent hashes give a signature whose agreement
+   rate between two proteins estimates their k-mer Jaccard index. Up to
+   ``ALL_PAIRS_MAX`` proteins, every pair of signatures is compared. Above
+   that, LSH banding (``band_rows`` signature rows per band) proposes only
+   the pairs that collide in some band.
+2. **Smith–Waterman.** Only pairs with an estimated Jaccard index of at least
+   ``min_jaccard`` are aligned exactly (BLOSUM62, affine gaps). The alignment
+   runs in numpy over a batch of pairs at once. Within a row, the horizontal
+   gap term is a running maximum, so each matrix row costs a handful of
+   array operations for the whole batch. Batches are spread over a process
+   pool.
+
+Similarity is the local alignment score divided by the geometric mean of the
+two self-scores (0–1). Pairs never aligned count as unrelated (0). Results
+are cached under ``.cache/similarity/<key>/``, keyed by the protein source,
+the gene set and the parameters. The cache holds the sparse pair table and,
+for sets of at most ``TREE_MAX`` proteins, a neighbour-joining tree.
+
+Proteins come from ``data.proteome`` (protein FASTA) when configured, else
+from the CDS of each gene in the genome FASTA + GFF3, translated here.
+"""
+
+import argparse
+import hashlib
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from showcase.util import file_digest, staged_dir
+
+CACHE_DIR = Path(__file__).resolve().parent.parent / ".cache" / "similarity"
+ALL_PAIRS_MAX = 2000            # compare every signature pair up to this many proteins, LSH above
+TREE_MAX = 500                  # neighbour joining is O(n³)
+BATCH_CELLS = 100_000           # pairs × columns per alignment batch (row state stays in cache)
+LENGTH_BIN = 1.25               # pairs are batched within geometric length bins of both sequences
+
+# ── Alphabet and scoring ───────────────────────────────────────────────────────
+ALPHABET = "ARNDCQEGHILKMFPSTWYVBZX*"
+_BLOSUM62 = """
+ 4 -1 -2 -2  0 -1 -1  0 -2 -1 -1 -1 -1 -2 -1  1  0 -3 -2  0 -2 -1  0 -4
+-1  5  0 -2 -3  1  0 -2  0 -3 -2  2 -1 -3 -2 -1 -1 -3 -2 -3 -1  0 -1 -4
+-2  0  6  1 -3  0  0  0  1 -3 -3  0 -2 -3 -2  1  0 -4 -2 -3  3  0 -1 -4
+-2 -2  1  6 -3  0  2 -1 -1 -3 -4 -1 -3 -3 -1  0 -1 -4 -3 -3  4  1 -1 -4
+ 0 -3 -3 -3  9 -3 -4 -3 -3 -1 -1 -3 -1 -2 -3 -1 -1 -2 -2 -1 -3 -3 -2 -4
+-1  1  0  0 -3  5  2 -2  0 -3 -2  1  0 -3 -1  0 -1 -2 -1 -2  0  3 -1 -4
+-1  0  0  2 -4  2  5 -2  0 -3 -3  1 -2 -3 -1  0 -1 -3 -2 -2  1  4 -1 -4
+ 0 -2  0 -1 -3 -2 -2  6 -2 -4 -4 -2 -3 -3 -2  0 -2 -2 -3 -3 -1 -2 -1 -4
+-2  0  1 -1 -3  0  0 -2  8 -3 -3 -1 -2 -1 -2 -1 -2 -2  2 -3  0  0 -1 -4
+-1 -3 -3 -3 -1 -3 -3 -4 -3  4  2 -3  1  0 -3 -2 -1 -3 -1  3 -3 -3 -1 -4
+-1 -2 -3 -4 -1 -2 -3 -4 -3  2  4 -2  2  0 -3 -2 -1 -2 -1  1 -4 -3 -1 -4
+-1  2  0 -1 -3  1  1 -2 -1 -3 -2  5 -1 -3 -1  0 -1 -3 -2 -2  0  1 -1 -4
+-1 -1 -2 -3 -1  0 -2 -3 -2  1  2 -1  5  0 -2 -1 -1 -1 -1  1 -3 -1 -1 -4
+-2 -3 -3 -3 -2 -3 -3 -3 -1  0  0 -3  0  6 -4 -2 -2  1  3 -1 -3 -3 -1 -4
+-1 -2 -2 -1 -3 -1 -1 -2 -2 -3 -3 -1 -2 -4  7 -1 -1 -4 -3 -2 -2 -1 -2 -4
+ 1 -1  1  0 -1  0  0  0 -1 -2 -2  0 -1 -2 -1  4  1 -3 -2 -2  0  0  0 -4
+ 0 -1  0 -1 -1 -1 -1 -2 -2 -1 -1 -1 -1 -2 -1  1  5 -2 -2  0 -1 -1  0 -4
+-3 -3 -4 -4 -2 -2 -3 -2 -2 -3 -2 -3 -1  1 -4 -3 -2 11  2 -3 -4 -3 -2 -4
+-2 -2 -2 -3 -2 -1 -2 -3  2 -1 -1 -2 -1  3 -3 -2 -2  2  7 -1 -3 -2 -1 -4
+ 0 -3 -3 -3 -1 -2 -2 -3 -3  3  1 -2  1 -1 -2 -2  0 -3 -1  4 -3 -2 -1 -4
+-2 -1  3  4 -3  0  1 -1  0 -3 -4  0 -3 -3 -2  0 -1 -4 -3 -3  4  1 -1 -4
+-1  0  0  1 -3  3  4 -2  0 -3 -3  1 -1 -3 -1  0 -1 -3 -2 -2  1  4 -1 -4
+ 0 -1 -1 -1 -2 -1 -1 -1 -1 -1 -1 -1 -1 -1 -2  0  0 -2 -1 -1 -1 -1 -1 -4
+-4 -4 -4 -4 -4 -4 -4 -4 -4 -4 -4 -4 -4 -4 -4 -4 -4 -4 -4 -4 -4 -4 -4  1
+"""
+PAD = len(ALPHABET)                             # batch padding; scores far below any alignment
+_S = len(ALPHABET) + 1
+SCORES = np.full((_S, _S), -10_000, dtype=np.int32)
+SCORES[:PAD, :PAD] = np.array(_BLOSUM62.split(), dtype=np.int32).reshape(PAD, PAD)
+_CODE = np.full(256, ALPHABET.index("X"), dtype=np.uint8)
+for _i, _c in enumerate(ALPHABET):
+    _CODE[ord(_c)] = _CODE[ord(_c.lower())] = _i
+# Murphy et al. (2000) 10-letter alphabet for the k-mer sketches
+_MURPHY10 = ("LVIM", "C", "A", "G", "ST", "P", "FYW", "EDNQ", "KR", "H")
+_REDUCED = np.zeros(_S, dtype=np.uint64)
+for _g, _letters in enumerate(_MURPHY10):
+    for _c in _letters:
+        _REDUCED[ALPHABET.index(_c)] = _g
+_REDUCED[[ALPHABET.index(c) for c in "BZX*"]] = [7, 7, 0, 0]
+
+_CODONS = {a + b + c: aa for (a, b, c), aa in zip(
+    ((a, b, c) for a in "TCAG" for b in "TCAG" for c in "TCAG"),
+    "FFLLSSSSYY**CC*WLLLLPPPPHHQQRRRRIIIMTTTTNNKKSSRRVVVVAAAADDEEGGGG")}
+
+
+@dataclass(frozen=True)
+class SimilarityParams:
+    k: int = 5                      # k-mer length (reduced alphabet)
+    num_hashes: int = 128
+    band_rows: int = 2              # LSH: signature rows per band
+    min_jaccard: float = 0.05       # estimated Jaccard needed for exact alignment
+    max_bucket: int = 1000          # LSH buckets larger than this are low-complexity noise
+    gap_open: int = 11
+    gap_extend: int = 1
+    n_jobs: int | None = None
+    seed: int = 0
+
+
+@dataclass(frozen=True)
+class SimilarityResult:
+    ids: list[str]
+    lengths: np.ndarray
+    pairs: pd.DataFrame             # a, b (indices into ids), jaccard, score, similarity
+    stats: dict
+
+
+# ── Proteins ───────────────────────────────────────────────────────────────────
+def translate(cds: str) -> str:
+    """Standard genetic code; a trailing stop is dropped, internal ones kept as ``*``."""
+    cds = cds.upper()
+    aa = "".join(_CODONS.get(cds[i:i + 3], "X") for i in range(0, len(cds) - 2, 3))
+    return aa[:-1] if aa.endswith("*") else aa
+
+
+def read_proteins(path: Path, genes=None) -> dict[str, str]:
+    """Protein FASTA → {first header word: sequence}, optionally limited to ``genes``."""
+    keep = set(genes) if genes is not None else None
+    out, name, parts = {}, None, []
+    with open(path) as f:
+        for line in f:
+            if line.startswith(">"):
+                if name is not None and (keep is None or name in keep):
+                    out[name] = "".join(parts)
+                name, parts = line[1:].split()[0] if line[1:].strip() else "", []
+            else:
+                parts.append(line.strip())
+    if name is not None and (keep is None or name in keep):
+        out[name] = "".join(parts)
+    return out
+
+
+def translate_genes(genome, genes=None) -> dict[str, str]:
+    """CDS of each gene (first transcript) in a ``showcase.genome.Genome``, translated."""
+    ann = genome.annotation
+    if genes is None:
+        genes = [str(g) for g, t in zip(ann.cols["id"], ann.cols["type"]) if t == "gene"]
+    out = {}
+    for g in genes:
+        try:
+            out[g] = translate(genome.spliced(g, "CDS")[1])
+        except KeyError:
+            continue
+    return out
+
+
+def encode(seq: str) -> np.ndarray:
+    return _CODE[np.frombuffer(seq.encode("ascii", "replace"), dtype=np.uint8)]
+
+
+# ── Pass 1: MinHash ────────────────────────────────────────────────────────────
+def _mix(x: np.ndarray) -> np.ndarray:
+    """splitmix64 finaliser (wrapping uint64 arithmetic)."""
+    x = x + np.uint64(0x9E3779B97F4A7C15)
+    x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return x ^ (x >> np.uint64(31))
+
+
+def signatures(codes: list[np.ndarray], params: SimilarityParams = SimilarityParams()) -> np.ndarray:
+    """(proteins × num_hashes) MinHash signatures; proteins shorter than k get all-max rows."""
+    k, h = params.k, params.num_hashes
+    salts = _mix(np.arange(1, h + 1, dtype=np.uint64) + np.uint64(params.seed << 32))
+    place = np.uint64(len(_MURPHY10)) ** np.arange(k - 1, -1, -1, dtype=np.uint64)
+    sig = np.full((len(codes), h), np.iinfo(np.uint64).max, dtype=np.uint64)
+    budget = max(1, BATCH_CELLS // h)
+    i = 0
+    while i < len(codes):                   # chunks of proteins with about ``budget`` k-mers in total
+        j, total = i, 0
+        while j < len(codes) and (j == i or total + len(codes[j]) <= budget):
+            total += max(len(codes[j]) - k + 1, 0)
+            j += 1
+        kmers, owner = [], []
+        for p in range(i, j):
+            c = codes[p]
+            if len(c) >= k:
+                win = np.lib.stride_tricks.sliding_window_view(_REDUCED[c], k)
+                kmers.append(np.unique(win @ place))
+                owner.append(np.full(len(kmers[-1]), p, dtype=np.int64))
+        if kmers:
+            kmers, owner = np.concatenate(kmers), np.concatenate(owner)
+            hashed = _mix(kmers[:, None] ^ salts[None, :])
+            starts = np.flatnonzero(np.r_[True, owner[1:] != owner[:-1]])
+            sig[owner[starts]] = np.minimum.reduceat(hashed, starts, axis=0)
+        i = j
+    return sig
+
+
+def _estimate(sig: np.ndarray, a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    return (sig[a] == sig[b]).mean(axis=1)
+
+
+def candidate_pairs(sig: np.ndarray, params: SimilarityParams = SimilarityParams()) -> tuple[np.ndarray, np.ndarray, int]:
+    """(a, b) index arrays with a < b and estimated Jaccard ≥ min_jaccard, plus the pairs examined."""
+    n = len(sig)
+    valid = np.flatnonzero(sig[:, 0] != np.iinfo(np.uint64).max)
+    if n <= ALL_PAIRS_MAX:
+        a, b = np.triu_indices(len(valid), k=1)
+        a, b = valid[a], valid[b]
+    else:
+        codes = []
+        for start in range(0, params.num_hashes - params.band_rows + 1, params.band_rows):
+            band = np.ascontiguousarray(sig[valid, start:start + params.band_rows])
+            key = _mix(band[:, 0])
+            for r in range(1, band.shape[1]):
+                key = _mix(key ^ band[:, r])
+            order = np.argsort(key, kind="stable")
+            ks = key[order]
+            bounds = np.flatnonzero(np.r_[True, ks[1:] != ks[:-1], True])
+            sizes = np.diff(bounds)
+            for lo, hi in zip(bounds[:-1][(sizes >= 2) & (sizes <= params.max_bucket)],
+                              bounds[1:][(sizes >= 2) & (sizes <= params.max_bucket)]):
+                members = np.sort(valid[order[lo:hi]])
+                ia, ib = np.triu_indices(len(members), k=1)
+                codes.append(members[ia] * n + members[ib])
+        codes = np.unique(np.concatenate(codes)) if codes else np.empty(0, dtype=np.int64)
+        a, b = codes // n, codes % n
+    examined = len(a)
+    keep = np.zeros(len(a), dtype=bool)
+    step = max(1, BATCH_CELLS // params.num_hashes)
+    for s in range(0, len(a), step):
+        keep[s:s + step] = _estimate(sig, a[s:s + step], b[s:s + step]) >= params.min_jaccard
+    return a[keep], b[keep], examined
+
+
+# ── Pass 2: Smith–Waterman ─────────────────────────────────────────────────────
+def sw_batch(a: np.ndarray, b: np.ndarray, gap_open: int = 11, gap_extend: int = 1) -> np.ndarray:
+    """
+    Best local alignment score for each row pair of ``a`` (B × n) and ``b``
+    (B × m), both ``PAD``-padded code arrays. Affine gaps cost
+    ``gap_open + gap_extend × (length − 1)``. Horizontal gaps are taken after
+    the diagonal/vertical terms as a running maximum (the "lazy F" argument),
+    which is exact because reopening a gap never beats extending one.
+    """
+    bsz, n = a.shape
+    m = b.shape[1]
+    flat = SCORES.ravel()
+    bcodes = b.astype(np.intp)
+    ramp = gap_extend * np.arange(m + 1, dtype=np.int32)
+    H = np.zeros((bsz, m + 1), dtype=np.int32)
+    F = np.full((bsz, m + 1), -(1 << 28), dtype=np.int32)
+    Hp = np.zeros((bsz, m + 1), dtype=np.int32)
+    best = np.zeros(bsz, dtype=np.int32)
+    for i in range(n):
+        s = flat[a[:, i:i + 1].astype(np.intp) * _S + bcodes]
+        np.maximum(H - gap_open, F - gap_extend, out=F)                 # vertical gap into row i
+        np.add(H[:, :-1], s, out=Hp[:, 1:])                              # diagonal
+        np.maximum(Hp[:, 1:], F[:, 1:], out=Hp[:, 1:])
+        np.maximum(Hp, 0, out=Hp)
+        run = np.maximum.accumulate(Hp + ramp, axis=1)                   # horizontal gap: running max
+        np.maximum(Hp[:, 1:], run[:, :-1] - ramp[:-1] - gap_open, out=H[:, 1:])
+        np.maximum(best, H.max(axis=1), out=best)
+    return best
+
+
+def self_scores(codes: list[np.ndarray]) -> np.ndarray:
+    return np.array([max(int(SCORES[c, c].sum()), 1) for c in codes], dtype=np.int64)
+
+
+def _pad(seqs: list[np.ndarray]) -> np.ndarray:
+    out = np.full((len(seqs), max(len(s) for s in seqs)), PAD, dtype=np.uint8)
+    for r, s in enumerate(seqs):
+        out[r, :len(s)] = s
+    return out
+
+
+def _align_chunk(args) -> np.ndarray:
+    """Pool worker: scores for ``pairs`` of (shorter, longer) sequences as bytes."""
+    pairs, gap_open, gap_extend = args
+    a = _pad([np.frombuffer(x, dtype=np.uint8) for x, _ in pairs])
+    b = _pad([np.frombuffer(y, dtype=np.uint8) for _, y in pairs])
+    return sw_batch(a, b, gap_open, gap_extend)
+
+
+def align_pairs(codes: list[np.ndarray], a: np.ndarray, b: np.ndarray,
+                params: SimilarityParams = SimilarityParams()) -> np.ndarray:
+    """Smith–Waterman scores for the index pairs (a, b), batched by length across a process pool."""
+    if not len(a):
+        return np.empty(0, dtype=np.int32)
+    la = np.array([len(codes[i]) for i in a])
+    lb = np.array([len(codes[j]) for j in b])
+    short = np.where(la <= lb, a, b)
+    long_ = np.where(la <= lb, b, a)
+    # Batch cost is pairs × longest short × longest long; binning both lengths keeps padding near 1.2×
+    bins = np.log(LENGTH_BIN)
+    order = np.lexsort((np.maximum(la, lb), np.floor(np.log(np.minimum(la, lb)) / bins),
+                        np.floor(np.log(np.maximum(la, lb)) / bins)))
+    chunks, cur, width = [], [], 0
+    for p in order:
+        width = max(width, len(codes[long_[p]]))
+        if cur and (len(cur) + 1) * width > BATCH_CELLS:
+            chunks.append(cur)
+            cur, width = [], len(codes[long_[p]])
+        cur.append(p)
+    chunks.append(cur)
+    tasks = [([(codes[short[p]].tobytes(), codes[long_[p]].tobytes()) for p in c],
+              params.gap_open, params.gap_extend) for c in chunks]
+    jobs = min(params.n_jobs or os.cpu_count() or 1, len(tasks))
+    if jobs > 1:
+        # spawn: safe to call from inside the (threaded) Streamlit server
+        with ProcessPoolExecutor(max_workers=jobs, mp_context=multiprocessing.get_context("spawn")) as pool:
+            results = list(pool.map(_align_chunk, tasks))
+    else:
+        results = [_align_chunk(t) for t in tasks]
+    scores = np.empty(len(a), dtype=np.int32)
+    for c, r in zip(chunks, results):
+        scores[c] = r
+    return scores
+
+
+def compute(proteins: dict[str, str], params: SimilarityParams = SimilarityParams()) -> SimilarityResult:
+    ids = sorted(proteins)
+    codes = [encode(proteins[i]) for i in ids]
+    stats = {"proteins": len(ids), "all_pairs": len(ids) * (len(ids) - 1) // 2}
+    t0 = time.perf_counter()
+    sig = signatures(codes, params)
+    a, b, stats["pairs_examined"] = candidate_pairs(sig, params)
+    stats["minhash_s"] = round(time.perf_counter() - t0, 3)
+    t0 = time.perf_counter()
+    scores = align_pairs(codes, a, b, params)
+    stats["aligned_pairs"] = len(a)
+    stats["align_s"] = round(time.perf_counter() - t0, 3)
+    selfs = self_scores(codes)
+    sim = np.clip(scores / np.sqrt(selfs[a] * selfs[b]), 0.0, 1.0) if len(a) else np.empty(0)
+    pairs = pd.DataFrame({"a": a.astype(np.int32), "b": b.astype(np.int32),
+                          "jaccard": _estimate(sig, a, b).astype(np.float32) if len(a) else np.empty(0, np.float32),
+                          "score": scores, "similarity": sim.astype(np.float32)})
+    return SimilarityResult(ids, np.array([len(c) for c in codes], dtype=np.int32), pairs, stats)
+
+
+# ── Matrix, clusters, tree ─────────────────────────────────────────────────────
+def matrix(result: SimilarityResult, idx=None) -> np.ndarray:
+    """Dense similarity over ``idx`` (default: all proteins); unaligned pairs are 0, the diagonal 1."""
+    idx = np.arange(len(result.ids)) if idx is None else np.asarray(idx)
+    pos = np.full(len(result.ids), -1)
+    pos[idx] = np.arange(len(idx))
+    p = result.pairs
+    pa, pb = pos[p["a"].to_numpy()], pos[p["b"].to_numpy()]
+    sel = (pa >= 0) & (pb >= 0)
+    m = np.zeros((len(idx), len(idx)), dtype=np.float32)
+    m[pa[sel], pb[sel]] = m[pb[sel], pa[sel]] = p["similarity"].to_numpy()[sel]
+    np.fill_diagonal(m, 1.0)
+    return m
+
+
+def clusters(result: SimilarityResult, min_similarity: float = 0.3) -> np.ndarray:
+    """Connected components of the graph of pairs with similarity ≥ ``min_similarity``."""
+    from scipy.sparse import coo_matrix
+    from scipy.sparse.csgraph import connected_components
+
+    p = result.pairs[result.pairs["similarity"] >= min_similarity]
+    n = len(result.ids)
+    g = coo_matrix((np.ones(len(p)), (p["a"], p["b"])), shape=(n, n))
+    return connected_components(g, directed=False)[1]
+
+
+@dataclass(frozen=True)
+class Tree:
+    names: list[str]                # leaves are nodes 0..n-1
+    parent: np.ndarray              # node → parent (-1 for the root)
+    length: np.ndarray              # branch length to the parent
+
+    def newick(self) -> str:
+        children: dict[int, list[int]] = {}
+        for node, par in enumerate(self.parent):
+            children.setdefault(int(par), []).append(node)
+
+        def write(node: int) -> str:
+            label = self.names[node] if node < len(self.names) else ""
+            inner = f"({','.join(write(c) for c in children[node])})" if node in children else ""
+            return f"{inner}{label}:{self.length[node]:.5f}"
+
+        root = int(np.flatnonzero(self.parent == -1)[0])
+        return f"({','.join(write(c) for c in children.get(root, []))});"
+
+
+def neighbor_joining(dist: np.ndarray, names: list[str]) -> Tree:
+    """Saitou–Nei neighbour joining on a symmetric distance matrix; negative branches are clipped to 0."""
+    n = len(names)
+    parent = np.full(max(2 * n - 1, 1), -1, dtype=np.int64)
+    length = np.zeros(max(2 * n - 1, 1))
+    d = np.array(dist, dtype=np.float64)
+    nodes = list(range(n))
+    nxt = n
+    while len(nodes) > 2:
+        m = len(nodes)
+        r = d.sum(axis=1)
+        q = (m - 2) * d - r[:, None] - r[None, :]
+        np.fill_diagonal(q, np.inf)
+        i, j = divmod(int(np.argmin(q)), m)
+        li = 0.5 * d[i, j] + (r[i] - r[j]) / (2 * (m - 2))
+        lj = d[i, j] - li
+        parent[nodes[i]] = parent[nodes[j]] = nxt
+        length[nodes[i]], length[nodes[j]] = max(li, 0.0), max(lj, 0.0)
+        du = 0.5 * (d[i] + d[j] - d[i, j])
+        d[i], d[:, i] = du, du
+        d[i, i] = 0.0
+        d = np.delete(np.delete(d, j, axis=0), j, axis=1)
+        nodes[i] = nxt
+        del nodes[j]
+        nxt += 1
+    if len(nodes) == 2:
+        parent[nodes[0]] = parent[nodes[1]] = nxt
+        length[nodes[0]] = length[nodes[1]] = max(d[0, 1], 0.0) / 2
+    return Tree(list(names), parent[:nxt + 1] if n > 1 else parent, length[:nxt + 1] if n > 1 else length)
+
+
+def tree_layout(tree: Tree) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """Rectangular dendrogram: (segments x, x2, y, y2; leaves x, y, name) with leaves in tree order."""
+    children: dict[int, list[int]] = {}
+    for node, par in enumerate(tree.parent):
+        children.setdefault(int(par), []).append(node)
+    root = int(np.flatnonzero(tree.parent == -1)[0])
+    x, y, order, visit = {root: 0.0}, {}, [], []
+    stack = [root]
+    while stack:                                    # pre-order: depths and leaf order
+        node = stack.pop()
+        visit.append(node)
+        for c in reversed(children.get(node, [])):
+            x[c] = x[node] + float(tree.length[c])
+            stack.append(c)
+        if node not in children:
+            y[node] = len(order)
+            order.append(node)
+    for node in reversed(visit):                    # internal y: mean of its children
+        if node in children:
+            y[node] = float(np.mean([y[c] for c in children[node]]))
+    segs = []
+    for node, kids in children.items():
+        if node < 0:
+            continue
+        ys = [y[c] for c in kids]
+        segs.append((x[node], x[node], min(ys), max(ys)))
+        segs += [(x[node], x[c], y[c], y[c]) for c in kids]
+    leaves = pd.DataFrame({"x": [x[v] for v in order], "y": [y[v] for v in order],
+                           "name": [tree.names[v] for v in order]})
+    return pd.DataFrame(segs, columns=["x", "x2", "y", "y2"]), leaves
+
+
+def tree_for(result: SimilarityResult, idx=None) -> Tree:
+    idx = np.arange(len(result.ids)) if idx is None else np.asarray(idx)
+    if len(idx) > TREE_MAX:
+        raise ValueError(f"{len(idx)} proteins; neighbour joining is limited to {TREE_MAX}")
+    return neighbor_joining(1.0 - matrix(result, idx), [result.ids[i] for i in idx])
+
+
+# ── Persistence ────────────────────────────────────────────────────────────────
+def result_dir(sources: list[Path], genes, params: SimilarityParams = SimilarityParams()) -> Path:
+    """Cache directory keyed by the protein source files, the gene set and the scoring parameters."""
+    key = {k: v for k, v in asdict(params).items() if k != "n_jobs"}
+    gene_key = hashlib.sha256("\n".join(sorted(genes)).encode()).hexdigest() if genes is not None else "all"
+    tag = hashlib.sha256(json.dumps([[file_digest(p) for p in sources], gene_key, key], sort_keys=True)
+                         .encode()).hexdigest()[:16]
+    return CACHE_DIR / tag
+
+
+def save(result: SimilarityResult, out: Path) -> None:
+    """Write the result into a staging directory and rename it to ``out``."""
+    p = result.pairs
+    with staged_dir(out) as tmp:
+        np.savez(tmp / "pairs.npz", ids=np.array(result.ids), lengths=result.lengths,
+                 **{c: p[c].to_numpy() for c in p.columns})
+        if len(result.ids) <= TREE_MAX:
+            (tmp / "tree.nwk").write_text(tree_for(result).newick() + "\n")
+        # meta.json last: its presence marks a complete result
+        (tmp / "meta.json").write_text(json.dumps(result.stats, indent=2))
+
+
+def load(out: Path) -> SimilarityResult | None:
+    if not (out / "meta.json").exists():
+        return None
+    z = np.load(out / "pairs.npz")
+    pairs = pd.DataFrame({c: z[c] for c in ("a", "b", "jaccard", "score", "similarity")})
+    return SimilarityResult([str(i) for i in z["ids"]], z["lengths"], pairs,
+                            json.loads((out / "meta.json").read_text()))
+
+
+def ensure(proteins_fn, sources: list[Path], genes, params: SimilarityParams = SimilarityParams()
+           ) -> tuple[SimilarityResult, Path]:
+    """Cached result for this protein set, computing (``proteins_fn()`` → {id: seq}) on a miss."""
+    out = result_dir(sources, genes, params)
+    res = load(out)
+    if res is None:
+        res = compute(proteins_fn(), params)
+        save(res, out)
+    return res, out
+
+
+if __name__ == "__main__":
+    # python -m showcase.similarity [--family OMT | --all] — compute and cache family / proteome similarity
+    from showcase.config import compile_config
+    from showcase.data import ROOT, data_path
+    from showcase.genome import Genome
+
+    ap = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    scope = ap.add_mutually_exclusive_group()
+    scope.add_argument("--family", default="OMT", help="gene family from data.gene_annotation (default OMT)")
+    scope.add_argument("--all", action="store_true", help="every protein")
+    ap.add_argument("--min-jaccard", type=float, default=SimilarityParams.min_jaccard)
+    ap.add_argument("--jobs", type=int)
+    args = ap.parse_args()
+
+    cfg = compile_config(ROOT / "content_config.yaml").cfg
+    prot, fasta, gff = data_path(cfg, "proteome"), data_path(cfg, "genome_fasta"), data_path(cfg, "genome_gff3")
+    if prot is None and (fasta is None or gff is None):
+        raise SystemExit("set data.proteome, or data.genome_fasta and data.genome_gff3")
+    genes = None
+    if not args.all:
+        ann_path = data_path(cfg, "gene_annotation")
+        if ann_path is None:
+            raise SystemExit("data.gene_annotation is needed to select a family")
+        ann = pd.read_csv(ann_path, sep="\t", dtype=str)
+        genes = sorted(ann.loc[ann["family"] == args.family, "gene"])
+    sources = [prot] if prot else [fasta, gff]
+    params = SimilarityParams(min_jaccard=args.min_jaccard, n_jobs=args.jobs)
+    fetch = (lambda: read_proteins(prot, genes)) if prot else (lambda: translate_genes(Genome(fasta, gff), genes))
+    t0 = time.perf_counter()
+    res, out = ensure(fetch, sources, genes, params)
+    s = res.stats
+    print(f"{s['proteins']:,} proteins · {s['pairs_examined']:,} of {s['all_pairs']:,} pairs compared by MinHash "
+          f"({s['minhash_s']} s) · {s['aligned_pairs']:,} aligned ({s['align_s']} s) → {out} "
+          f"[{time.perf_counter() - t0:.1f} s]")
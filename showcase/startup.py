@@ -0,0 +1,149 @@
+"""
+Cold-start profiler: where does the first visitor's wait go?
+
+Runs the app in a fresh interpreter under ``python -X importtime`` with
+``SHOWCASE_METRICS=1`` and splits the time into phases:
+
+* ``import streamlit``    the framework itself (paid once per process)
+* ``first render``        the landing page's first script run, broken down into
+  the imports it triggered (by top-level package), the instrumented blocks
+  (``config_load``, ``block:gallery`` …) and the rest of the script
+* ``--page P``            the first visit to another page in the same process
+
+``--eager`` imports what ``app.py`` used to load at module level (pandas,
+numpy, altair and every ``showcase`` module) before the first render, to
+compare against the deferred imports.
+
+    python -m showcase.startup
+    python -m showcase.startup --page Findings --eager
+"""
+
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+APP = ROOT / "app.py"
+MARK = "## startup-phase "
+EAGER = ("pandas", "numpy", "altair") + tuple(
+    f"showcase.{m}" for m in ("annotation", "config", "correlation", "data", "deseq", "genome", "hic", "images",
+                              "metrics", "modules", "multivariate", "network", "prioritize", "store"))
+_IMPORT = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def _child(page: str | None, eager: bool, timeout: float) -> None:
+    """Runs inside the profiled interpreter; phase markers go to stderr between the importtime lines."""
+    import importlib
+    import logging
+
+    out = {}
+    t0 = time.perf_counter()
+    import streamlit  # noqa: F401
+    from streamlit.testing.v1 import AppTest
+    out["import streamlit"] = time.perf_counter() - t0
+    logging.disable(logging.WARNING)
+
+    print(MARK + "first render", file=sys.stderr, flush=True)
+    t0 = time.perf_counter()
+    if eager:
+        for name in EAGER:
+            importlib.import_module(name)
+    at = AppTest.from_file(str(APP), default_timeout=timeout).run()
+    out["first render"] = time.perf_counter() - t0
+    if at.exception:
+        raise SystemExit(f"first render failed: {at.exception[0].value}")
+    from showcase import metrics
+    out["first render blocks"] = {k: v["total_s"] for k, v in metrics.snapshot()["timers"].items()}
+    out["landing page"] = at.sidebar.radio[0].value
+
+    if page:
+        metrics.reset()
+        print(MARK + f"page {page}", file=sys.stderr, flush=True)
+        t0 = time.perf_counter()
+        at.sidebar.radio[0].set_value(page).run()
+        out[f"page {page}"] = time.perf_counter() - t0
+        if at.exception:
+            raise SystemExit(f"{page} failed: {at.exception[0].value}")
+        out[f"page {page} blocks"] = {k: v["total_s"] for k, v in metrics.snapshot()["timers"].items()}
+    print(json.dumps(out))
+
+
+def parse_importtime(stderr: str) -> dict[str, dict[str, float]]:
+    """phase → top-level package → seconds of cumulative import time started in that phase."""
+    phases, phase = {}, "import streamlit"
+    for line in stderr.splitlines():
+        if line.startswith(MARK):
+            phase = line[len(MARK):].strip()
+            continue
+        m = _IMPORT.match(line)
+        if m and len(m.group(3)) == 1:        # level-0 entries: one space after the bar
+            pkg = m.group(4).split(".")[0]
+            phases.setdefault(phase, {})
+            phases[phase][pkg] = phases[phase].get(pkg, 0.0) + int(m.group(2)) / 1e6
+    return phases
+
+
+def profile(page: str | None = None, eager: bool = False, timeout: float = 300) -> dict:
+    args = [sys.executable, "-X", "importtime", "-m", "showcase.startup", "--child", "--timeout", str(timeout)]
+    if page:
+        args += ["--page", page]
+    if eager:
+        args.append("--eager")
+    env = dict(os.environ, SHOWCASE_METRICS="1", SHOWCASE_METRICS_FILE="")
+    t0 = time.perf_counter()
+    proc = subprocess.run(args, cwd=ROOT, env=env, capture_output=True, text=True)
+    wall = time.perf_counter() - t0
+    if proc.returncode:
+        raise SystemExit(proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "profiling failed")
+    result = json.loads(proc.stdout.strip().splitlines()[-1])
+    result["imports"] = parse_importtime(proc.stderr)
+    result["process wall"] = wall
+    return result
+
+
+def report(r: dict, top: int = 8) -> str:
+    def ms(s):
+        return f"{s * 1000:8.0f} ms"
+
+    lines = [f"{'import streamlit':<34}{ms(r['import streamlit'])}"]
+    phases = [("first render", f"first render ({r['landing page']})")]
+    phases += [(k, k) for k in r if k.startswith("page ") and not k.endswith("blocks")]
+    for key, label in phases:
+        total = r[key]
+        imports = r["imports"].get(key, {})
+        blocks = {k: v for k, v in r[f"{key} blocks"].items() if not k.startswith("page:")}
+        page_block = sum(v for k, v in r[f"{key} blocks"].items() if k.startswith("page:"))
+        lines.append(f"{label:<34}{ms(total)}")
+        lines.append(f"  {'imports':<32}{ms(sum(imports.values()))}")
+        for pkg, s in sorted(imports.items(), key=lambda kv: -kv[1])[:top]:
+            lines.append(f"    {pkg:<30}{ms(s)}")
+        for name, s in sorted(blocks.items(), key=lambda kv: -kv[1]):
+            lines.append(f"  {name:<32}{ms(s)}")
+        if page_block:
+            lines.append(f"  {'page function (incl. above)':<32}{ms(page_block)}")
+    lines.append(f"{'process wall (incl. interpreter)':<34}{ms(r['process wall'])}")
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    ap = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    ap.add_argument("--page", help="also time the first visit to this page")
+    ap.add_argument("--eager", action="store_true", help="import every heavy dependency up front")
+    ap.add_argument("--timeout", type=float, default=300)
+    ap.add_argument("--json", type=Path, help="write the raw numbers here")
+    ap.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = ap.parse_args()
+
+    if args.child:
+        _child(args.page, args.eager, args.timeout)
+    else:
+        r = profile(args.page, args.eager, args.timeout)
+        print(report(r))
+        if args.json:
+            args.json.write_text(json.dumps(r, indent=2))
@@ -0,0 +1,153 @@
+"""
+Columnar, memory-mapped store for the processed omics matrices.
+
+Each table (features × samples) is converted once from CSV/TSV into
+
+    .cache/store/<name>/values.npy    float32, column-major (one sample = one contiguous run)
+    .cache/store/<name>/rows.txt      feature IDs, one per line
+    .cache/store/<name>/columns.txt   sample IDs
+    .cache/store/<name>/meta.json     source digest, shape
+
+and opened with ``np.load(mmap_mode="r")``. The app holds one ``Matrix`` per
+process in a resource cache, so sessions share the mapping and the OS page
+cache shares it across processes; ``select`` copies out only the requested
+rows × columns. Conversion streams the source in chunks and is redone when the
+source file's content hash changes. Each conversion writes to its own staging
+directory next to the table and renames it into place, so processes converting
+the same table at once do not write into each other's files.
+"""
+
+import json
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from showcase.util import file_digest
+
+STORE_DIR = Path(__file__).resolve().parent.parent / ".cache" / "store"
+CHUNK_ROWS = 10_000
+
+
+class Matrix:
+    """Read-only view over one converted table."""
+
+    def __init__(self, path: Path):
+        t0 = time.perf_counter()
+        self.path = Path(path)
+        self.meta = json.loads((self.path / "meta.json").read_text())
+        self.values = np.load(self.path / "values.npy", mmap_mode="r")
+        self.rows = pd.Index((self.path / "rows.txt").read_text(encoding="utf-8").splitlines())
+        self.columns = pd.Index((self.path / "columns.txt").read_text(encoding="utf-8").splitlines())
+        self.open_seconds = time.perf_counter() - t0
+
+    @property
+    def shape(self) -> tuple[int, int]:
+        return self.values.shape
+
+    @property
+    def nbytes(self) -> int:
+        return self.values.nbytes
+
+    def select(self, rows=None, columns=None) -> pd.DataFrame:
+        """Copy of the requested rows × columns (IDs; None = all). Unknown IDs are dropped."""
+        ri = np.arange(len(self.rows)) if rows is None else self._positions(self.rows, rows)
+        ci = np.arange(len(self.columns)) if columns is None else self._positions(self.columns, columns)
+        # Column-at-a-time keeps each read within one contiguous run of the file
+        block = np.empty((len(ri), len(ci)), dtype=self.values.dtype)
+        for j, c in enumerate(ci):
+            block[:, j] = self.values[:, c][ri]
+        return pd.DataFrame(block, index=self.rows[ri], columns=self.columns[ci])
+
+    def frame(self) -> pd.DataFrame:
+        """The whole table as a DataFrame (materialises it)."""
+        return pd.DataFrame(np.asarray(self.values), index=self.rows, columns=self.columns)
+
+    @staticmethod
+    def _positions(index: pd.Index, ids) -> np.ndarray:
+        pos = index.get_indexer(list(ids))
+        return pos[pos >= 0]
+
+
+def convert(src: Path, dest: Path) -> Matrix:
+    """Stream a features × samples CSV/TSV into the store layout at ``dest``."""
+    src = Path(src)
+    sep = "," if src.suffix == ".csv" else "\t"
+    columns = pd.read_csv(src, sep=sep, index_col=0, nrows=0).columns.astype(str)
+    with open(src, "rb") as f:
+        n_rows = sum(1 for line in f if line.strip()) - 1
+
+    digest = file_digest(src)
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    tmp = Path(tempfile.mkdtemp(prefix=f".{dest.name}.", suffix=".tmp", dir=dest.parent))
+    try:
+        _write(src, sep, columns, n_rows, digest, tmp)
+        if _digest(dest) != digest:         # else another process already put this conversion in place
+            old = tmp.with_name(tmp.name + ".old")
+            try:
+                dest.rename(old)            # a stale copy goes aside whole, never half-deleted in place
+            except FileNotFoundError:
+                pass
+            try:
+                tmp.rename(dest)
+            except OSError:                 # another process renamed its copy in first
+                pass
+            shutil.rmtree(old, ignore_errors=True)
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+    return Matrix(dest)
+
+
+def _digest(dest: Path) -> str | None:
+    try:
+        return json.loads((dest / "meta.json").read_text()).get("digest")
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+def _write(src: Path, sep: str, columns: pd.Index, n_rows: int, digest: str, tmp: Path) -> None:
+    values = np.lib.format.open_memmap(tmp / "values.npy", mode="w+", dtype=np.float32,
+                                       shape=(n_rows, len(columns)), fortran_order=True)
+    rows, start = [], 0
+    for chunk in pd.read_csv(src, sep=sep, index_col=0, chunksize=CHUNK_ROWS):
+        values[start:start + len(chunk)] = chunk.apply(pd.to_numeric, errors="coerce").to_numpy(np.float32)
+        rows.extend(chunk.index.astype(str))
+        start += len(chunk)
+    values.flush()
+    del values
+    if start != n_rows:
+        raise ValueError(f"{src.name}: counted {n_rows} data lines but parsed {start} rows")
+
+    (tmp / "rows.txt").write_text("\n".join(rows), encoding="utf-8")
+    (tmp / "columns.txt").write_text("\n".join(columns), encoding="utf-8")
+    (tmp / "meta.json").write_text(json.dumps({
+        "source": src.name, "digest": digest, "shape": [start, len(columns)],
+    }))
+
+
+def ensure(name: str, src: Path, store_dir: Path = STORE_DIR) -> Matrix:
+    """Open ``name`` from the store, converting ``src`` first if missing or stale."""
+    dest = store_dir / name
+    if _digest(dest) != file_digest(src):
+        return convert(src, dest)
+    return Matrix(dest)
+
+
+if __name__ == "__main__":
+    # python -m showcase.store — convert every table listed under data: in the config
+    from showcase.config import compile_config
+    from showcase.data import ROOT, data_path, table_keys
+
+    cfg = compile_config(ROOT / "content_config.yaml").cfg
+    for key in table_keys(cfg):
+        src = data_path(cfg, key)
+        if src is None:
+            print(f"{key}: missing, skipped")
+            continue
+        t0 = time.perf_counter()
+        m = ensure(key, src)
+        print(f"{key}: {m.shape[0]:,} × {m.shape[1]:,} ({m.nbytes / 2**20:.1f} MB) "
+              f"in {time.perf_counter() - t0:.2f} s")
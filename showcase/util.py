@@ -0,0 +1,100 @@
+"""
+Small helpers shared by the showcase modules.
+"""
+
+import functools
+import hashlib
+import importlib
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import types
+from contextlib import contextmanager
+from pathlib import Path
+
+DIGEST_MEMO_SIZE = 1024
+
+
+@functools.lru_cache(maxsize=DIGEST_MEMO_SIZE)
+def _sha256(path: str, size: int, mtime_ns: int) -> str:
+    # size and mtime are part of the key only: a rewritten file is a new entry
+    return hashlib.sha256(Path(path).read_bytes()).hexdigest()
+
+
+def file_digest(path: Path, length: int = 16) -> str:
+    """Short SHA-256 of the file bytes, memoised (LRU) on (path, size, mtime)."""
+    st = Path(path).stat()
+    return _sha256(str(path), st.st_size, st.st_mtime_ns)[:length]
+
+
+@contextmanager
+def staged_dir(dest: Path, replace: bool = False, marker: str = "meta.json"):
+    """
+    A private directory (a ``mkdtemp`` sibling of ``dest``) to write a result
+    into; on a clean exit it is renamed to ``dest`` in one step, so readers
+    never see half-written files and concurrent writers never share them.
+
+    A ``dest`` that already holds ``marker`` was completed by another writer of
+    the same content-keyed result and is kept, unless ``replace``; any other
+    ``dest`` is moved aside whole before the rename, then removed.
+    """
+    dest = Path(dest)
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    tmp = Path(tempfile.mkdtemp(prefix=f".{dest.name}.", suffix=".tmp", dir=dest.parent))
+    try:
+        yield tmp
+        if replace or not (dest / marker).exists():
+            old = tmp.with_name(tmp.name + ".old")
+            try:
+                dest.rename(old)
+            except FileNotFoundError:
+                pass
+            try:
+                tmp.rename(dest)
+            except OSError:                 # another writer's copy landed in between; keep it
+                pass
+            shutil.rmtree(old, ignore_errors=True)
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+def rss_bytes(pid: int | None = None) -> int:
+    """Current resident set size of this process or ``pid`` (peak RSS where /proc is absent)."""
+    try:
+        with open(f"/proc/{pid or 'self'}/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        if pid:
+            out = subprocess.run(["ps", "-o", "rss=", "-p", str(pid)], capture_output=True, text=True).stdout
+            return int(out.strip() or 0) * 1024
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if os.uname().sysname == "Darwin" else peak * 1024
+
+
+class _LazyModule(types.ModuleType):
+    """Stand-in that imports the real module on first attribute access, then mirrors it."""
+
+    def __getattr__(self, attr: str):
+        module = importlib.import_module(self.__name__)     # thread-safe: per-module import locks
+        self.__dict__.update(module.__dict__)
+        return getattr(module, attr)
+
+
+_lazy: dict[str, types.ModuleType] = {}
+
+
+def lazy_import(name: str) -> types.ModuleType:
+    """
+    ``name`` as a module whose import is deferred until it is first used.
+
+    Already-imported modules are returned as they are, so after the first page
+    that needs, say, pandas, every later lookup is a plain module.
+    """
+    if name in sys.modules:
+        return sys.modules[name]
+    if name not in _lazy:
+        _lazy[name] = _LazyModule(name)
+    return _lazy[name]
@@ -0,0 +1,104 @@
+"""Small synthetic inputs for the engine tests, built per test under tmp_path."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+
+def write_table(df: pd.DataFrame, path) -> None:
+    """Features × samples TSV in the layout ``showcase.data.read_matrix`` expects."""
+    df.to_csv(path, sep="\t", index_label="id")
+
+
+@pytest.fixture
+def rng():
+    return np.random.default_rng(0)
+
+
+@pytest.fixture
+def omics(rng):
+    """(expression, metabolites): 300 genes and 6 metabolites over 16 samples, genes g0–g4 tracking m0."""
+    samples = [f"S{i:02d}" for i in range(16)]
+    met = rng.normal(size=(6, 16))
+    expr = rng.normal(size=(300, 16))
+    expr[:5] = met[0] * np.array([[3.0], [2.0], [-2.0], [1.5], [1.0]]) + rng.normal(scale=0.3, size=(5, 16))
+    expr[5] = 4.0                                           # constant: no correlation defined
+    return (pd.DataFrame(expr, index=[f"g{i}" for i in range(300)], columns=samples),
+            pd.DataFrame(met, index=[f"m{i}" for i in range(6)], columns=samples))
+
+
+@pytest.fixture
+def omics_files(tmp_path, omics):
+    expr, met = omics
+    paths = tmp_path / "expression.tsv", tmp_path / "metabolites.tsv"
+    write_table(expr, paths[0])
+    write_table(met, paths[1])
+    return paths
+
+
+@pytest.fixture
+def nb_counts(rng):
+    """(counts, sheet, size factors, true log2 fold changes of C vs A) for 3 stages × 5 replicates."""
+    n_genes, stages = 1500, np.repeat(["A", "B", "C"], 5)
+    sf = np.exp(rng.normal(scale=0.3, size=len(stages)))
+    sf /= np.exp(np.log(sf).mean())
+    base = np.exp(rng.uniform(np.log(20), np.log(2000), n_genes))
+    lfc = np.zeros(n_genes)
+    lfc[:100] = rng.choice([-2.0, 2.0], 100)                # first 100 genes: C differs from A
+    mu = base[:, None] * sf[None, :] * 2.0 ** (lfc[:, None] * (stages == "C")[None, :])
+    disp = 0.02 + 1.0 / base
+    counts = rng.negative_binomial(1.0 / disp[:, None], 1.0 / (1.0 + disp[:, None] * mu))
+    samples = [f"S{i:02d}" for i in range(len(stages))]
+    counts = pd.DataFrame(counts, index=[f"g{i}" for i in range(n_genes)], columns=samples)
+    sheet = pd.DataFrame({"stage": stages, "batch": np.tile(["x", "y"], 8)[:len(stages)]}, index=samples)
+    return counts, sheet, sf, lfc
+
+
+@pytest.fixture
+def counts_files(tmp_path, nb_counts):
+    counts, sheet, _, _ = nb_counts
+    paths = tmp_path / "counts.tsv", tmp_path / "samples.tsv"
+    write_table(counts, paths[0])
+    sheet.to_csv(paths[1], sep="\t", index_label="sample")
+    return paths
+
+
+@pytest.fixture
+def pairs_file(tmp_path, rng):
+    """4DN-style .pairs over chr1 (30 kb) and chr2 (20 kb), contacts decaying with distance."""
+    sizes = {"chr1": 30_000, "chr2": 20_000}
+    lines = ["## pairs format v1.0", "#columns: readID chrom1 pos1 chrom2 pos2"]
+    lines += [f"#chromsize: {c} {n}" for c, n in sizes.items()]
+    for i in range(2000):
+        c1 = "chr1" if rng.random() < 0.6 else "chr2"
+        p1 = int(rng.integers(1, sizes[c1] + 1))
+        if rng.random() < 0.9:
+            c2, p2 = c1, int(np.clip(p1 + rng.normal(scale=2000), 1, sizes[c1]))
+        else:
+            c2 = "chr2" if c1 == "chr1" else "chr1"
+            p2 = int(rng.integers(1, sizes[c2] + 1))
+        lines.append(f"r{i}\t{c1}\t{p1}\t{c2}\t{p2}")
+    path = tmp_path / "contacts.pairs"
+    path.write_text("\n".join(lines) + "\n")
+    return path
+
+
+@pytest.fixture
+def genome_files(tmp_path, rng):
+    """(FASTA, GFF3, sequences): two genes whose mRNA shares the gene's Name and whose CDS spans several lines."""
+    seqs = {"chr1": "".join(rng.choice(list("ACGT"), 3000)), "chr2": "".join(rng.choice(list("ACGT"), 500))}
+    fasta = tmp_path / "genome.fa"
+    fasta.write_text("".join(f">{k} assembled\n" + "\n".join(v[i:i + 60] for i in range(0, len(v), 60)) + "\n"
+                             for k, v in seqs.items()))
+    rows = [
+        ("gene", 101, 900, "+", "ID=gene1;Name=OMT1"),
+        ("mRNA", 101, 900, "+", "ID=mrna1;Parent=gene1;Name=OMT1"),
+        *[("CDS", a, b, "+", "ID=cds1;Parent=mrna1") for a, b in ((101, 200), (301, 400), (601, 700))],
+        ("mRNA", 1001, 1500, "-", "ID=mrna2;Parent=gene2;Name=OMT2"),     # listed before its gene
+        ("gene", 1001, 1500, "-", "ID=gene2;Name=OMT2"),
+        *[("CDS", a, b, "-", "ID=cds2;Parent=mrna2") for a, b in ((1001, 1100), (1201, 1290))],
+    ]
+    gff = tmp_path / "genes.gff3"
+    gff.write_text("##gff-version 3\n" + "".join(f"chr1\ttest\t{t}\t{a}\t{b}\t.\t{s}\t.\t{attrs}\n"
+                                                  for t, a, b, s, attrs in rows))
+    return fasta, gff, seqs
@@ -0,0 +1,74 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from showcase import annotation
+
+
+def _brute(lib_mz, lib_rt, mz, rt, ppm, rt_tol):
+    pairs = set()
+    for q in range(len(mz)):
+        lo, hi = mz[q] * (1 - ppm * 1e-6), mz[q] * (1 + ppm * 1e-6)
+        for j in range(len(lib_mz)):
+            if not lo <= lib_mz[j] <= hi:
+                continue
+            if rt_tol is None or np.isnan(lib_rt[j]) or np.isnan(rt[q]) or abs(lib_rt[j] - rt[q]) <= rt_tol:
+                pairs.add((q, j))
+    return pairs
+
+
+@pytest.mark.parametrize("rt_tol", [0.3, None])
+def test_precursor_query_matches_a_brute_force_scan(rng, rt_tol):
+    ppm = 10.0
+    lib_mz = np.round(rng.uniform(100, 110, 400), 3)               # rounding gives ties in m/z
+    lib_rt = rng.uniform(0, 10, 400)
+    lib_rt[::25] = np.nan
+    mz = np.concatenate([lib_mz[:50] * (1 + rng.uniform(-8, 8, 50) * 1e-6),
+                         [50.0, 200.0, 105.0005]])                   # below, above and maybe between entries
+    rt = np.concatenate([lib_rt[:50] + rng.normal(scale=0.3, size=50), [1.0, 1.0, np.nan]])
+    # library masses exactly on the window edges of the first two queries
+    lib_mz = np.concatenate([lib_mz, [mz[0] * (1 - ppm * 1e-6), mz[1] * (1 + ppm * 1e-6)]])
+    lib_rt = np.concatenate([lib_rt, [rt[0], rt[1]]])
+
+    qi, li = annotation.PrecursorIndex(lib_mz, lib_rt).query(mz, rt, ppm, rt_tol)
+    got = list(zip(qi.tolist(), li.tolist()))
+    assert len(got) == len(set(got))
+    assert set(got) == _brute(lib_mz, lib_rt, mz, rt, ppm, rt_tol)
+    assert {(0, len(lib_mz) - 2), (1, len(lib_mz) - 1)} <= set(got)
+    assert not {q for q, _ in got} & {50, 51}
+
+
+def test_precursor_query_with_no_hits():
+    idx = annotation.PrecursorIndex(np.array([100.0, 200.0]), np.array([1.0, 2.0]))
+    qi, li = idx.query(np.array([150.0, 300.0]), np.array([1.0, 1.0]))
+    assert len(qi) == len(li) == 0
+    qi, li = annotation.PrecursorIndex(np.array([]), np.array([])).query(np.array([100.0]), np.array([1.0]))
+    assert len(qi) == len(li) == 0
+
+
+def _dense_cosine(a, b, bin_width, max_mz=2000.0):
+    def vec(mz, inten):
+        v = np.zeros(int(max_mz / bin_width) + 1)
+        keep = (mz >= 0) & (mz < max_mz) & (inten > 0)
+        np.add.at(v, (mz[keep] / bin_width).astype(int), np.sqrt(inten[keep]))
+        n = np.linalg.norm(v)
+        return v / n if n else v
+    return vec(*a) @ vec(*b)
+
+
+def test_binned_cosine_matches_a_dense_reference(rng):
+    def spectrum(n):
+        return np.sort(rng.uniform(50, 500, n)), rng.uniform(0, 100, n)
+
+    base = spectrum(30)
+    query = [base, (base[0] + 0.001, base[1]), spectrum(12),
+             (np.array([100.0, 100.005, 2500.0]), np.array([4.0, 9.0, 50.0])),      # shared bin, out of range
+             (np.array([]), np.array([]))]
+    library = [base, spectrum(20), (np.array([100.01, 300.0]), np.array([1.0, 0.0]))]
+    meta = lambda peaks: pd.DataFrame(index=range(len(peaks)))
+    cos = annotation.cosine_matrix(annotation.Spectra(meta(query), query),
+                                   annotation.Spectra(meta(library), library), bin_width=0.02).toarray()
+    ref = np.array([[_dense_cosine(q, lib, 0.02) for lib in library] for q in query])
+    np.testing.assert_allclose(cos, ref, atol=1e-12)
+    assert cos[0, 0] == pytest.approx(1.0)
+    assert not cos[-1].any()
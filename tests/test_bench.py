@@ -0,0 +1,22 @@
+from showcase import bench
+
+
+def _results(**pages):
+    return {"pages": {p: {"warm": m} for p, m in pages.items()}}
+
+
+def test_compare_tolerance_and_floor():
+    base = _results(A={"seconds": 1.0, "peak_mb": 10.0, "elements": 100, "bytes": 100_000})
+    same = _results(A={"seconds": 1.4, "peak_mb": 11.9, "elements": 109, "bytes": 110_000})
+    assert bench.compare(same, base) == []
+    worse = _results(A={"seconds": 1.6, "peak_mb": 16.0, "elements": 120, "bytes": 130_000})
+    assert [p.split(":")[0] for p in bench.compare(worse, base)] == [f"A [warm] {k}" for k in bench.TOLERANCE]
+    tiny = _results(A={"seconds": 1.0, "peak_mb": 0.5, "elements": 100, "bytes": 100_000})
+    assert bench.compare(tiny, _results(A={"peak_mb": 0.2})) == []            # +150 % but under the 2 MB floor
+
+
+def test_compare_strict_reports_missing_pages():
+    base = _results(A={"seconds": 1.0})
+    new = _results(A={"seconds": 1.0}, B={"seconds": 1.0})
+    assert bench.compare(new, base) == []
+    assert bench.compare(new, base, strict=True) == ["B [warm]: not in the baseline"]
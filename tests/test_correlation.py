@@ -0,0 +1,64 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+from scipy.stats import false_discovery_control
+
+from showcase import correlation
+
+
+def _brute_force(expr, met):
+    keep = expr.std(axis=1) > 0
+    r = np.corrcoef(expr[keep].to_numpy(), met.to_numpy())[:keep.sum(), keep.sum():]
+    return pd.DataFrame(r, index=expr.index[keep], columns=met.index)
+
+
+def test_matches_corrcoef(omics):
+    expr, met = omics
+    res = correlation.correlate(expr, met, top_k=1000, chunk_size=64)
+    ref = _brute_force(expr, met)
+    got = res.hits.pivot(index="gene", columns="metabolite", values="r").loc[ref.index, ref.columns]
+    np.testing.assert_allclose(got.to_numpy(), ref.to_numpy(), atol=1e-12)
+    assert res.n_tests == ref.size and res.n_samples == expr.shape[1]
+    assert "g5" not in set(res.hits["gene"])
+
+
+def test_top_k_and_fdr(omics):
+    expr, met = omics
+    res = correlation.correlate(expr, met, top_k=7, chunk_size=50)
+    ref = _brute_force(expr, met)
+    p = correlation.pearson_pvalue(ref.to_numpy(), expr.shape[1])
+    q = pd.DataFrame(false_discovery_control(p.ravel()).reshape(p.shape), index=ref.index, columns=ref.columns)
+    for m, hits in res.hits.groupby("metabolite"):
+        want = ref[m].abs().nlargest(7)
+        assert set(hits["gene"]) == set(want.index)
+        assert (np.diff(hits["r"].abs()) <= 0).all()
+        ref_q = q.loc[hits["gene"], m].to_numpy()
+        assert (hits["q"].to_numpy() >= ref_q - 1e-12).all()          # step-up over retained hits only
+        strong = ref_q < 0.05
+        np.testing.assert_allclose(hits["q"].to_numpy()[strong], ref_q[strong], rtol=1e-9)
+    assert set(res.hits.query("metabolite == 'm0'")["gene"].head(5)) == {"g0", "g1", "g2", "g3", "g4"}
+
+
+def test_result_dir_keys_on_inputs_and_top_k(omics_files):
+    expr_path, met_path = omics_files
+    d = correlation.result_dir(expr_path, met_path, 50)
+    assert correlation.result_dir(expr_path, met_path, 50) == d
+    assert correlation.result_dir(expr_path, met_path, 20) != d
+    expr_path.write_text(expr_path.read_text().replace("\t", "\t1", 1))
+    assert correlation.result_dir(expr_path, met_path, 50) != d
+
+
+def test_concurrent_saves_publish_one_complete_result(omics, tmp_path):
+    res = correlation.correlate(*omics, top_k=5)
+    out = tmp_path / "corr" / "abc"
+    with ThreadPoolExecutor(4) as pool:
+        list(pool.map(lambda _: correlation.save(res, out), range(8)))
+    assert os.listdir(out.parent) == ["abc"]                # staging directories are gone
+    loaded = correlation.load(out)
+    assert loaded.n_tests == res.n_tests and len(loaded.hits) == len(res.hits)
+
+    stamp = (out / "hits.tsv").stat().st_mtime_ns
+    correlation.save(res, out)                              # a complete result is left alone
+    assert (out / "hits.tsv").stat().st_mtime_ns == stamp
@@ -0,0 +1,71 @@
+import numpy as np
+import pytest
+
+from showcase import deseq
+
+CONTRASTS = [deseq.Contrast("c_vs_a", "C vs A", "stage", "C", "A"),
+             deseq.Contrast("b_vs_a", "B vs A", "stage", "B", "A"),
+             deseq.Contrast("y_vs_x", "y vs x", "batch", "y", "x")]
+
+
+def test_size_factors(nb_counts):
+    counts, _, sf, _ = nb_counts
+    est = deseq.size_factors(counts.to_numpy(np.float64))
+    np.testing.assert_allclose(est / np.exp(np.log(est).mean()), sf, rtol=0.05)
+
+
+def test_null_calibration_and_power(nb_counts):
+    counts, sheet, _, lfc = nb_counts
+    model = deseq.fit(counts, sheet["stage"])
+    null = deseq.wald(model, "B", "A")                  # B and A share every mean
+    assert 0.02 <= (null["pvalue"] < 0.05).mean() <= 0.08
+    assert (null["padj"] < 0.1).sum() <= 5
+
+    res = deseq.wald(model, "C", "A")
+    de = lfc != 0
+    assert (res["padj"][de] < 0.05).mean() >= 0.95
+    assert (res["padj"][~de] < 0.05).mean() <= 0.01
+    err = (res["log2FoldChange"] - lfc)[de]
+    assert err.abs().median() < 0.15
+    assert (err.abs() < 4 * res["lfcSE"][de]).all()
+    assert list(res.columns) == deseq.RESULT_COLUMNS
+
+
+def test_fit_needs_replicates(nb_counts):
+    counts, sheet, _, _ = nb_counts
+    with pytest.raises(ValueError, match="replicates"):
+        deseq.fit(counts.iloc[:, [0, 5, 10]], sheet["stage"])
+
+
+def test_run_contrasts_caches_per_contrast(counts_files, tmp_path):
+    counts_path, sheet_path = counts_files
+    cache = tmp_path / "de"
+    paths = deseq.run_contrasts(counts_path, sheet_path, CONTRASTS, n_jobs=1, cache_dir=cache)
+    assert set(paths) == {c.id for c in CONTRASTS} and all(p.exists() for p in paths.values())
+    stamps = {cid: p.stat().st_mtime_ns for cid, p in paths.items()}
+    assert deseq.run_contrasts(counts_path, sheet_path, CONTRASTS, n_jobs=1, cache_dir=cache) == paths
+    assert {cid: p.stat().st_mtime_ns for cid, p in paths.items()} == stamps
+
+    res = deseq.load_result(paths["c_vs_a"])
+    assert (res["padj"] < 0.05).sum() >= 95
+
+
+def test_one_fit_per_design(counts_files, tmp_path, monkeypatch):
+    calls = []
+    real_fit = deseq.fit
+    monkeypatch.setattr(deseq, "fit", lambda counts, levels: calls.append(levels.name) or real_fit(counts, levels))
+    counts_path, sheet_path = counts_files
+    deseq.run_contrasts(counts_path, sheet_path, CONTRASTS, n_jobs=1, cache_dir=tmp_path / "de")
+    assert sorted(calls) == ["batch", "stage"]
+
+
+def test_bad_contrasts_fail_before_any_fit(counts_files, tmp_path, monkeypatch):
+    monkeypatch.setattr(deseq, "fit", lambda *a: pytest.fail("fit ran for an invalid contrast"))
+    counts_path, sheet_path = counts_files
+    bad = [*CONTRASTS,
+           deseq.Contrast("z_vs_a", "Z vs A", "stage", "z", "a"),
+           deseq.Contrast("dose", "Dose", "dose", "hi", "lo")]
+    with pytest.raises(deseq.ContrastError, match="z_vs_a: stage has no level 'z'") as err:
+        deseq.run_contrasts(counts_path, sheet_path, bad, n_jobs=1, cache_dir=tmp_path / "de")
+    assert "dose: the sample sheet has no column 'dose'" in str(err.value)
+    assert not (tmp_path / "de").exists()
@@ -0,0 +1,29 @@
+from showcase import catalog, export, modules, precompute
+
+
+def test_page_key_inputs(tmp_path, omics_files, monkeypatch):
+    monkeypatch.setattr(modules, "CACHE_DIR", tmp_path / "modules")
+    monkeypatch.setattr(precompute, "CACHE_DIR", tmp_path / "precompute")
+    expr, met = omics_files
+    cfg = {"study": {"title": "T"}, "data": {"expression_matrix": str(expr), "metabolite_table": str(met)}}
+    study = catalog.Study("t", "T", tmp_path / "content_config.yaml", default=True)
+    app_text = export.APP.read_text(encoding="utf-8")
+
+    def key(page="Findings", text=app_text, s=study):
+        return export.page_key(page, text, cfg, "site.css", s)
+
+    before = key()
+    out = modules.result_dir(expr, met)
+    out.mkdir(parents=True)
+    (out / "meta.json").write_text("{}")                   # modules built after the last export
+    built = key()
+    assert built != before
+
+    precompute._update("t", "modules", key="k", status="ok")
+    assert key() != built
+
+    helper = app_text.replace("res = modules.load(Path(result_dir))", "res = modules.load(Path(result_dir))  # v2")
+    assert helper != app_text and key(text=helper) != key()
+    assert key("Study Design", app_text.replace('"Replicates": ["3"', '"Replicates": ["4"')) != key("Study Design")
+    assert key(s=catalog.Study("u", "U", tmp_path / "other.yaml")) != key()
+    assert key("Methods", helper) == key("Methods")
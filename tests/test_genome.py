@@ -0,0 +1,47 @@
+import pytest
+
+from showcase import genome
+
+
+@pytest.fixture
+def g(genome_files):
+    fasta, gff, _ = genome_files
+    return genome.Genome(fasta, gff)
+
+
+def _cut(seq, *spans):
+    return "".join(seq[a - 1:b] for a, b in spans)
+
+
+def test_name_prefers_the_gene(g):
+    ann = g.annotation
+    for name, gid in (("OMT1", "gene1"), ("OMT2", "gene2")):
+        feat = ann.feature(ann.find(name))
+        assert (feat["type"], feat["id"]) == ("gene", gid)
+
+
+def test_multi_line_features_keep_every_segment(g, genome_files):
+    chr1 = genome_files[2]["chr1"]
+    ann = g.annotation
+    assert len(ann.segments(ann.find("cds1"))) == 3
+    feat, seq = g.spliced("cds1", "CDS")
+    assert (feat["start"], feat["end"]) == (101, 700)
+    assert seq == _cut(chr1, (101, 200), (301, 400), (601, 700))
+    assert g.spliced("OMT1", "CDS")[1] == seq
+
+
+def test_minus_strand_and_gene_span(g, genome_files):
+    chr1 = genome_files[2]["chr1"]
+    assert g.spliced("OMT2", "CDS")[1] == genome.revcomp(_cut(chr1, (1001, 1100), (1201, 1290)))
+    feat, seq = g.spliced("OMT1", "gene")
+    assert feat["type"] == "gene" and seq == chr1[100:900]
+    with pytest.raises(KeyError):
+        g.spliced("OMT3")
+
+
+def test_region_and_fetch(g, genome_files):
+    hits = g.annotation.region("chr1", 350, 650, types=["CDS"])
+    assert sorted(hits["start"]) == [301, 601]
+    assert g.annotation.region("chr2", 1, 500).empty
+    assert g.fasta.fetch("chr2", 61, 130) == genome_files[2]["chr2"][60:130]
+    assert genome.parse_region("chr1:1.5-2kb") == ("chr1", 1500, 2000)
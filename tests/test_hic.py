@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+
+from showcase import hic
+
+
+@pytest.fixture
+def cmap(pairs_file, tmp_path):
+    return hic.ContactMap(hic.build(pairs_file, out_dir=tmp_path / "pyramid", resolutions=(1_000, 5_000)))
+
+
+def test_span(cmap):
+    assert cmap.span("all") == (None, 1, 50_000)
+    assert cmap.span("chr2") == ("chr2", 1, 20_000)
+    assert cmap.span("chr1:2-4kb") == ("chr1", 2_000, 4_000)
+    assert cmap.span("chr2:15,000-90,000") == ("chr2", 15_000, 20_000)     # end clipped
+
+
+@pytest.mark.parametrize("region, message", [
+    ("chr1:12-10kb", "ends before it starts"),
+    ("chr2:25-30kb", "past the end"),
+    ("chrX:1-2kb", "Unknown sequence"),
+])
+def test_span_rejects_bad_regions(cmap, region, message):
+    with pytest.raises(ValueError, match=message):
+        cmap.span(region)
+
+
+@pytest.mark.parametrize("region", ["all", "chr1", "chr2:19,500-20,000", "chr1:1-1"])
+def test_window_of_any_valid_span(cmap, region):
+    chrom, start, end = cmap.span(region)
+    for res in cmap.resolutions:
+        lo, hi = cmap.bin_range(res, chrom, start, end)
+        assert 0 <= lo < hi <= cmap.n_bins(res)
+        w = cmap.window(res, (lo, hi), (lo, hi))
+        assert w.shape == (hi - lo, hi - lo) and np.allclose(w, w.T)
+
+
+def test_levels_conserve_contacts(cmap):
+    fine = cmap.window(1_000, (0, cmap.n_bins(1_000)), (0, cmap.n_bins(1_000)))
+    coarse = cmap.window(5_000, (0, cmap.n_bins(5_000)), (0, cmap.n_bins(5_000)))
+    assert np.triu(fine).sum() == np.triu(coarse).sum() == cmap.meta["contacts"] == 2000
+    # chr1 is bins 0–29 at 1 kb and 0–5 at 5 kb: block sums agree
+    np.testing.assert_allclose(np.triu(fine)[:30, :30].reshape(6, 5, 6, 5).sum(axis=(1, 3)), np.triu(coarse)[:6, :6])
+
+
+def test_rebuild_replaces_a_stale_build_whole(pairs_file, tmp_path):
+    out = tmp_path / "pyramid"
+    (out / "500").mkdir(parents=True)                               # left over from an older build
+    (out / "500" / "bin1.npy").write_bytes(b"stale")
+    hic.build(pairs_file, out_dir=out, resolutions=(1_000, 5_000))
+    hic.build(pairs_file, out_dir=out, resolutions=(1_000, 5_000))
+    assert sorted(p.name for p in out.iterdir()) == ["1000", "5000", "meta.json"]
+    assert not list(tmp_path.glob(".pyramid.*"))                    # no staging directories left
@@ -0,0 +1,33 @@
+from PIL import Image
+
+from showcase import images
+
+
+def _png(path, color, size=(64, 32)):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    Image.new("RGB", size, color).save(path)
+    return path
+
+
+def test_same_stem_sources_keep_their_derivatives(tmp_path):
+    cache = tmp_path / "cache"
+    srcs = [_png(tmp_path / "a" / "assets" / "fig1.png", "red"),
+            _png(tmp_path / "b" / "assets" / "fig1.png", "blue"),
+            _png(tmp_path / "a" / "assets" / "fig1.old.png", "green")]
+    first = [images.derivative(s, 480, cache_dir=cache) for s in srcs]
+    again = [images.derivative(s, 480, cache_dir=cache) for s in srcs]
+    assert len(set(first)) == 3 and again == first
+    assert all(p.exists() for p in first)
+    assert [p.stat().st_mtime_ns for p in again] == [p.stat().st_mtime_ns for p in first]
+
+
+def test_edited_source_prunes_only_its_own_folder(tmp_path):
+    cache = tmp_path / "cache"
+    src, other = _png(tmp_path / "a" / "fig1.png", "red"), _png(tmp_path / "b" / "fig1.png", "blue")
+    old = [images.derivative(src, w, cache_dir=cache) for w in (480, None)]
+    kept = images.derivative(other, 480, cache_dir=cache)
+    _png(src, "white", size=(80, 40))
+    new = images.derivative(src, 480, cache_dir=cache)
+    assert new != old[0] and new.exists()
+    assert not any(p.exists() for p in old)
+    assert kept.exists()
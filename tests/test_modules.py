@@ -0,0 +1,60 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from showcase import modules
+
+
+def _planted(rng, sizes=(60, 45, 35), n_noise=60, n_samples=30):
+    """Genes driven by one of len(sizes) latent factors, plus pure-noise genes."""
+    factors = rng.normal(size=(len(sizes), n_samples))
+    rows, truth = [], []
+    for k, size in enumerate(sizes):
+        load = rng.uniform(0.8, 1.2, size)[:, None] * rng.choice([-1, 1], size)[:, None]
+        rows.append(load * factors[k] + rng.normal(scale=0.35, size=(size, n_samples)))
+        truth += [k] * size
+    rows.append(rng.normal(size=(n_noise, n_samples)))
+    truth += [-1] * n_noise
+    expr = pd.DataFrame(np.vstack(rows), index=[f"g{i}" for i in range(len(truth))],
+                        columns=[f"S{j}" for j in range(n_samples)])
+    traits = pd.DataFrame(factors[:1], index=["trait"], columns=expr.columns)
+    return expr, traits, np.array(truth)
+
+
+def test_recovers_planted_modules(rng, tmp_path):
+    expr, traits, truth = _planted(rng)
+    params = modules.ModuleParams(min_module_size=20, n_jobs=1)
+    res = modules.build_modules(expr, traits, params, work_dir=tmp_path)
+    got = res.assignments.set_index("gene").loc[expr.index, "module"].to_numpy()
+    for k in range(3):
+        labels, counts = np.unique(got[truth == k], return_counts=True)
+        main = labels[counts.argmax()]
+        assert main != modules.GREY and counts.max() >= 0.9 * (truth == k).sum()
+        assert (got[truth != k] == main).sum() <= 3                 # modules do not merge
+    assert (got[truth == -1] == modules.GREY).mean() >= 0.8
+    assert (res.assignments["kME"].abs()[got != modules.GREY] > 0.5).all()
+
+    top = res.trait_cor.loc[res.trait_cor["r"].abs().idxmax(), "module"]
+    assert top == pd.Series(got[truth == 0]).mode()[0]
+
+
+def test_result_dir_ignores_execution_params(omics_files):
+    expr, met = omics_files
+    base = modules.result_dir(expr, met, modules.ModuleParams())
+    assert modules.result_dir(expr, met, modules.ModuleParams(n_jobs=4, memory_budget_mb=64)) == base
+    assert modules.result_dir(expr, met, modules.ModuleParams(power=8)) != base
+    assert modules.result_dir(expr, None, modules.ModuleParams()) != base
+
+
+def test_default_work_dir_is_private_and_save_is_staged(rng, tmp_path, monkeypatch):
+    monkeypatch.setattr(modules, "CACHE_DIR", tmp_path / "modules")
+    expr, traits, _ = _planted(rng)
+    res = modules.build_modules(expr, traits, modules.ModuleParams(min_module_size=20, n_jobs=1))
+    assert os.listdir(tmp_path / "modules") == []                  # the scratch z-scores are removed
+    out = tmp_path / "modules" / "abc"
+    modules.save(res, out)
+    assert os.listdir(tmp_path / "modules") == ["abc"]
+    back = modules.load(out)
+    assert back.power == res.power
+    pd.testing.assert_frame_equal(back.assignments, res.assignments, check_dtype=False)
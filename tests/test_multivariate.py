@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+
+from showcase import multivariate
+
+
+def _same_up_to_sign(a, b, atol):
+    signs = np.sign((a * b).sum(axis=0))
+    np.testing.assert_allclose(a * signs, b, atol=atol)
+
+
+@pytest.fixture
+def values(rng):
+    """Features × samples, positive, with a few strong directions."""
+    p, n = 600, 24
+    latent = rng.normal(size=(p, 4)) * np.array([8.0, 5.0, 3.0, 2.0]) @ rng.normal(size=(4, n))
+    return np.exp(0.2 * (latent + rng.normal(size=(p, n))))
+
+
+@pytest.mark.parametrize("init", [False, True])
+def test_randomized_svd_matches_lapack(rng, init):
+    x = rng.normal(size=(200, 8)) @ np.diag([50, 30, 20, 10, 5, 3, 2, 1.0]) @ rng.normal(size=(8, 300))
+    x += 0.01 * rng.normal(size=x.shape)
+    u, s, vt = np.linalg.svd(x, full_matrices=False)
+    start = vt[:5].T + 0.1 * rng.normal(size=(300, 5)) if init else None
+    ru, rs, rv = multivariate.randomized_svd(x, 5, init=start)
+    np.testing.assert_allclose(rs, s[:5], rtol=1e-6)
+    _same_up_to_sign(ru, u[:, :5], atol=1e-6)
+    _same_up_to_sign(rv, vt[:5].T, atol=1e-6)
+
+
+def test_pca_streaming_matches_svd_and_in_memory_fit(values):
+    x = multivariate.preprocess(values.T, "log2", "pareto")
+    u, s, vt = np.linalg.svd(x, full_matrices=False)
+    streamed = multivariate.pca_streaming(values, k=5, chunk=37)
+    np.testing.assert_allclose(streamed.explained, s[:5] ** 2 / (x ** 2).sum(), rtol=1e-8)
+    _same_up_to_sign(streamed.scores, u[:, :5] * s[:5], atol=1e-8)
+    _same_up_to_sign(streamed.loadings, vt[:5].T, atol=1e-8)
+
+    fit = multivariate.fit_pca(values, k=5)
+    np.testing.assert_allclose(streamed.explained, fit.explained, rtol=1e-8)
+    _same_up_to_sign(streamed.scores, fit.scores, atol=1e-8)
+    _same_up_to_sign(streamed.loadings, fit.loadings, atol=1e-8)
+
+
+def test_opls_da_separates_classes(rng):
+    labels = np.array(["a", "b"] * 10)
+    x = rng.normal(size=(20, 60))
+    x[:, :5] += np.where(labels == "b", 2.0, -2.0)[:, None]
+    x[:, 5:10] += rng.normal(scale=3.0, size=(20, 1))       # structured variation unrelated to class
+    x -= x.mean(axis=0)
+    res = multivariate.opls_da(x, labels, "b", n_orth=1)
+    assert res.r2y > 0.9 and res.q2 > 0.8
+    assert np.sign(res.t_pred[labels == "b"]).tolist() == [np.sign(res.t_pred[1])] * 10
+    assert res.t_orth.shape == (20, 1)
+
+    with pytest.raises(ValueError, match="both classes"):
+        multivariate.opls_da(x, ["a"] * 20, "a")
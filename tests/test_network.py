@@ -0,0 +1,94 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from showcase import network
+
+
+@pytest.fixture
+def net(rng):
+    n, m = 80, 300
+    src, dst = rng.integers(0, n, m), rng.integers(0, n, m)
+    edges = pd.DataFrame({"source": [f"n{i}" for i in src], "target": [f"n{i}" for i in dst],
+                          "weight": (rng.permutation(m) + 1) / m * np.where(rng.random(m) < 0.5, -1, 1)})
+    g = network.Network.from_edges(edges[edges["source"] != edges["target"]])
+    g.pos = rng.random((len(g), 2))
+    return g
+
+
+def _adjacency(net, mask):
+    adj = {i: set() for i in range(len(net))}
+    for e in np.flatnonzero(mask):
+        adj[net.src[e]].add(net.dst[e])
+        adj[net.dst[e]].add(net.src[e])
+    return adj
+
+
+def _brute_ranks(net):
+    rank = np.full(net.n_edges, np.iinfo(np.int32).max)
+    for node in range(len(net)):
+        ids = np.flatnonzero((net.src == node) | (net.dst == node))
+        for pos, e in enumerate(ids[np.argsort(-np.abs(net.weight[ids]), kind="stable")]):
+            rank[e] = min(rank[e], pos)
+    return rank
+
+
+@pytest.mark.parametrize("top_k,min_weight", [(None, 0.0), (2, 0.0), (3, 0.4)])
+def test_edge_mask_and_neighbourhood_match_brute_force(net, top_k, min_weight):
+    rank = _brute_ranks(net)
+    np.testing.assert_array_equal(net.rank, rank)
+    mask = net.edge_mask(top_k, min_weight)
+    expected = np.abs(net.weight) >= min_weight
+    if top_k is not None:
+        expected &= rank < top_k
+    np.testing.assert_array_equal(mask, expected)
+
+    adj = _adjacency(net, mask)
+    for node in (0, 7, 42):
+        assert set(net.neighbours(node, mask).tolist()) == adj[node]
+    seeds = [net.names[0], 5]
+    dist = {0: 0, 5: 0}
+    frontier = {0, 5}
+    for h in (1, 2, 3):
+        frontier = {j for i in frontier for j in adj[i]} - dist.keys()
+        dist.update({j: h for j in frontier})
+    got = net.neighbourhood(seeds, hops=3, edge_mask=mask)
+    assert dict(zip(got["id"].tolist(), got["hops"].tolist())) == dist
+    assert (got["hops"].diff().dropna() >= 0).all()
+
+
+def test_visible_takes_the_strongest_in_view(net):
+    bbox = (0.2, 0.8, 0.1, 0.9)
+    mask = net.edge_mask(4)
+    view = network.visible(net, bbox, mask, max_nodes=10_000, max_edges=15)
+    x, y = net.pos[:, 0], net.pos[:, 1]
+    inside = (x >= 0.2) & (x <= 0.8) & (y >= 0.1) & (y <= 0.9)
+    assert view.total_nodes == inside.sum() and set(view.nodes["node"]) == set(net.names[inside])
+    in_view = np.flatnonzero(inside[net.src] & inside[net.dst] & mask)
+    assert view.total_edges == len(in_view)
+    best = in_view[np.lexsort((-np.abs(net.weight[in_view]), net.rank[in_view]))][:15]
+    np.testing.assert_allclose(view.edges["weight"], net.weight[best])
+    np.testing.assert_allclose(view.edges["x"], net.pos[net.src[best], 0])
+
+    capped = network.visible(net, bbox, mask, max_nodes=20)
+    strongest = np.sort(net.strength[inside])[::-1][:20]
+    np.testing.assert_allclose(np.sort(capped.nodes["strength"].to_numpy())[::-1], strongest)
+    kept = set(zip(capped.nodes["x"], capped.nodes["y"]))
+    assert len(capped.edges) and all(a in kept and b in kept for a, b in
+                                     zip(zip(capped.edges["x"], capped.edges["y"]),
+                                         zip(capped.edges["x2"], capped.edges["y2"])))
+
+
+def test_layout_falls_back_only_on_arpack_errors(net, monkeypatch):
+    from scipy.sparse import linalg
+
+    def no_convergence(*args, **kwargs):
+        raise linalg.ArpackNoConvergence("no convergence", np.empty(0), np.empty((0, 0)))
+
+    monkeypatch.setattr(linalg, "eigsh", no_convergence)
+    pos = network.layout(net, iterations=2)
+    assert pos.shape == (len(net), 2) and np.isfinite(pos).all()
+
+    monkeypatch.setattr(linalg, "eigsh", lambda *a, **k: 1 / 0)
+    with pytest.raises(ZeroDivisionError):
+        network.layout(net, iterations=2)
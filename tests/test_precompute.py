@@ -0,0 +1,54 @@
+from dataclasses import replace
+from types import MappingProxyType
+
+import pytest
+
+from showcase import catalog, precompute
+from showcase.config import compile_config
+
+
+@pytest.fixture
+def target(tmp_path, omics_files):
+    expr, met = omics_files
+    snap = compile_config(catalog.DEFAULT_CONFIG)
+    cfg = {**snap.cfg, "data": {"expression_matrix": str(expr), "metabolite_table": str(met)}}
+    study = catalog.Study("t", "T", tmp_path / "content_config.yaml")
+    return precompute.Target(study, replace(snap, cfg=MappingProxyType(cfg)))
+
+
+def _keys(t):
+    return precompute.keys(t, precompute.graph(t))
+
+
+def _with_cfg(t, **sections):
+    return replace(t, snap=replace(t.snap, cfg=MappingProxyType({**t.cfg, **sections})))
+
+
+def test_missing_inputs_have_no_key(target):
+    ks = _keys(target)
+    assert ks["correlation"] and ks["modules"] and ks["downloads"]
+    assert ks["genome"] is None and ks["hic"] is None and ks["de"] is None
+
+
+def test_input_change_invalidates_dependents(target, omics_files):
+    before = _keys(target)
+    assert _keys(target) == before
+    met = omics_files[1]
+    met.write_text(met.read_text().replace("\t", "\t1", 1))
+    after = _keys(target)
+    changed = {n for n in before if before[n] != after[n]}
+    assert {"store:metabolite_table", "correlation", "modules", "downloads"} <= changed
+    assert "store:expression_matrix" not in changed and "pca:metabolite_table" in changed
+
+
+def test_module_params_change_key_but_execution_params_do_not(target):
+    before = _keys(target)
+    powered = _keys(_with_cfg(target, modules={"power": 8}))
+    assert powered["modules"] != before["modules"] and powered["downloads"] != before["downloads"]
+    assert powered["correlation"] == before["correlation"]
+    assert _keys(replace(target, jobs=8)) == before
+
+
+def test_unknown_module_param_is_rejected(target):
+    with pytest.raises(ValueError, match="n_jobs"):
+        _keys(_with_cfg(target, modules={"n_jobs": 4}))
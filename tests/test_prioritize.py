@@ -0,0 +1,110 @@
+import re
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from showcase import downloads, prioritize
+from showcase.prioritize import Criterion, Ranker
+
+CRITERIA = [Criterion("a", 0.5, min=0.2), Criterion("b", 0.3), Criterion("c", 0.2, min=0.1)]
+
+
+@pytest.fixture
+def features(rng):
+    n = 200
+    df = pd.DataFrame(rng.random((n, 3)), columns=["a", "b", "c"],
+                      index=pd.Index([f"g{i}" for i in range(n)], name="gene"))
+    df.iloc[::17, 0] = np.nan
+    return df
+
+
+def _export_rows(ranker, family, tmp_path):
+    export = downloads.Export("candidates", "Candidate list", "k",
+                              lambda: iter([prioritize.shortlist(ranker.fork(), family)]))
+    built = downloads.build(export, "csv", tmp_path)
+    return pd.read_csv(tmp_path / built.file)
+
+
+@pytest.mark.parametrize("annotated", [True, False])
+def test_export_family_filter(features, annotated, tmp_path):
+    if annotated:
+        features = features.assign(family=np.where(np.arange(len(features)) % 4 == 0, "OMT", "P450"))
+    ranker = Ranker(features, CRITERIA)
+    rows = _export_rows(ranker, "OMT|O-methyltransferase", tmp_path)
+    passing = ranker.fails == 0
+    if annotated:
+        assert len(rows) == (passing & (features["family"] == "OMT").to_numpy()).sum()
+        assert set(rows["family"]) == {"OMT"}
+    else:                                                   # no annotation text: filter not applied
+        assert len(rows) == passing.sum() > 0
+
+
+def test_family_mask_rejects_bad_regex(features):
+    assert prioritize.family_mask(features, "(") is None   # nothing to search
+    with pytest.raises(re.error):
+        prioritize.family_mask(features.assign(description="x"), "(")
+
+
+def _recomputed(features, weight, minimum, eligible):
+    """Score and failure count built from scratch for the given settings."""
+    score = sum(w * prioritize._percentile(features[f].to_numpy(np.float64)) for f, w in weight.items())
+    fails = sum(np.zeros(len(features), dtype=int) if t is None else
+                (features[f].isna() | (features[f] < t)).to_numpy().astype(int) for f, t in minimum.items())
+    return score, fails, (fails == 0) & eligible
+
+
+def test_incremental_updates_match_recomputation(features, rng):
+    ranker = Ranker(features, CRITERIA)
+    weight = {c.feature: c.weight for c in CRITERIA}
+    minimum = {c.feature: c.min for c in CRITERIA}
+    eligible = np.ones(len(features), dtype=bool)
+    for step in range(40):
+        f = ["a", "b", "c"][step % 3]
+        if step % 4 == 0:
+            weight[f] = round(rng.random(), 2)
+            ranker.set_weight(f, weight[f])
+        elif step % 4 == 1:
+            minimum[f] = None if rng.random() < 0.3 else round(rng.random() * 0.6, 2)
+            ranker.set_min(f, minimum[f])
+        elif step % 4 == 2:
+            eligible = rng.random(len(features)) < 0.7
+            ranker.set_eligible(eligible)
+        score, fails, passing = _recomputed(features, weight, minimum, eligible)
+        np.testing.assert_allclose(ranker.score, score, atol=1e-9)
+        np.testing.assert_array_equal(ranker.fails, fails)
+        assert ranker.n_passing == passing.sum()
+
+
+def test_fork_leaves_the_parent_alone(features):
+    parent = Ranker(features, CRITERIA)
+    score, fails, eligible = parent.score.copy(), parent.fails.copy(), parent.eligible.copy()
+    child = parent.fork()
+    child.set_weight("a", 0.9)
+    child.set_min("b", 0.5)
+    child.set_eligible(np.arange(len(features)) % 2 == 0)
+    np.testing.assert_array_equal(parent.score, score)
+    np.testing.assert_array_equal(parent.fails, fails)
+    np.testing.assert_array_equal(parent.eligible, eligible)
+    assert parent.weight["a"] == 0.5 and parent.min["b"] is None
+    assert not np.array_equal(child.score, score)
+
+
+@pytest.mark.parametrize("k", [1, 10, 1000])
+def test_top_matches_a_full_sort(features, k):
+    ranker = Ranker(features, CRITERIA)
+    top = ranker.top(k)
+    score = ranker.normalised_score()
+    passing = np.flatnonzero(ranker.fails == 0)
+    order = passing[np.argsort(-score[passing], kind="stable")][:k]
+    assert top["gene"].tolist() == features.index[order].tolist()
+    assert top["rank"].tolist() == list(range(1, len(order) + 1))
+    np.testing.assert_allclose(top["score"], score[order])
+
+
+def test_nan_fails_a_minimum(features):
+    ranker = Ranker(features, [Criterion("a", 1.0, min=-np.inf)])
+    missing = features["a"].isna().to_numpy()
+    assert missing.any()
+    np.testing.assert_array_equal(ranker.fails, missing.astype(int))
+    assert not set(features.index[missing]) & set(ranker.top(len(features))["gene"])
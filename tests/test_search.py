@@ -0,0 +1,62 @@
+import pytest
+
+from showcase import search
+from showcase.search import EXACT, FUZZY, PREFIX, Doc, Index
+
+
+@pytest.mark.parametrize("a,b,ok", [
+    ("methyl", "methyl", True),
+    ("methyl", "mothyl", True),             # substitution
+    ("methyl", "methyyl", True),            # insertion
+    ("methyl", "metyl", True),              # deletion
+    ("methyl", "mtehyl", True),             # adjacent transposition
+    ("methyl", "methly", True),             # transposition at the end
+    ("methyl", "mothyk", False),            # two substitutions
+    ("methyl", "meyl", False),              # two deletions
+    ("methyl", "emthly", False),            # two transpositions
+    ("methyl", "xmethylx", False),
+    ("abcd", "acdb", False),                # rotation, not a swap
+])
+def test_within_one(a, b, ok):
+    assert search._within_one(a, b) is ok
+    assert search._within_one(b, a) is ok
+
+
+def test_expand_orders_exact_prefix_fuzzy():
+    idx = Index([Doc("P", "methyl", "methylation mothyl wxyz")])
+    assert idx.expand("methyl") == {"methyl": EXACT, "methylation": PREFIX, "mothyl": FUZZY}
+    assert EXACT > PREFIX > FUZZY
+    assert idx.expand("wxyq") == {"wxyz": FUZZY}
+    assert idx.expand("wxz") == {}                          # below MIN_FUZZY_LEN: no edit matches
+    assert len("wxz") < search.MIN_FUZZY_LEN <= len("wxyq")
+
+
+def test_expand_caps_prefix_terms():
+    ids = [f"gene_{i:04d}" for i in range(search.MAX_PREFIX_TERMS + 50)]
+    idx = Index(search.feature_documents("expression_matrix", ids, "gene"))
+    got = idx.expand("gene_")
+    assert len(got) == search.MAX_PREFIX_TERMS
+    assert sorted(got) == ids[:search.MAX_PREFIX_TERMS] and set(got.values()) == {PREFIX}
+
+
+def test_search_ranks_exact_before_prefix_before_fuzzy():
+    docs = [Doc("P", "one", "mothyl"), Doc("P", "two", "methylation"), Doc("P", "three", "methyl")]
+    assert [d.title for d, _ in Index(docs).search("methyl")] == ["three", "two", "one"]
+
+
+def test_search_prefers_documents_with_every_term():
+    docs = [Doc("P", "both", "alpha beta"), Doc("P", "first", "alpha alpha"),
+            Doc("P", "second", "beta"), Doc("P", "other", "gamma")]
+    idx = Index(docs)
+    assert [d.title for d, _ in idx.search("alpha beta")] == ["both"]
+    fallback = [d.title for d, _ in idx.search("alpha gamma")]
+    assert set(fallback) == {"both", "first", "other"}
+    assert idx.search("zzzz") == [] and idx.search("the of") == []
+
+
+def test_id_query_stays_whole():
+    docs = search.feature_documents("expression_matrix", ["gene_001", "gene_002", "gene_100"], "gene")
+    docs.append(Doc("Methods", "Gene models", "gene 00 annotation"))
+    hits = Index(docs).search("gene_00")
+    assert sorted(d.title for d, _ in hits) == ["gene_001", "gene_002"]
+    assert all(d.kind == "feature" and d.page == "Expression" for d, _ in hits)
@@ -0,0 +1,104 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from showcase import similarity
+
+AA = "ACDEFGHIKLMNPQRSTVWY"
+
+
+def _gotoh(x: str, y: str, gap_open: int = 11, gap_extend: int = 1) -> int:
+    """Scalar Smith–Waterman with affine gaps (Gotoh), the reference for ``sw_batch``."""
+    a, b = similarity.encode(x), similarity.encode(y)
+    neg = -10 ** 9
+    H = np.zeros((len(a) + 1, len(b) + 1), dtype=np.int64)
+    E = np.full_like(H, neg)
+    F = np.full_like(H, neg)
+    for i in range(1, len(a) + 1):
+        for j in range(1, len(b) + 1):
+            E[i, j] = max(H[i, j - 1] - gap_open, E[i, j - 1] - gap_extend)
+            F[i, j] = max(H[i - 1, j] - gap_open, F[i - 1, j] - gap_extend)
+            H[i, j] = max(0, H[i - 1, j - 1] + similarity.SCORES[a[i - 1], b[j - 1]], E[i, j], F[i, j])
+    return int(H.max())
+
+
+def _mutate(rng, s: str, rate: float) -> str:
+    out = []
+    for c in s:
+        u = rng.random()
+        if u < rate:
+            out.append(rng.choice(list(AA)))
+        elif u < 1.15 * rate:
+            continue                                        # deletion
+        elif u < 1.3 * rate:
+            out += [c, rng.choice(list(AA))]                # insertion
+        else:
+            out.append(c)
+    return "".join(out)
+
+
+def _pairs(rng, n=40):
+    pairs = []
+    for _ in range(n):
+        x = "".join(rng.choice(list(AA), rng.integers(5, 60)))
+        y = _mutate(rng, x, rng.random()) if rng.random() < 0.7 else "".join(rng.choice(list(AA), rng.integers(5, 60)))
+        pairs.append((x, y) if len(x) <= len(y) else (y, x))
+    return pairs
+
+
+def test_sw_batch_matches_scalar(rng):
+    pairs = _pairs(rng)
+    a = similarity._pad([similarity.encode(x) for x, _ in pairs])
+    b = similarity._pad([similarity.encode(y) for _, y in pairs])
+    got = similarity.sw_batch(a, b)
+    assert got.tolist() == [_gotoh(x, y) for x, y in pairs]
+    assert similarity.sw_batch(a, b, 5, 2).tolist() == [_gotoh(x, y, 5, 2) for x, y in pairs]
+
+
+def test_align_pairs_keeps_pair_order(rng, monkeypatch):
+    monkeypatch.setattr(similarity, "BATCH_CELLS", 300)     # many small length-binned batches
+    seqs = [s for p in _pairs(rng, 20) for s in p]
+    codes = [similarity.encode(s) for s in seqs]
+    a, b = np.triu_indices(len(seqs), k=1)
+    got = similarity.align_pairs(codes, a, b, similarity.SimilarityParams(n_jobs=1))
+    want = [similarity.sw_batch(similarity._pad([codes[i]]), similarity._pad([codes[j]]))[0] for i, j in zip(a, b)]
+    assert got.tolist() == [int(w) for w in want]
+
+
+def test_neighbor_joining_recovers_additive_tree():
+    # unrooted ((A:1,B:2):3,(C:1,D:4)); distances are path lengths
+    names = ["A", "B", "C", "D"]
+    d = np.array([[0, 3, 5, 8], [3, 0, 6, 9], [5, 6, 0, 5], [8, 9, 5, 0]], dtype=float)
+    tree = similarity.neighbor_joining(d, names)
+
+    def up(i):
+        path = {}
+        total = 0.0
+        while i != -1:
+            path[i] = total
+            total += tree.length[i]
+            i = tree.parent[i]
+        return path
+
+    assert tree.parent[0] == tree.parent[1]
+    for i in range(4):
+        for j in range(4):
+            pi, pj = up(i), up(j)
+            lca = min((k for k in pi if k in pj), key=pi.get)
+            assert abs(pi[lca] + pj[lca] - d[i, j]) < 1e-9
+
+
+def test_concurrent_saves_publish_one_complete_result(rng, tmp_path):
+    base = "".join(rng.choice(list(AA), 80))
+    proteins = {f"p{i}": _mutate(rng, base, 0.1 * i) for i in range(6)}
+    res = similarity.compute(proteins, similarity.SimilarityParams(n_jobs=1))
+    out = tmp_path / "sim" / "abc"
+    with ThreadPoolExecutor(4) as pool:
+        list(pool.map(lambda _: similarity.save(res, out), range(8)))
+    assert os.listdir(out.parent) == ["abc"]
+    assert sorted(os.listdir(out)) == ["meta.json", "pairs.npz", "tree.nwk"]
+    back = similarity.load(out)
+    assert back.ids == res.ids
+    pd.testing.assert_frame_equal(back.pairs, res.pairs, check_dtype=False)
@@ -0,0 +1,48 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from showcase import store, util
+from showcase.data import read_matrix
+from tests.conftest import write_table
+
+
+def test_round_trip(omics_files, tmp_path):
+    src = omics_files[0]
+    m = store.ensure("expression", src, tmp_path / "store")
+    ref = read_matrix(src)
+    pd.testing.assert_frame_equal(m.frame(), ref.astype(np.float32), check_names=False)
+    assert m.select(["g3", "nope", "g1"], ["S02"]).index.tolist() == ["g3", "g1"]
+
+
+def test_reconverts_when_the_source_changes(omics, tmp_path):
+    src = tmp_path / "expression.tsv"
+    write_table(omics[0], src)
+    assert store.ensure("expression", src, tmp_path / "store").shape == (300, 16)
+    write_table(omics[0].iloc[:40], src)
+    assert store.ensure("expression", src, tmp_path / "store").shape == (40, 16)
+
+
+def test_concurrent_converts_leave_one_complete_copy(omics_files, tmp_path):
+    src, dest = omics_files[0], tmp_path / "store" / "expression"
+    with ThreadPoolExecutor(4) as pool:
+        shapes = list(pool.map(lambda _: store.convert(src, dest).shape, range(4)))
+    assert shapes == [(300, 16)] * 4
+    assert os.listdir(dest.parent) == ["expression"]        # no staging directories left behind
+    assert store.Matrix(dest).frame().shape == (300, 16)
+
+
+def test_digest_memo_is_bounded(tmp_path):
+    path = tmp_path / "a.txt"
+    path.write_text("one")
+    first = util.file_digest(path)
+    assert util.file_digest(path) == first
+    path.write_text("two!")
+    assert util.file_digest(path) != first
+    for i in range(util.DIGEST_MEMO_SIZE + 10):
+        p = tmp_path / f"f{i}"
+        p.write_bytes(b"x")
+        util.file_digest(p)
+    assert util._sha256.cache_info().currsize <= util.DIGEST_MEMO_SIZE